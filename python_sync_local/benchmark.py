@@ -0,0 +1,597 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the DBF sync pipeline, runnable without UBS or a shop PC.
+
+Generates synthetic UBS-shaped DBF files (ictran by default) and times the
+readers against them.
+
+Usage:
+    python benchmark.py reader --rows 600000
+    python benchmark.py reader --file C:/UBSSTK2015/Sample/ictran.dbf
+    python benchmark.py stream --rows 200000
+    python benchmark.py decode --rows 600000
+    python benchmark.py pushdown --rows 600000 --skip-before 20251201
+    python benchmark.py parallel --rows 600000 --workers 1,2,4,8
+    python benchmark.py mysqlload --rows 200000 [--mysql]
+    python benchmark.py shards --rows 600000 --shards 1,2,3,4,5,6,7,8   (needs MySQL, DB_* settings)
+    python benchmark.py sorted --rows 600000 [--memory-mb 64] [--mysql]
+    python benchmark.py pipeline --rows 600000 [--root /srv/ubs-sample] [--manifest tables.json] [--mysql]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from dbf_writer import write_sample_dbf
+
+# Field layout modelled on UBSSTK2015/ictran.dbf (~470 bytes per record)
+ICTRAN_STRUCTURE = [
+    {'name': 'TYPE', 'type': 'C', 'size': 3, 'decs': 0},
+    {'name': 'REFNO', 'type': 'C', 'size': 12, 'decs': 0},
+    {'name': 'ITEMCOUNT', 'type': 'N', 'size': 5, 'decs': 0},
+    {'name': 'TRANCODE', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'CUSTNO', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'DATE', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'AGENNO', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'ITEMNO', 'type': 'C', 'size': 20, 'decs': 0},
+    {'name': 'DESP', 'type': 'C', 'size': 80, 'decs': 0},
+    {'name': 'DESP2', 'type': 'C', 'size': 80, 'decs': 0},
+    {'name': 'LOCATION', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'QTY', 'type': 'N', 'size': 12, 'decs': 2},
+    {'name': 'QTY1', 'type': 'N', 'size': 12, 'decs': 2},
+    {'name': 'UNIT', 'type': 'C', 'size': 6, 'decs': 0},
+    {'name': 'FACTOR', 'type': 'N', 'size': 10, 'decs': 3},
+    {'name': 'PRICE', 'type': 'N', 'size': 14, 'decs': 4},
+    {'name': 'DISC', 'type': 'C', 'size': 20, 'decs': 0},
+    {'name': 'AMT1', 'type': 'N', 'size': 14, 'decs': 2},
+    {'name': 'AMT', 'type': 'N', 'size': 14, 'decs': 2},
+    {'name': 'QTY_BIL', 'type': 'N', 'size': 12, 'decs': 2},
+    {'name': 'PRICE_BIL', 'type': 'N', 'size': 14, 'decs': 4},
+    {'name': 'UNIT_BIL', 'type': 'C', 'size': 6, 'decs': 0},
+    {'name': 'AMT1_BIL', 'type': 'N', 'size': 14, 'decs': 2},
+    {'name': 'AMT_BIL', 'type': 'N', 'size': 14, 'decs': 2},
+    {'name': 'TAXCODE', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'POSTED', 'type': 'L', 'size': 1, 'decs': 0},
+    {'name': 'TRDATETIME', 'type': 'T', 'size': 8, 'decs': 0},
+    {'name': 'CREATED_BY', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'CREATED_ON', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'UPDATED_BY', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'UPDATED_ON', 'type': 'D', 'size': 8, 'decs': 0},
+]
+
+def generate_ictran_rows(count, seed=1, start_date=datetime.date(2019, 1, 1), end_date=datetime.date(2026, 1, 31)):
+    """Yield `count` ictran-like rows spread across a date range"""
+    rng = random.Random(seed)
+    span = (end_date - start_date).days
+    items = [f"ITM{n:05d}" for n in range(3000)]
+    customers = [f"3000/{n:04d}" for n in range(800)]
+    refno = 0
+    itemcount = 0
+    for n in range(count):
+        if itemcount == 0 or rng.random() < 0.25:
+            refno += 1
+            itemcount = 0
+        itemcount += 1
+        day = start_date + datetime.timedelta(days=span * n // max(count, 1))
+        qty = rng.randint(1, 50)
+        price = round(rng.uniform(1, 500), 4)
+        amount = round(qty * price, 2)
+        yield {
+            'TYPE': rng.choice(['INV', 'INV', 'INV', 'DO', 'CS']),
+            'REFNO': f"IV{refno:08d}",
+            'ITEMCOUNT': itemcount,
+            'TRANCODE': str(itemcount),
+            'CUSTNO': rng.choice(customers),
+            'DATE': day,
+            'AGENNO': rng.choice(['AG01', 'AG02', 'AG03', '']),
+            'ITEMNO': rng.choice(items),
+            'DESP': f"SAMPLE ITEM DESCRIPTION {rng.randint(1, 9999)}",
+            'DESP2': '',
+            'LOCATION': 'HQ',
+            'QTY': qty,
+            'QTY1': qty,
+            'UNIT': 'PCS',
+            'FACTOR': 1,
+            'PRICE': price,
+            'DISC': '',
+            'AMT1': amount,
+            'AMT': amount,
+            'QTY_BIL': qty,
+            'PRICE_BIL': price,
+            'UNIT_BIL': 'PCS',
+            'AMT1_BIL': amount,
+            'AMT_BIL': amount,
+            'TAXCODE': rng.choice(['SR', 'ZR', '']),
+            'POSTED': rng.random() < 0.9,
+            'TRDATETIME': datetime.datetime.combine(day, datetime.time(rng.randint(8, 18), rng.randint(0, 59), rng.randint(0, 59))),
+            'CREATED_BY': 'ADMIN',
+            'CREATED_ON': day,
+            'UPDATED_BY': 'ADMIN',
+            'UPDATED_ON': day,
+        }
+
+
+def ensure_sample_file(path, rows):
+    if path and os.path.exists(path):
+        return path
+    path = path or os.path.join(tempfile.gettempdir(), f"bench_ictran_{rows}.dbf")
+    if not os.path.exists(path):
+        print(f"🔨 Generating {rows:,} synthetic ictran records -> {path}", flush=True)
+        write_sample_dbf(path, ICTRAN_STRUCTURE, generate_ictran_rows(rows))
+    print(f"📁 {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)", flush=True)
+    return path
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def bench_reader(args):
+    from utils import read_dbf_dbflib, read_dbf_native
+
+    path = ensure_sample_file(args.file, args.rows)
+    results = []
+    readers = [('native (mmap)', read_dbf_native)]
+    if not args.skip_dbflib:
+        readers.insert(0, ('dbf.Table', read_dbf_dbflib))
+
+    outputs = {}
+    for label, reader in readers:
+        data, elapsed = timed(reader, path, progress_callback=lambda *a: None)
+        outputs[label] = data['rows']
+        results.append((label, len(data['rows']), elapsed))
+
+    print("\n📊 Reader benchmark")
+    for label, count, elapsed in results:
+        rate = count / elapsed if elapsed > 0 else 0
+        print(f"   {label:<16} {count:>10,} records  {elapsed:8.2f}s  {rate:>10,.0f} records/sec")
+
+    if len(outputs) == 2:
+        baseline, native = outputs.values()
+        print(f"   Output identical: {baseline == native}")
+
+
+def bench_stream(args):
+    """Peak Python heap of read-everything-then-load vs read_dbf_iter streaming, using the SQLite loader"""
+    import tracemalloc
+    from sync_database import sync_to_sqlite, sync_to_sqlite_stream
+    from utils import read_dbf, read_dbf_iter, read_dbf_structure
+
+    path = ensure_sample_file(args.file, args.rows)
+    db_path = os.path.join(tempfile.gettempdir(), 'bench_stream.db')
+    os.environ['SQLITE_DB_PATH'] = db_path
+    structure = read_dbf_structure(path)['structure']
+
+    def full_load():
+        data = read_dbf(path, progress_callback=lambda *a: None)
+        return sync_to_sqlite('bench_full', data['structure'], data['rows'])
+
+    def streamed_load():
+        batches = read_dbf_iter(path, batch_size=args.batch_size, progress_callback=lambda *a: None)
+        return sync_to_sqlite_stream('bench_stream', structure, batches)
+
+    results = []
+    for label, func in [('read_dbf + load', full_load), (f'read_dbf_iter ({args.batch_size:,})', streamed_load)]:
+        if os.path.exists(db_path):
+            os.unlink(db_path)
+        tracemalloc.start()
+        _, elapsed = timed(func)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append((label, elapsed, peak))
+
+    print("\n📊 Streaming benchmark (SQLite loader)")
+    for label, elapsed, peak in results:
+        print(f"   {label:<24} {elapsed:8.2f}s  peak heap {peak / (1024 * 1024):8.1f} MB")
+
+
+def bench_decode(args):
+    """Per field type: scalar per-cell decoding vs the vectorized kernels over the same record matrix"""
+    import numpy as np
+    from dbf_reader import DELETED_FLAG, DBFReader, _pack_column, _text_cells, _exact_cells
+    from record_batch import RecordBatch
+
+    path = ensure_sample_file(args.file, args.rows)
+    groups = {}
+    with DBFReader(path) as reader:
+        matrix = reader.read_matrix(0, reader.record_count)
+        matrix = matrix[matrix[:, 0] != DELETED_FLAG]
+        for field, decode, decode_column in zip(reader._fields, reader._field_decoders, reader._column_decoders):
+            field_type = field['type']
+            if field_type == 'N' and field['decs'] == 0:
+                label, dtype, cells = 'N (integer)', np.int64, _text_cells
+            elif field_type in ('N', 'F'):
+                label, dtype, cells = f'{field_type} (decimal)', np.float64, _text_cells
+            elif field_type == 'D' and field['size'] == 8:
+                label, dtype, cells = 'D', 'datetime64[D]', _text_cells
+            elif field_type == 'L':
+                label, dtype, cells = 'L', np.bool_, _text_cells
+            elif field_type == 'T' and field['size'] == 8:
+                label, dtype, cells = 'T', 'datetime64[ms]', _exact_cells
+            else:
+                continue
+            block = matrix[:, field['offset']:field['offset'] + field['size']]
+            # Fresh scalar decoder so its cache does not carry over from earlier runs
+            decode = reader._build_decoder(field)
+
+            expected, scalar_time = timed(lambda: _pack_column([decode(raw) for raw in cells(block)], dtype))
+            actual, kernel_time = timed(decode_column, block)
+
+            structure = [field]
+            same = (RecordBatch(structure, {field['name']: expected[0]}, {field['name']: expected[1]}).column_values(field['name'])
+                    == RecordBatch(structure, {field['name']: actual[0]}, {field['name']: actual[1]}).column_values(field['name']))
+            group = groups.setdefault(label, [0, 0.0, 0.0, True])
+            group[0] += 1
+            group[1] += scalar_time
+            group[2] += kernel_time
+            group[3] = group[3] and same
+
+    cells_per_field = len(matrix)
+    print(f"\n📊 Decode kernel benchmark ({cells_per_field:,} records)")
+    print(f"   {'type':<14} {'fields':>6} {'scalar':>9} {'kernel':>9} {'speedup':>8}  identical")
+    for label, (fields, scalar_time, kernel_time, same) in groups.items():
+        speedup = scalar_time / kernel_time if kernel_time > 0 else 0
+        rate = fields * cells_per_field / kernel_time if kernel_time > 0 else 0
+        print(f"   {label:<14} {fields:>6} {scalar_time:8.2f}s {kernel_time:8.2f}s {speedup:7.1f}x  {same}  ({rate:,.0f} cells/sec)")
+
+
+def bench_pushdown(args):
+    """SKIP_BEFORE_DATE applied after decoding every column vs pushed down to the raw record matrix"""
+    from dbf_reader import DBFReader
+    from record_batch import DateCutoffFilter, skip_mask_by_date
+
+    path = ensure_sample_file(args.file, args.rows)
+
+    def decode_then_filter():
+        kept = 0
+        with DBFReader(path) as reader:
+            for batch in reader.iter_batches(args.batch_size):
+                kept += len(batch.filter(~skip_mask_by_date(batch, args.skip_before)))
+        return kept
+
+    def pushdown():
+        date_filter = DateCutoffFilter(args.skip_before)
+        with DBFReader(path) as reader:
+            return sum(len(batch) for batch in reader.iter_batches(args.batch_size, row_filter=date_filter))
+
+    print(f"\n📊 SKIP_BEFORE_DATE={args.skip_before} pushdown benchmark")
+    for label, func in [('decode, then filter', decode_then_filter), ('pushdown', pushdown)]:
+        kept, elapsed = timed(func)
+        print(f"   {label:<20} {kept:>10,} records kept  {elapsed:8.2f}s")
+
+
+def bench_parallel(args):
+    """read_dbf_iter decode time with 1, 2, 4, 8 ... worker processes; checks output matches serial"""
+    from record_batch import RecordBatch
+    from utils import read_dbf_iter
+
+    path = ensure_sample_file(args.file, args.rows)
+
+    def read_all(workers):
+        batches = read_dbf_iter(path, batch_size=args.batch_size, progress_callback=lambda *a: None,
+                                skip_before_date=args.skip_before, workers=workers)
+        return RecordBatch.concat(list(batches))
+
+    results = []
+    baseline = None
+    for workers in [int(value) for value in args.workers.split(',')]:
+        batch, elapsed = timed(read_all, workers)
+        if baseline is None:
+            baseline = batch
+        same = (batch is None and baseline is None) or all(
+            batch.column_values(name) == baseline.column_values(name) for name in baseline.field_names)
+        results.append((workers, len(batch) if batch is not None else 0, elapsed, same))
+
+    print(f"\n📊 Parallel decode benchmark ({os.cpu_count()} CPUs)")
+    serial_time = results[0][2]
+    for workers, count, elapsed, same in results:
+        speedup = serial_time / elapsed if elapsed > 0 else 0
+        print(f"   {workers:>2} workers  {count:>10,} records  {elapsed:8.2f}s  {speedup:5.2f}x  identical: {same}")
+
+
+def bench_mysqlload(args):
+    """
+    Client-side cost of the TSV stream vs the executemany row tuples, and with --mysql
+    (DB_HOST / DB_USER / ... from the environment) the streamed LOAD DATA LOCAL against
+    the chunked insert path into the same table, checking both leave identical rows.
+    """
+    from ultra_fast_import import (TsvStream, chunked_batch_method, connect_streaming_mysql,
+                                   generate_mysql_create_table, load_data_local_method, local_infile_unavailable)
+    from sync_database import column_width_transforms
+    from utils import read_dbf_iter, read_dbf_structure
+
+    path = ensure_sample_file(args.file, args.rows)
+    structure = read_dbf_structure(path)['structure']
+    names = [field['name'] for field in structure]
+    batches = list(read_dbf_iter(path, batch_size=args.batch_size, progress_callback=lambda *a: None))
+    rows = sum(len(batch) for batch in batches)
+
+    def tuples():
+        transforms = column_width_transforms(structure)
+        return sum(len(batch.row_tuples(names, transforms)) for batch in batches)
+
+    def insert_values():
+        # What the connector does to every value before it can send a multi-row INSERT
+        from mysql.connector.conversion import MySQLConverter
+        converter = MySQLConverter('utf8mb4')
+        convert = lambda value: converter.quote(converter.escape(converter.to_mysql(value)))
+        transforms = column_width_transforms(structure)
+        return sum(len([tuple(map(convert, row)) for row in batch.row_tuples(names, transforms)])
+                   for batch in batches)
+
+    def tsv():
+        stream = TsvStream(structure, batches)
+        size = 0
+        while True:
+            data = stream.read(131056)
+            if not data:
+                return size
+            size += len(data)
+
+    _, tuples_time = timed(tuples)
+    _, insert_time = timed(insert_values)
+    size, tsv_time = timed(tsv)
+    print(f"\n📊 MySQL load benchmark ({rows:,} records)")
+    print(f"   {'row tuples (executemany input)':<34} {tuples_time:8.2f}s")
+    print(f"   {'+ pure-Python connector escaping':<34} {insert_time:8.2f}s")
+    print(f"   {'TSV stream encoding':<34} {tsv_time:8.2f}s  {size / (1024 * 1024):.1f} MB")
+    if not args.mysql:
+        print("   (pass --mysql to time the loads against DB_HOST / DB_NAME)")
+        return
+
+    connection = connect_streaming_mysql()
+    cursor = connection.cursor()
+    unavailable = local_infile_unavailable(cursor)
+    checksums = {}
+
+    def reset_table():
+        cursor.execute("DROP TABLE IF EXISTS `bench_load`")
+        cursor.execute(generate_mysql_create_table('bench_load', structure))
+
+    methods = [('chunked executemany', lambda: chunked_batch_method('bench_load', structure, batches, connection, cursor))]
+    if unavailable is None:
+        methods.append(('LOAD DATA LOCAL (stream)',
+                        lambda: load_data_local_method('bench_load', structure, TsvStream(structure, batches),
+                                                       connection, cursor)))
+    for label, func in methods:
+        reset_table()
+        loaded, elapsed = timed(func)
+        cursor.execute("CHECKSUM TABLE `bench_load`")
+        checksums[label] = cursor.fetchone()[1]
+        rate = loaded / elapsed if elapsed > 0 else 0
+        print(f"   {label:<34} {elapsed:8.2f}s  {loaded:>10,} records  {rate:>10,.0f} records/sec")
+    if unavailable is not None:
+        print(f"   LOAD DATA LOCAL skipped: {unavailable}")
+    else:
+        print(f"   Identical rows: {len(set(checksums.values())) == 1}")
+    cursor.execute("DROP TABLE IF EXISTS `bench_load`")
+    cursor.close()
+    connection.close()
+
+
+def bench_shards(args):
+    """
+    Full load time into one MySQL table over K connections (shard_load.sharded_import),
+    split by REFNO ranges, for each K; checks every run leaves the same rows.
+    """
+    from shard_load import shard_boundaries, sharded_import
+    from ultra_fast_import import connect_streaming_mysql, generate_mysql_create_table
+    from utils import read_dbf_iter, read_dbf_structure
+
+    path = ensure_sample_file(args.file, args.rows)
+    structure = read_dbf_structure(path)['structure']
+    batches = list(read_dbf_iter(path, batch_size=args.batch_size, progress_callback=lambda *a: None))
+    keys = [key for batch in batches for key in batch.column_values(args.key)]
+
+    connection = connect_streaming_mysql()
+    cursor = connection.cursor()
+    results = []
+    for shards in [int(value) for value in args.shards.split(',')]:
+        cursor.execute("DROP TABLE IF EXISTS `bench_shards`")
+        cursor.execute(generate_mysql_create_table('bench_shards', structure))
+        boundaries = shard_boundaries(keys, shards)
+        loaded, elapsed = timed(sharded_import, 'bench_shards', structure, batches, args.key, shards, boundaries)
+        cursor.execute("CHECKSUM TABLE `bench_shards`")
+        results.append((shards, loaded, elapsed, cursor.fetchone()[1]))
+    cursor.execute("DROP TABLE IF EXISTS `bench_shards`")
+    cursor.close()
+    connection.close()
+
+    print(f"\n📊 Sharded load benchmark ({len(keys):,} records, split by {args.key})")
+    baseline = results[0][2]
+    for shards, loaded, elapsed, checksum in results:
+        rate = loaded / elapsed if elapsed > 0 else 0
+        speedup = baseline / elapsed if elapsed > 0 else 0
+        print(f"   {shards:>2} connections  {elapsed:8.2f}s  {rate:>10,.0f} records/sec  {speedup:5.2f}x  "
+              f"identical: {checksum == results[0][3]}")
+
+
+def bench_sorted(args):
+    """
+    Sort time of key_sort.sort_batches (in memory and spilled), and with --mysql the load time
+    and data_length / index_length of a table clustered on the key, loaded in file order vs key order.
+    """
+    from key_sort import sort_batches
+    from utils import read_dbf_iter, read_dbf_structure
+
+    path = ensure_sample_file(args.file, args.rows)
+    structure = read_dbf_structure(path)['structure']
+    keys = [key.strip() for key in args.key.split(',')]
+    batches = list(read_dbf_iter(path, batch_size=args.batch_size, progress_callback=lambda *a: None))
+    rows = sum(len(batch) for batch in batches)
+
+    orders = {"file order": batches}
+    print(f"\n📊 Key sort benchmark ({rows:,} records, by {', '.join(keys)})")
+    for label, memory_mb in (("in memory", 1e9), (f"{args.memory_mb:g} MB budget", args.memory_mb)):
+        result, elapsed = timed(lambda: list(sort_batches(batches, keys, memory_mb=memory_mb, batch_rows=args.batch_size)))
+        print(f"   {label:<18} {elapsed:8.2f}s  {rows / elapsed if elapsed > 0 else 0:>10,.0f} records/sec")
+        orders["key order"] = result
+    if not args.mysql:
+        return
+
+    from ultra_fast_import import connect_streaming_mysql, generate_mysql_create_table, ultra_fast_mysql_import_stream
+
+    connection = connect_streaming_mysql()
+    cursor = connection.cursor()
+    column_list = ", ".join(f"`{key}`" for key in keys)
+    unique = len({tuple(row) for batch in batches for row in batch.row_tuples(keys)}) == rows
+    # InnoDB clusters rows on the primary key; with duplicate keys the key index stands in for it
+    clustered = f"ADD PRIMARY KEY ({column_list})" if unique else f"ADD INDEX `idx_key` ({column_list})"
+    results = []
+    for label, ordered in orders.items():
+        cursor.execute("DROP TABLE IF EXISTS `bench_sorted`")
+        cursor.execute(generate_mysql_create_table('bench_sorted', structure))
+        cursor.execute(f"ALTER TABLE `bench_sorted` {clustered}")
+        loaded, elapsed = timed(ultra_fast_mysql_import_stream, 'bench_sorted', structure, ordered,
+                                append=True, verbose=False)
+        cursor.execute("ANALYZE TABLE `bench_sorted`")
+        cursor.fetchall()
+        cursor.execute("SELECT data_length, index_length FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = 'bench_sorted'")
+        data_length, index_length = cursor.fetchone()
+        results.append((label, loaded, elapsed, data_length, index_length))
+    cursor.execute("DROP TABLE IF EXISTS `bench_sorted`")
+    cursor.close()
+    connection.close()
+
+    print(f"\n📊 Load into a table with {'PRIMARY KEY' if unique else 'an index'} ({column_list})")
+    for label, loaded, elapsed, data_length, index_length in results:
+        rate = loaded / elapsed if elapsed > 0 else 0
+        print(f"   {label:<10} {elapsed:8.2f}s  {rate:>10,.0f} records/sec  "
+              f"data {data_length / 1024 / 1024:8.1f} MB  index {index_length / 1024 / 1024:8.1f} MB")
+
+
+def bench_pipeline(args):
+    """
+    The whole sync (main.py) as tables.json drives it, against a synthetic ictran or the DBFs under
+    --root: a first run, a run with nothing changed and a --force run, each in its own process.
+    State files and the SQLite database (unless --mysql) go into a temporary directory.
+    """
+    import json
+    import shutil
+    import subprocess
+    from table_manifest import MANIFEST_FILE
+
+    work = tempfile.mkdtemp(prefix="bench_pipeline_")
+    with open(args.manifest or MANIFEST_FILE, encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    subpath = manifest.get("source", {}).get("subpath", "Sample")
+    root = args.root
+    if root is None:
+        # Only ictran, from a synthetic file laid out as UBS would
+        root = os.path.join(work, "dbf")
+        ictran = dict(manifest["tables"]["ictran"], depends_on=[])
+        manifest["tables"] = {"ictran": ictran}
+        path = os.path.join(root, ictran["directory"], subpath, "ictran.dbf")
+        os.makedirs(os.path.dirname(path))
+        shutil.copyfile(ensure_sample_file(None, args.rows), path)
+    manifest_path = os.path.join(work, "tables.json")
+    with open(manifest_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+
+    env = dict(os.environ, DBF_ROOT=root, DBF_SUBPATH=subpath, TABLE_MANIFEST=manifest_path,
+               DBF_WATERMARK_FILE=os.path.join(work, "watermarks.json"),
+               DBF_BLOCK_STATE_FILE=os.path.join(work, "block_state.json"),
+               DBF_MANIFEST_FILE=os.path.join(work, "file_manifest.json"),
+               LOAD_HISTORY_FILE=os.path.join(work, "load_history.json"))
+    if not args.mysql:
+        env.update(DB_TYPE="sqlite", SQLITE_DB_PATH=os.path.join(work, "bench.db"))
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+    print(f"\n📊 Pipeline benchmark ({len(manifest['tables'])} tables from {root}, "
+          f"{'MySQL' if args.mysql else 'SQLite'})")
+    try:
+        for label, extra in (("first run", []), ("unchanged", []), ("--force", ["--force"])):
+            result, elapsed = timed(subprocess.run, [sys.executable, main_script] + extra, env=env,
+                                    capture_output=True, text=True, encoding="utf-8")
+            files = [line for line in result.stdout.splitlines() if line.startswith("📋 Files:")]
+            print(f"   {label:<10} {elapsed:8.2f}s  {files[-1][len('📋 Files: '):] if files else ''}")
+            if result.returncode != 0:
+                print(result.stdout[-2000:] + result.stderr[-2000:])
+                return
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DBF sync benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    reader = sub.add_parser('reader', help="dbf.Table reader vs native mmap reader")
+    reader.add_argument('--rows', type=int, default=600000, help="synthetic ictran records to generate")
+    reader.add_argument('--file', help="existing DBF to read instead of a synthetic one")
+    reader.add_argument('--skip-dbflib', action='store_true', help="only time the native reader")
+    reader.set_defaults(func=bench_reader)
+
+    stream = sub.add_parser('stream', help="peak memory of full read vs streamed batches")
+    stream.add_argument('--rows', type=int, default=200000, help="synthetic ictran records to generate")
+    stream.add_argument('--file', help="existing DBF to read instead of a synthetic one")
+    stream.add_argument('--batch-size', type=int, default=5000, help="rows per streamed batch")
+    stream.set_defaults(func=bench_stream)
+
+    decode = sub.add_parser('decode', help="scalar vs vectorized decoding per field type")
+    decode.add_argument('--rows', type=int, default=600000, help="synthetic ictran records to generate")
+    decode.add_argument('--file', help="existing DBF to decode instead of a synthetic one")
+    decode.set_defaults(func=bench_decode)
+
+    pushdown = sub.add_parser('pushdown', help="date cutoff after full decoding vs on the raw matrix")
+    pushdown.add_argument('--rows', type=int, default=600000, help="synthetic ictran records to generate")
+    pushdown.add_argument('--file', help="existing DBF to read instead of a synthetic one")
+    pushdown.add_argument('--skip-before', default='20251201', help="cutoff date, YYYYMMDD")
+    pushdown.add_argument('--batch-size', type=int, default=5000, help="records per batch")
+    pushdown.set_defaults(func=bench_pushdown)
+
+    parallel = sub.add_parser('parallel', help="decode scaling with 1..N worker processes")
+    parallel.add_argument('--rows', type=int, default=600000, help="synthetic ictran records to generate")
+    parallel.add_argument('--file', help="existing DBF to read instead of a synthetic one")
+    parallel.add_argument('--workers', default='1,2,4,8', help="comma-separated worker counts; the first is the baseline")
+    parallel.add_argument('--batch-size', type=int, default=5000, help="records per shard")
+    parallel.add_argument('--skip-before', help="optional SKIP_BEFORE_DATE cutoff, YYYYMMDD")
+    parallel.set_defaults(func=bench_parallel)
+
+    mysqlload = sub.add_parser('mysqlload', help="streamed LOAD DATA LOCAL vs chunked inserts")
+    mysqlload.add_argument('--rows', type=int, default=200000, help="synthetic ictran records to generate")
+    mysqlload.add_argument('--file', help="existing DBF to load instead of a synthetic one")
+    mysqlload.add_argument('--batch-size', type=int, default=5000, help="records per batch")
+    mysqlload.add_argument('--mysql', action='store_true', help="also load into MySQL (DB_* settings)")
+    mysqlload.set_defaults(func=bench_mysqlload)
+
+    shards = sub.add_parser('shards', help="one table loaded over 1..K MySQL connections at once")
+    shards.add_argument('--rows', type=int, default=600000, help="synthetic ictran records to generate")
+    shards.add_argument('--file', help="existing DBF to load instead of a synthetic one")
+    shards.add_argument('--batch-size', type=int, default=5000, help="records per batch")
+    shards.add_argument('--shards', default='1,2,3,4,5,6,7,8', help="comma-separated connection counts; the first is the baseline")
+    shards.add_argument('--key', default='REFNO', help="field whose ranges split the rows")
+    shards.set_defaults(func=bench_shards)
+
+    sorted_load = sub.add_parser('sorted', help="file order vs key order: sort cost, load time and table size")
+    sorted_load.add_argument('--rows', type=int, default=600000, help="synthetic ictran records to generate")
+    sorted_load.add_argument('--file', help="existing DBF to load instead of a synthetic one")
+    sorted_load.add_argument('--batch-size', type=int, default=5000, help="records per batch")
+    sorted_load.add_argument('--key', default='REFNO,ITEMCOUNT', help="comma-separated key fields")
+    sorted_load.add_argument('--memory-mb', type=float, default=64, help="sort memory budget for the spilling run")
+    sorted_load.add_argument('--mysql', action='store_true', help="also load both orders into MySQL (DB_* settings)")
+    sorted_load.set_defaults(func=bench_sorted)
+
+    pipeline = sub.add_parser('pipeline', help="full sync runs driven by the table manifest")
+    pipeline.add_argument('--rows', type=int, default=600000, help="synthetic ictran records to generate")
+    pipeline.add_argument('--root', help="DBF_ROOT holding sample DBFs instead of a synthetic ictran")
+    pipeline.add_argument('--manifest', help="table manifest to run (default tables.json)")
+    pipeline.add_argument('--mysql', action='store_true', help="sync into MySQL (DB_* settings) instead of SQLite")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
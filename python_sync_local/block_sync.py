@@ -0,0 +1,183 @@
+"""
+Block-level change detection for DBF files UBS edits in place (artran, arpost).
+
+The records of a file are hashed in blocks of BLOCK_RECORDS whole records and
+the hashes are stored after each successful sync, together with how many table
+rows every block produced. On the next run only the blocks whose hash changed
+(or that are new) are decoded. In the table, every row whose key appears in a
+changed block - deleted and filtered-out records included - is deleted and the
+block's current rows are inserted again, so edits, deletions and appends all
+become a small replace by key instead of a TRUNCATE and full load.
+
+A full reload is done instead for the same reasons as a tail read falls back
+(see watermark.state_reload_reason). After applying the changes, the number of
+deleted rows must equal what the changed blocks held before; anything else
+(a key edited in place, the same key in two blocks, rows added by another
+process) means the table no longer matches and main.py reloads it in full.
+"""
+
+import datetime
+import os
+import time
+
+from dbf_reader import DBFReader
+from record_batch import DateCutoffFilter
+from row_filters import combine_filters
+from watermark import (STATE_LOCK, compute_watermark, digest, load_state_file, state_reload_reason,
+                       watermark_key, write_state_file)
+
+BLOCK_STATE_FILE = os.getenv(
+    "DBF_BLOCK_STATE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sync_state", "block_hashes.json"),
+)
+# Records per hashed block; changed blocks are re-decoded whole
+BLOCK_RECORDS = int(os.getenv("DBF_BLOCK_RECORDS", "2048"))
+
+
+class BlockPlan:
+    """
+    Block hashes of a DBF and which blocks to read; reason is None for an incremental sync.
+    detected: blocks whose hash differs from the stored one (all blocks if nothing comparable is
+    stored); a full reload still reads every block but reports this number.
+    """
+
+    def __init__(self, hashes, changed, reason, layout, block_records, previous=None, detected=None):
+        self.hashes = hashes
+        self.changed = changed
+        self.detected = len(changed) if detected is None else detected
+        self.reason = reason
+        self.layout = layout
+        self.block_records = block_records
+        self.previous = previous
+        # Table rows per block, updated as blocks are read
+        self.block_rows = [0] * len(hashes)
+        if reason is None:
+            kept = previous["block_rows"][:len(hashes)]
+            self.block_rows[:len(kept)] = kept
+
+    @property
+    def incremental(self):
+        return self.reason is None
+
+    @property
+    def changed_fraction(self):
+        return self.detected / len(self.hashes) if self.hashes else 0.0
+
+    @property
+    def expected_deleted(self):
+        """Rows the changed blocks held in the table after the previous sync"""
+        old_rows = self.previous["block_rows"] if self.previous else []
+        return sum(old_rows[index] for index in self.changed if index < len(old_rows))
+
+    def block_range(self, index):
+        start = index * self.block_records
+        return start, min(start + self.block_records, self.layout["record_count"])
+
+    def full_reload(self, reason):
+        """The same file, planned as a full reload of every block"""
+        return BlockPlan(self.hashes, list(range(len(self.hashes))), reason, self.layout, self.block_records,
+                         detected=self.detected)
+
+
+def hash_blocks(reader, block_records=None):
+    """Hash of every block of `block_records` records (deletion flags included); the last block may be short"""
+    block_records = block_records or BLOCK_RECORDS
+    return [digest(reader.raw_records(start, start + block_records))
+            for start in range(0, reader.record_count, block_records)]
+
+
+def plan_block_sync(dbf_file_path, table_name, context, table_rows, key_fields, force_full=False):
+    """
+    Hash the file and compare with the stored block hashes.
+
+    context:    JSON-serializable settings the loaded rows depend on (filters, cutoff dates)
+    table_rows: current row count of the table (None if it does not exist)
+    key_fields: fields identifying a row; all must exist in the DBF for an incremental sync
+    force_full: always plan a full reload (the new hashes are still stored afterwards)
+    """
+    previous = load_state_file(BLOCK_STATE_FILE).get(watermark_key(table_name))
+    with DBFReader(dbf_file_path) as reader:
+        layout = compute_watermark(reader, tail_records=0)
+        hashes = hash_blocks(reader)
+        missing = [name for name in key_fields if name not in reader.field_names]
+
+        if force_full:
+            reason = "full reload requested"
+        elif missing:
+            reason = f"key fields missing from DBF: {', '.join(missing)}"
+        elif previous is not None and previous.get("block_records") != BLOCK_RECORDS:
+            reason = "block size changed"
+        else:
+            reason = state_reload_reason(reader, previous, context, table_rows)
+
+    if previous is not None and previous.get("block_records") == BLOCK_RECORDS:
+        old_hashes = previous["hashes"]
+        changed = [index for index, value in enumerate(hashes)
+                   if index >= len(old_hashes) or old_hashes[index] != value]
+    else:
+        changed = list(range(len(hashes)))
+
+    if reason is not None:
+        return BlockPlan(hashes, list(range(len(hashes))), reason, layout, BLOCK_RECORDS, detected=len(changed))
+    return BlockPlan(hashes, changed, None, layout, BLOCK_RECORDS, previous)
+
+
+def iter_block_changes(dbf_file_path, plan, key_fields=None, skip_before_date=None, row_filter=None):
+    """
+    Yield (delete_keys, batch) for each block in plan.changed, in file order.
+
+    delete_keys: key tuples of every record in the block, deleted ones included
+                 (empty when key_fields is None, e.g. for a full reload)
+    batch:       the block's current rows after deleted records, SKIP_BEFORE_DATE
+                 and `row_filter` are applied (may be empty)
+    plan.block_rows is updated with each block's row count.
+    """
+    date_filter = DateCutoffFilter(skip_before_date) if skip_before_date else None
+    combined_filter = combine_filters(date_filter, row_filter)
+    records_read = 0
+    start_time = time.time()
+
+    with DBFReader(dbf_file_path) as reader:
+        for index in plan.changed:
+            start, stop = plan.block_range(index)
+            delete_keys = []
+            if key_fields:
+                keys = reader.decode_matrix(reader.read_matrix(start, stop), key_fields)
+                delete_keys = list(dict.fromkeys(zip(*[keys.column_values(name) for name in key_fields])))
+            batch = reader.read_batch(start, stop, combined_filter)
+            plan.block_rows[index] = len(batch)
+            records_read += len(batch)
+            yield delete_keys, batch
+
+    elapsed = time.time() - start_time
+    rate = records_read / elapsed if elapsed > 0 else 0
+    print(f"✅ Read {records_read:,} records in {elapsed:.2f}s ({rate:.0f} records/sec)", flush=True)
+    if date_filter is not None and date_filter.skipped:
+        print(f"⏭️  Skipped {date_filter.skipped:,} records before {skip_before_date} (performance optimization)",
+              flush=True)
+
+
+def save_block_state(table_name, plan, context, table_rows):
+    """Store a plan's block hashes and row counts after its changes were loaded successfully"""
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    entry = dict(plan.layout)
+    entry["block_records"] = plan.block_records
+    entry["hashes"] = plan.hashes
+    entry["block_rows"] = plan.block_rows
+    entry["context"] = context
+    entry["table_rows"] = table_rows
+    entry["synced_at"] = now
+    entry["full_synced_at"] = plan.previous["full_synced_at"] if plan.incremental else now
+
+    with STATE_LOCK:
+        state = load_state_file(BLOCK_STATE_FILE)
+        state[watermark_key(table_name)] = entry
+        write_state_file(BLOCK_STATE_FILE, state)
+
+
+def clear_block_state(table_name):
+    """Forget a table's block hashes so its next sync is a full reload"""
+    with STATE_LOCK:
+        state = load_state_file(BLOCK_STATE_FILE)
+        if state.pop(watermark_key(table_name), None) is not None:
+            write_state_file(BLOCK_STATE_FILE, state)
@@ -8,13 +8,13 @@ Usage: python check_icgroup_table.py
 import mysql.connector
 import os
 from dotenv import load_dotenv
+import mysql_pool
 
 load_dotenv()
 
 def check_table():
     db_host = os.getenv("DB_HOST", "localhost")
     db_user = os.getenv("DB_USER", "root")
-    db_password = os.getenv("DB_PASSWORD", "")
     db_name = os.getenv("DB_NAME", "your_database")
     table_name = "ubs_ubsstk2015_icgroup"
     
@@ -23,12 +23,7 @@ def check_table():
     print("-" * 60)
     
     try:
-        connection = mysql.connector.connect(
-            host=db_host,
-            user=db_user,
-            password=db_password,
-            database=db_name
-        )
+        connection = mysql_pool.connect()
         cursor = connection.cursor()
         
         # Check if database exists
@@ -9,60 +9,20 @@ import mysql.connector
 import os
 import sys
 from dotenv import load_dotenv
+import mysql_pool
+from sync_database import generate_mysql_create_table
+from table_manifest import get_tables
 from utils import read_dbf
 
 load_dotenv()
 
-def generate_mysql_create_table(table_name, structures):
-    """
-    Generate MySQL CREATE TABLE SQL based on DBF structure
-    """
-    columns = []
-    
-    for structure in structures:
-        name = structure['name']
-        type_code = structure['type']
-        size = structure.get('size')
-        decs = structure.get('decs')
-        
-        if type_code == 'D':  # Date
-            column_def = f"`{name}` VARCHAR(255)"
-        elif type_code == 'T':  # DateTime/Timestamp
-            column_def = f"`{name}` VARCHAR(255)"
-        elif type_code == 'C':  # Character/String
-            if size and size > 255:
-                column_def = f"`{name}` TEXT"
-            else:
-                column_def = f"`{name}` VARCHAR({size or 255})"
-        elif type_code == 'N':  # Numeric
-            if decs and decs > 0:
-                column_def = f"`{name}` DECIMAL({size or 10}, {decs})"
-            else:
-                column_def = f"`{name}` INT"
-        elif type_code == 'F':  # Float
-            column_def = f"`{name}` FLOAT"
-        elif type_code == 'L':  # Logical/Boolean
-            column_def = f"`{name}` BOOLEAN"
-        else:
-            column_def = f"`{name}` TEXT"  # fallback
-            
-        columns.append(column_def)
-    
-    return f"""
-    CREATE TABLE IF NOT EXISTS `{table_name}` (
-        {', '.join(columns)}
-    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-    """
-
 def main():
     print("🚀 Creating icgroup table from DBF structure...")
     
-    # Get DBF file path
-    directory_name = "UBSSTK2015"
-    dbf_subpath = os.getenv("DBF_SUBPATH", "Sample")
-    directory_path = f"C:/{directory_name}/{dbf_subpath}"
-    file_name = "icgroup.dbf"
-    full_path = os.path.join(directory_path, file_name)
+    # Get DBF file path (tables.json)
+    spec = get_tables()["icgroup"]
+    file_name = spec.file_name
+    full_path = spec.path
     
     # Check if file exists
     if not os.path.exists(full_path):
@@ -73,9 +33,8 @@ def main():
     # Get database connection info
     db_host = os.getenv("DB_HOST", "localhost")
     db_user = os.getenv("DB_USER", "root")
-    db_password = os.getenv("DB_PASSWORD", "")
     db_name = os.getenv("DB_NAME", "your_database")
-    table_name = "ubs_ubsstk2015_icgroup"
+    table_name = spec.table_name
     
     print(f"📊 Database: {db_name} @ {db_host} (user: {db_user})")
     print(f"📁 Reading DBF structure from: {full_path}")
@@ -105,12 +64,7 @@ def main():
         
         # Connect to MySQL
         print(f"\n🔌 Connecting to MySQL...")
-        connection = mysql.connector.connect(
-            host=db_host,
-            user=db_user,
-            password=db_password,
-            database=db_name
-        )
+        connection = mysql_pool.connect()
         
         if not connection.is_connected():
             print("❌ Failed to connect to MySQL")
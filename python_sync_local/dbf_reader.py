@@ -0,0 +1,606 @@
+"""
+Native memory-mapped DBF reader
+
+Parses the DBF header and field descriptors once, then decodes records by
+slicing fixed offsets out of a memory map. Values come out in the same shape
+read_dbf has always produced (stripped strings, int/float numerics, ISO dates),
+so callers do not need to know which reader was used.
+"""
+
+import datetime
+import mmap
+import os
+import struct
+import sys
+from decimal import Decimal
+
+import numpy as np
+
+import decode_kernels
+from record_batch import RecordBatch
+
+# VFP stores T fields as julian day number; this converts it to a proleptic ordinal
+VFP_JULIAN_OFFSET = 1721425
+
+# Language driver id (header byte 29) -> Python codec
+CODE_PAGES = {
+    0x01: 'cp437',
+    0x02: 'cp850',
+    0x03: 'cp1252',
+    0x57: 'cp1252',
+    0x58: 'cp1252',
+    0x59: 'cp1252',
+    0x64: 'cp852',
+    0x65: 'cp866',
+    0x4D: 'gbk',
+    0x7A: 'gbk',
+    0x78: 'big5',
+    0xC8: 'cp1250',
+    0xC9: 'cp1251',
+}
+DEFAULT_ENCODING = 'cp1252'
+
+# dBase versions whose memo pointers and memo files are FoxPro style
+FOXPRO_VERSIONS = frozenset([0x30, 0x31, 0x32, 0xF5, 0xFB])
+
+LOGICAL_VALUES = {
+    ord('T'): True, ord('t'): True, ord('Y'): True, ord('y'): True,
+    ord('F'): False, ord('f'): False, ord('N'): False, ord('n'): False,
+}
+
+DELETED_FLAG = 0x2A  # '*'
+
+# Character fields up to this width get a per-field decode cache of at most this many entries
+CHAR_CACHE_MAX_WIDTH = 40
+CHAR_CACHE_MAX_ENTRIES = 100000
+
+
+def parse_dbf_header(header_bytes):
+    """
+    Parse the 32-byte DBF header plus field descriptors.
+
+    Returns (version, num_records, header_length, record_length, language_driver, fields)
+    where fields is a list of {"name", "type", "size", "decs", "offset"} dicts.
+    """
+    if len(header_bytes) < 32:
+        raise ValueError("Invalid DBF file: header too short")
+
+    version = header_bytes[0]
+    num_records = struct.unpack('<I', header_bytes[4:8])[0]
+    header_length = struct.unpack('<H', header_bytes[8:10])[0]
+    record_length = struct.unpack('<H', header_bytes[10:12])[0]
+    language_driver = header_bytes[29]
+
+    if record_length < 1 or header_length < 33:
+        raise ValueError(f"Invalid DBF header (header_length={header_length}, record_length={record_length})")
+
+    fields = []
+    offset = 1  # Skip deletion flag
+    pos = 32
+    limit = min(header_length, len(header_bytes))
+    while pos + 32 <= limit and header_bytes[pos] != 0x0D:
+        field_def = header_bytes[pos:pos + 32]
+        field_name = field_def[:11].split(b'\x00', 1)[0].decode('ascii', errors='ignore').strip()
+        field_type = chr(field_def[11]) if field_def[11] > 0 else '?'
+        field_length = field_def[16]
+        field_decimal = field_def[17]
+        # Character fields wider than 255 keep the high byte in the decimal slot
+        if field_type == 'C' and field_decimal and field_length + field_decimal * 256 <= record_length:
+            field_length += field_decimal * 256
+            field_decimal = 0
+
+        fields.append({
+            "name": field_name,
+            "type": field_type,
+            "size": field_length,
+            "decs": field_decimal,
+            "offset": offset,
+        })
+        offset += field_length
+        pos += 32
+
+    if offset > record_length:
+        raise ValueError(f"Field definitions ({offset} bytes) exceed record length ({record_length})")
+
+    return version, num_records, header_length, record_length, language_driver, fields
+
+
+def read_record_count(dbf_file_path):
+    """Record count in a DBF header, without mapping the file (0 if it cannot be read)"""
+    try:
+        with open(dbf_file_path, 'rb') as handle:
+            header_bytes = handle.read(32)
+    except OSError:
+        return 0
+    if len(header_bytes) < 32:
+        return 0
+    return struct.unpack('<I', header_bytes[4:8])[0]
+
+
+class DBFReader:
+    """
+    Memory-mapped reader for a single .dbf file.
+
+    Usage:
+        with DBFReader(path) as reader:
+            for row in reader.iter_records():
+                ...
+            row = reader.record(42)  # random access, None if deleted
+    """
+
+    def __init__(self, dbf_file_path, encoding=None):
+        self.path = dbf_file_path
+        self._file = open(dbf_file_path, 'rb')
+        self._mm = None
+        self._memo = None
+        try:
+            file_size = os.fstat(self._file.fileno()).st_size
+            if file_size < 32:
+                raise ValueError("Invalid DBF file: header too short")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            first_block = self._mm[:32]
+            header_length = struct.unpack('<H', first_block[8:10])[0]
+            (self.version, header_count, self.header_length, self.record_length,
+             language_driver, all_fields) = parse_dbf_header(self._mm[:header_length])
+
+            # Trust the header count unless the file is shorter than it claims
+            available = max(0, (file_size - self.header_length) // self.record_length)
+            if header_count > available:
+                print(f"⚠️  Header says {header_count:,} records but file only holds {available:,}, reading {available:,}", flush=True)
+                header_count = available
+            self.record_count = header_count
+
+            self.encoding = encoding or os.getenv("DBF_ENCODING") or CODE_PAGES.get(language_driver, DEFAULT_ENCODING)
+
+            # VFP system field (_NullFlags) is not user data
+            self._fields = [f for f in all_fields if f['type'] != '0']
+            self.fields = [
+                {"name": f['name'], "type": f['type'], "size": f['size'], "decs": f['decs']}
+                for f in self._fields
+            ]
+            self.field_names = [f['name'] for f in self._fields]
+
+            if any(f['type'] in ('M', 'G', 'P', 'W') for f in self._fields):
+                self._memo = _open_memo_file(dbf_file_path, self.version in FOXPRO_VERSIONS)
+
+            self._field_decoders = [self._build_decoder(f) for f in self._fields]
+            self._column_decoders = [
+                _build_column_decoder(f, decode) for f, decode in zip(self._fields, self._field_decoders)
+            ]
+            # One struct call splits a record into per-field byte strings
+            self._record_struct = struct.Struct(_record_format(all_fields, self._fields, self.record_length))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.record_count
+
+    def close(self):
+        if self._memo is not None:
+            self._memo.close()
+            self._memo = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record_offset(self, index):
+        """Byte offset of record `index` (0-based) in the file"""
+        return self.header_length + index * self.record_length
+
+    def is_deleted(self, index):
+        return self._mm[self.record_offset(index)] == DELETED_FLAG
+
+    def raw_record(self, index):
+        """Return the raw bytes of record `index` including the deletion flag"""
+        if index < 0 or index >= self.record_count:
+            raise IndexError(f"Record {index} out of range (0..{self.record_count - 1})")
+        base = self.record_offset(index)
+        return self._mm[base:base + self.record_length]
+
+    def record(self, index):
+        """Decode record `index` (0-based). Returns None for deleted records."""
+        if index < 0 or index >= self.record_count:
+            raise IndexError(f"Record {index} out of range (0..{self.record_count - 1})")
+        base = self.record_offset(index)
+        if self._mm[base] == DELETED_FLAG:
+            return None
+        values = self._record_struct.unpack_from(self._mm, base)
+        return dict(zip(self.field_names, [decode(raw) for decode, raw in zip(self._field_decoders, values)]))
+
+    def iter_records(self, start=0, stop=None):
+        """
+        Yield decoded records in file order, skipping deleted ones.
+        start/stop are record numbers (stop exclusive).
+        """
+        if stop is None or stop > self.record_count:
+            stop = self.record_count
+        mm = self._mm
+        names = self.field_names
+        decoders = self._field_decoders
+        unpack_from = self._record_struct.unpack_from
+        record_length = self.record_length
+        base = self.record_offset(start)
+        for _ in range(start, stop):
+            if mm[base] != DELETED_FLAG:
+                yield dict(zip(names, [decode(raw) for decode, raw in zip(decoders, unpack_from(mm, base))]))
+            base += record_length
+
+    def __iter__(self):
+        return self.iter_records()
+
+    def raw_records(self, start, stop):
+        """Raw bytes of records [start, stop), deletion flags included"""
+        start = max(0, start)
+        stop = min(stop, self.record_count)
+        return self._mm[self.record_offset(start):self.record_offset(max(start, stop))]
+
+    def raw_field_descriptors(self):
+        """Header bytes after the 32-byte file header: field descriptors (and VFP backlink)"""
+        return self._mm[32:self.header_length]
+
+    def read_matrix(self, start, stop):
+        """
+        Records [start, stop) as an (n, record_length) uint8 matrix.
+        The bytes are copied out of the map so the matrix outlives close().
+        """
+        base = self.record_offset(start)
+        count = max(0, stop - start)
+        buffer = self._mm[base:base + count * self.record_length]
+        return np.frombuffer(buffer, dtype=np.uint8).reshape(count, self.record_length)
+
+    def read_batch(self, start=0, stop=None, row_filter=None):
+        """
+        Decode records [start, stop) column-wise into a RecordBatch, skipping deleted records.
+
+        row_filter: optional object with `field_names` and `skip_mask(batch)` (e.g.
+        DateCutoffFilter). Only its fields are decoded first; the rows it skips are
+        dropped from the raw matrix before the remaining columns are decoded.
+        """
+        if stop is None or stop > self.record_count:
+            stop = self.record_count
+        matrix = self.read_matrix(start, stop)
+        matrix = matrix[matrix[:, 0] != DELETED_FLAG]
+        if row_filter is None or not len(matrix):
+            return self.decode_matrix(matrix)
+
+        probe = self.decode_matrix(matrix, row_filter.field_names)
+        skip = row_filter.skip_mask(probe)
+        if skip.any():
+            keep = ~skip
+            matrix = matrix[keep]
+            probe = probe.filter(keep)
+        return self.decode_matrix(matrix, decoded=probe)
+
+    def decode_matrix(self, matrix, field_names=None, decoded=None):
+        """
+        Decode a record matrix (deleted rows already removed) into a RecordBatch.
+
+        field_names: only decode these fields (the batch structure is narrowed to match)
+        decoded:     batch for the same rows whose columns are reused instead of decoded again
+        """
+        wanted = None if field_names is None else set(field_names)
+        structure = []
+        columns = {}
+        nulls = {}
+        for field, public, decode_column in zip(self._fields, self.fields, self._column_decoders):
+            name = field['name']
+            if wanted is not None and name not in wanted:
+                continue
+            structure.append(public)
+            if decoded is not None and name in decoded.columns:
+                columns[name] = decoded.columns[name]
+                nulls[name] = decoded.nulls[name]
+                continue
+            offset = field['offset']
+            values, mask = decode_column(matrix[:, offset:offset + field['size']])
+            columns[name] = values
+            nulls[name] = mask
+        return RecordBatch(structure if wanted is not None else self.fields, columns, nulls, len(matrix))
+
+    def iter_batches(self, batch_size, start=0, stop=None, row_filter=None):
+        """Yield RecordBatches covering records [start, stop) in chunks of `batch_size` records"""
+        if stop is None or stop > self.record_count:
+            stop = self.record_count
+        for chunk_start in range(start, stop, batch_size):
+            yield self.read_batch(chunk_start, min(chunk_start + batch_size, stop), row_filter)
+
+    def _build_decoder(self, field):
+        """Return a function bytes -> value for one field, chosen once per table"""
+        field_type = field['type']
+        encoding = self.encoding
+
+        if field_type == 'C':
+            return _char_decoder(encoding, cache=field['size'] <= CHAR_CACHE_MAX_WIDTH)
+
+        if field_type in ('N', 'F'):
+            as_int = field_type == 'N' and field['decs'] == 0
+            return _numeric_decoder(as_int)
+
+        if field_type == 'D':
+            return _date_decoder()
+
+        if field_type == 'L':
+            return lambda raw: LOGICAL_VALUES.get(raw[0]) if raw else None
+
+        if field_type == 'T' and field['size'] == 8:
+            return _decode_timestamp
+
+        if field_type == 'I' and field['size'] == 4:
+            return lambda raw: struct.unpack('<i', raw)[0]
+
+        if field_type == 'B' and field['size'] == 8:
+            return lambda raw: struct.unpack('<d', raw)[0]
+
+        if field_type == 'Y' and field['size'] == 8:
+            return lambda raw: str(Decimal(struct.unpack('<q', raw)[0]).scaleb(-4))
+
+        if field_type in ('M', 'G', 'P', 'W'):
+            memo = self._memo
+            if memo is None:
+                return lambda raw: None
+            binary_pointer = field['size'] == 4
+            binary_content = field_type != 'M'
+
+            def decode_memo(raw):
+                if binary_pointer:
+                    block = struct.unpack('<I', raw)[0]
+                else:
+                    text = raw.replace(b'\x00', b'').strip()
+                    block = int(text) if text.isdigit() else 0
+                if block == 0:
+                    return None
+                data = memo.read(block)
+                if not data:
+                    return None
+                if binary_content:
+                    return data
+                value = data.decode(encoding, errors='ignore').replace('\x00', '').strip()
+                return value or None
+            return decode_memo
+
+        def decode_other(raw):
+            value = raw.replace(b'\x00', b'').decode(encoding, errors='ignore').strip()
+            return value or None
+        return decode_other
+
+
+def _record_format(all_fields, fields, record_length):
+    """struct format yielding one bytes object per field in `fields`, skipping everything else"""
+    parts = ['<x']  # deletion flag
+    position = 1
+    wanted = {id(f) for f in fields}
+    for field in all_fields:
+        if field['offset'] > position:
+            parts.append(f"{field['offset'] - position}x")
+        parts.append(f"{field['size']}s" if id(field) in wanted else f"{field['size']}x")
+        position = field['offset'] + field['size']
+    if record_length > position:
+        parts.append(f"{record_length - position}x")
+    return ''.join(parts)
+
+
+def _char_decoder(encoding, cache):
+    """
+    Character fields: drop null bytes, strip, empty -> None.
+    Narrow fields (codes, units, names) repeat heavily, so their decoded values are cached.
+    """
+    def decode_char(raw):
+        if b'\x00' in raw:
+            raw = raw.replace(b'\x00', b'')
+        raw = raw.strip()
+        if not raw:
+            return None
+        if raw.isascii():
+            return raw.decode('ascii')
+        return raw.decode(encoding, errors='ignore').strip() or None
+
+    if not cache:
+        return decode_char
+
+    values = {}
+
+    def decode_char_cached(raw):
+        value = values.get(raw, values)
+        if value is values:
+            value = decode_char(raw)
+            if value is not None:
+                value = sys.intern(value)
+            if len(values) < CHAR_CACHE_MAX_ENTRIES:
+                values[raw] = value
+        return value
+    return decode_char_cached
+
+
+def _build_column_decoder(field, decode):
+    """
+    Return a function (n, size) uint8 block -> (values array, null mask) for one field.
+    N/F/D/L/T and binary I/B columns are decoded whole-column by the vectorized kernels;
+    everything else applies the scalar decoder `decode` per cell and packs the results.
+    """
+    field_type = field['type']
+    size = field['size']
+
+    if field_type in ('N', 'F'):
+        as_int = field_type == 'N' and field['decs'] == 0
+        return lambda block: decode_kernels.decode_numeric(block, as_int, decode)
+    if field_type == 'D' and size == 8:
+        return decode_kernels.decode_date
+    if field_type == 'L' and size >= 1:
+        return decode_kernels.decode_logical
+    if field_type == 'T' and size == 8:
+        return decode_kernels.decode_timestamp
+    if field_type == 'I' and size == 4:
+        return lambda block: _binary_column(block, '<i4', np.int64)
+    if field_type == 'B' and size == 8:
+        return lambda block: _binary_column(block, '<f8', np.float64)
+
+    # Text-encoded types can go through the 'S' view; binary ones need the exact bytes
+    exact = field_type in ('T', 'Y', 'G', 'P', 'W') or (field_type == 'M' and size == 4)
+    cells = _exact_cells if exact else _text_cells
+
+    # Odd-sized D fields still come out as dates (always NULL unless NUL-padded to 8)
+    dtype = 'datetime64[D]' if field_type == 'D' else object
+
+    def decode_column(block):
+        decoded = [decode(raw) for raw in cells(block)]
+        return _pack_column(decoded, dtype)
+    return decode_column
+
+
+def _text_cells(block):
+    """Cells of a text field as bytes (trailing NULs dropped by the 'S' view)"""
+    count, size = block.shape
+    if size == 0:
+        return [b''] * count
+    return np.ascontiguousarray(block).view(f'S{size}').ravel().tolist()
+
+
+def _exact_cells(block):
+    count, size = block.shape
+    data = np.ascontiguousarray(block).tobytes()
+    return [data[i:i + size] for i in range(0, count * size, size)]
+
+
+def _binary_column(block, source_dtype, dtype):
+    values = np.ascontiguousarray(block).view(source_dtype).ravel().astype(dtype)
+    return values, np.zeros(len(values), dtype=bool)
+
+
+def _pack_column(decoded, dtype):
+    """Scalar-decoded values -> (typed array, null mask)"""
+    mask = np.fromiter((value is None for value in decoded), dtype=bool, count=len(decoded))
+    if dtype is object:
+        values = np.empty(len(decoded), dtype=object)
+        values[:] = decoded
+        return values, mask
+    if dtype in ('datetime64[D]', 'datetime64[ms]'):
+        # None -> NaT
+        return np.array(decoded, dtype=dtype), mask
+    fill = False if dtype is np.bool_ else 0
+    filled = [fill if value is None else value for value in decoded]
+    try:
+        return np.array(filled, dtype=dtype), mask
+    except OverflowError:
+        # Numbers wider than int64 (20-digit N fields) stay as Python ints
+        values = np.empty(len(decoded), dtype=object)
+        values[:] = decoded
+        return values, mask
+
+
+def _numeric_decoder(as_int):
+    def decode_numeric(raw):
+        if b'\x00' in raw:
+            raw = raw.replace(b'\x00', b'')
+        raw = raw.strip()
+        # '*' means the value overflowed the field in VFP
+        if not raw or raw[0] == 0x2A:
+            return None
+        try:
+            return int(raw) if as_int else float(raw)
+        except ValueError:
+            # Malformed cell, the dbf library path returned None for these too
+            return None
+    return decode_numeric
+
+
+def _date_decoder():
+    # UBS tables repeat the same few thousand dates, so decode each distinct value once
+    cache = {}
+
+    def decode_date(raw):
+        value = cache.get(raw, cache)
+        if value is not cache:
+            return value
+        value = None
+        if len(raw) == 8 and raw.isdigit() and raw != b'00000000':
+            try:
+                value = datetime.date(int(raw[:4]), int(raw[4:6]), int(raw[6:8])).isoformat()
+            except ValueError:
+                value = None
+        cache[raw] = value
+        return value
+    return decode_date
+
+
+def _decode_timestamp(raw):
+    julian_day, milliseconds = struct.unpack('<ii', raw)
+    if julian_day == 0 and milliseconds == 0:
+        return None
+    ordinal = julian_day - VFP_JULIAN_OFFSET
+    if ordinal < 1:
+        return None
+    try:
+        seconds, millis = divmod(milliseconds, 1000)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        day = datetime.date.fromordinal(ordinal)
+        return datetime.datetime(day.year, day.month, day.day, hours, minutes, seconds, millis * 1000).isoformat()
+    except (ValueError, OverflowError):
+        return None
+
+
+class _MemoFile:
+    """Random-access reader for .fpt (FoxPro) and .dbt (dBase) memo files"""
+
+    def __init__(self, path, foxpro):
+        self._file = open(path, 'rb')
+        self._mm = None
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty memo file
+            self._mm = b''
+        self.foxpro = foxpro
+        if foxpro:
+            self.block_size = struct.unpack('>H', self._mm[6:8])[0] if len(self._mm) >= 8 else 64
+        else:
+            block_size = struct.unpack('<H', self._mm[20:22])[0] if len(self._mm) >= 22 else 0
+            self.block_size = block_size or 512
+        self.block_size = self.block_size or 512
+
+    def read(self, block):
+        mm = self._mm
+        pos = block * self.block_size
+        if pos >= len(mm):
+            return None
+        if self.foxpro:
+            length = struct.unpack('>I', mm[pos + 4:pos + 8])[0]
+            return mm[pos + 8:pos + 8 + length]
+        # dBase IV block header carries an explicit length
+        if mm[pos:pos + 4] == b'\xff\xff\x08\x00':
+            length = struct.unpack('<I', mm[pos + 4:pos + 8])[0]
+            return mm[pos + 8:pos + length]
+        end = mm.find(b'\x1a', pos)
+        if end == -1:
+            end = len(mm)
+        return mm[pos:end]
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._mm = b''
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _open_memo_file(dbf_file_path, foxpro):
+    base, _ = os.path.splitext(dbf_file_path)
+    extensions = ['.fpt', '.FPT', '.dbt', '.DBT'] if foxpro else ['.dbt', '.DBT', '.fpt', '.FPT']
+    for ext in extensions:
+        candidate = base + ext
+        if os.path.exists(candidate):
+            return _MemoFile(candidate, ext.lower() == '.fpt')
+    print(f"⚠️  Memo file for {os.path.basename(dbf_file_path)} not found, memo fields will be empty", flush=True)
+    return None
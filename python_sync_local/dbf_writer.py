@@ -0,0 +1,100 @@
+"""
+Writes Visual FoxPro style DBF files from Python rows, for the benchmarks and the tests.
+M fields (size 4) go to a .fpt memo file next to the DBF.
+"""
+
+import datetime
+import os
+import struct
+
+VFP_JULIAN_OFFSET = 1721425
+# Bytes per .fpt block; the 512-byte header takes the first blocks
+MEMO_BLOCK_SIZE = 64
+
+
+class _MemoWriter:
+    """Collects memo texts as .fpt blocks"""
+
+    def __init__(self):
+        self.data = bytearray(512)
+        self.next_block = 512 // MEMO_BLOCK_SIZE
+
+    def add(self, text):
+        """Block number of a new memo holding `text`"""
+        encoded = text.encode('cp1252')
+        entry = struct.pack('>II', 1, len(encoded)) + encoded
+        entry += b'\x00' * (-len(entry) % MEMO_BLOCK_SIZE)
+        block = self.next_block
+        self.data += entry
+        self.next_block += len(entry) // MEMO_BLOCK_SIZE
+        return block
+
+    def write(self, path):
+        self.data[0:4] = struct.pack('>I', self.next_block)
+        self.data[6:8] = struct.pack('>H', MEMO_BLOCK_SIZE)
+        with open(path, 'wb') as f:
+            f.write(self.data)
+
+
+def encode_field(field, value, memo=None):
+    """Encode one Python value into DBF field bytes (`memo`: the _MemoWriter of M fields)"""
+    size = field['size']
+    field_type = field['type']
+    if field_type == 'C':
+        return (value or '').encode('cp1252')[:size].ljust(size, b' ')
+    if field_type in ('N', 'F'):
+        if value is None:
+            return b' ' * size
+        return (f"{value:>{size}.{field['decs']}f}").encode('ascii')[:size]
+    if field_type == 'D':
+        return value.strftime('%Y%m%d').encode('ascii') if value else b' ' * 8
+    if field_type == 'L':
+        return b'?' if value is None else (b'T' if value else b'F')
+    if field_type == 'T':
+        if value is None:
+            return b'\x00' * 8
+        millis = ((value.hour * 60 + value.minute) * 60 + value.second) * 1000 + value.microsecond // 1000
+        return struct.pack('<ii', value.toordinal() + VFP_JULIAN_OFFSET, millis)
+    if field_type == 'M':
+        return struct.pack('<I', memo.add(value) if value else 0)
+    raise ValueError(f"Cannot encode field type {field_type}")
+
+
+def write_sample_dbf(path, structure, rows, deleted=None):
+    """
+    Write a Visual FoxPro style DBF (version 0x30) from `rows` (iterable of dicts).
+    `deleted` is an optional set of row indexes to flag as deleted.
+    Returns the number of records written.
+    """
+    deleted = deleted or set()
+    memo = _MemoWriter() if any(field['type'] == 'M' for field in structure) else None
+    record_length = 1 + sum(f['size'] for f in structure)
+    header_length = 32 + 32 * len(structure) + 1 + 263  # VFP backlink area
+    today = datetime.date.today()
+
+    with open(path, 'wb') as f:
+        f.write(b'\x00' * header_length)
+        count = 0
+        for index, row in enumerate(rows):
+            f.write(b'*' if index in deleted else b' ')
+            for field in structure:
+                f.write(encode_field(field, row.get(field['name']), memo))
+            count += 1
+        f.write(b'\x1a')
+
+        header = struct.pack('<BBBBIHH', 0x30, today.year - 1900, today.month, today.day,
+                             count, header_length, record_length)
+        # Table flags (0x02: has a memo file), code page 0x03 (cp1252)
+        header += b'\x00' * 16 + (b'\x02' if memo else b'\x00') + b'\x03' + b'\x00' * 2
+        descriptors = b''
+        offset = 1
+        for field in structure:
+            name = field['name'].encode('ascii')[:10].ljust(11, b'\x00')
+            descriptors += name + field['type'].encode('ascii') + struct.pack('<I', offset)
+            descriptors += bytes([field['size'], field['decs']]) + b'\x00' * 14
+            offset += field['size']
+        f.seek(0)
+        f.write(header + descriptors + b'\x0d')
+    if memo is not None:
+        memo.write(os.path.splitext(path)[0] + '.fpt')
+    return count
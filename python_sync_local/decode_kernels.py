@@ -0,0 +1,171 @@
+"""
+Vectorized decode kernels for DBF columns.
+
+Each kernel takes the (n, field_size) uint8 block of one field sliced out of the
+record matrix (see DBFReader.decode_matrix) and returns (values, null_mask) for
+the whole column at once. Results are identical to the scalar decoders in
+dbf_reader.py; rows a kernel cannot decode exactly (scientific notation, stray
+characters, more than 15 significant digits, ...) are handed to the scalar
+decoder individually.
+"""
+
+import numpy as np
+
+# VFP julian day number of 1970-01-01 (julian day - this = days since the epoch)
+VFP_EPOCH_JULIAN_DAY = 2440588
+# Largest proleptic ordinal datetime.date accepts (9999-12-31)
+MAX_ORDINAL = 3652059
+MILLIS_PER_DAY = 86400000
+# Integers up to 2**53 convert to float64 exactly, which keeps mantissa / 10**k correctly rounded
+MAX_EXACT_MANTISSA = 2 ** 53
+
+_SPACE = 0x20
+_NUL = 0x00
+_PLUS = 0x2B
+_MINUS = 0x2D
+_DOT = 0x2E
+_ZERO = 0x30
+
+# Byte -> 1 (True), 0 (False), 2 (NULL) for L fields, same table as LOGICAL_VALUES
+_LOGICAL_TABLE = np.full(256, 2, dtype=np.uint8)
+for _char in b'TtYy':
+    _LOGICAL_TABLE[_char] = 1
+for _char in b'FfNn':
+    _LOGICAL_TABLE[_char] = 0
+
+_POWERS_OF_TEN = 10.0 ** np.arange(23)
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int32)
+
+
+def decode_numeric(block, as_int, scalar_decode):
+    """
+    ASCII N/F column -> int64 (as_int) or float64 values plus null mask.
+
+    Digits are accumulated as a fixed-point int64 mantissa with a per-row scale,
+    then divided by 10**scale, which gives the same float64 float() would.
+    The block is walked one byte column at a time, so every step is a 1-D vector op.
+    """
+    count, size = block.shape
+    # Copy the field out of the record matrix first; transposing the strided view directly is much slower
+    columns = np.ascontiguousarray(np.ascontiguousarray(block).T)
+
+    mantissa = np.zeros(count, dtype=np.int64)
+    scale = np.zeros(count, dtype=np.int64)
+    digit_count = np.zeros(count, dtype=np.int64)
+    started = np.zeros(count, dtype=bool)
+    ended = np.zeros(count, dtype=bool)
+    seen_dot = np.zeros(count, dtype=bool)
+    negative = np.zeros(count, dtype=bool)
+    invalid = np.zeros(count, dtype=bool)
+
+    for column in columns:
+        digit_value = column - np.uint8(_ZERO)
+        is_digit = digit_value < 10
+        is_space = (column == _SPACE) | (column == _NUL)
+        is_dot = column == _DOT
+        is_minus = column == _MINUS
+        is_sign = is_minus | (column == _PLUS)
+
+        # [blanks] [sign] digits [. digits] [blanks] - anything else goes to the scalar decoder
+        invalid |= ~(is_digit | is_space | is_dot | is_sign)
+        invalid |= ~is_space & ended
+        invalid |= is_sign & started
+        invalid |= is_dot & seen_dot
+        ended |= is_space & started
+        started |= ~is_space
+        negative |= is_minus
+
+        mantissa = np.where(is_digit, mantissa * 10 + digit_value, mantissa)
+        digit_count += is_digit
+        scale += is_digit & seen_dot
+        seen_dot |= is_dot
+
+    blank = ~started
+    # Up to 18 digits always fits int64
+    simple = started & ~invalid & (digit_count > 0) & (digit_count <= 18)
+    if as_int:
+        simple &= ~seen_dot
+        values = np.where(negative, -mantissa, mantissa)
+    else:
+        simple &= (mantissa < MAX_EXACT_MANTISSA) & (scale < len(_POWERS_OF_TEN))
+        values = mantissa.astype(np.float64) / _POWERS_OF_TEN[np.where(simple, scale, 0)]
+        values = np.where(negative, -values, values)
+
+    values = np.where(simple, values, 0)
+    leftover = np.flatnonzero(~simple & ~blank)
+    if len(leftover):
+        values, blank = _patch_rows(block, leftover, values, blank, scalar_decode)
+    return values, blank
+
+
+def decode_date(block):
+    """ASCII YYYYMMDD column (size 8) -> datetime64[D] values plus null mask"""
+    # uint8 wrap-around turns every non-digit byte into a value >= 10
+    digits = np.ascontiguousarray(block).T - np.uint8(_ZERO)
+    valid = (digits < 10).all(axis=0)
+    digits = digits.astype(np.int32)
+    year = digits[0] * 1000 + digits[1] * 100 + digits[2] * 10 + digits[3]
+    month = digits[4] * 10 + digits[5]
+    day = digits[6] * 10 + digits[7]
+
+    month_ok = (month >= 1) & (month <= 12)
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    month_days = _DAYS_IN_MONTH[np.where(month_ok, month, 0)] + ((month == 2) & leap)
+    valid &= (year >= 1) & month_ok & (day >= 1) & (day <= month_days)
+
+    days = np.where(valid, _days_from_civil(year, month, day), 0)
+    values = days.astype('datetime64[D]')
+    values[~valid] = np.datetime64('NaT')
+    return values, ~valid
+
+
+def decode_logical(block):
+    """T/t/Y/y -> True, F/f/N/n -> False, anything else NULL"""
+    codes = _LOGICAL_TABLE[block[:, 0]] if block.shape[1] else np.full(len(block), 2, dtype=np.uint8)
+    return codes == 1, codes == 2
+
+
+def decode_timestamp(block):
+    """VFP T column (int32 julian day + int32 milliseconds) -> datetime64[ms] values plus null mask"""
+    pairs = np.ascontiguousarray(block).view('<i4').reshape(len(block), 2).astype(np.int64)
+    julian_day = pairs[:, 0]
+    millis = pairs[:, 1]
+    ordinal = julian_day - VFP_EPOCH_JULIAN_DAY + 719163
+    valid = ~((julian_day == 0) & (millis == 0))
+    valid &= (ordinal >= 1) & (ordinal <= MAX_ORDINAL)
+    valid &= (millis >= 0) & (millis < MILLIS_PER_DAY)
+    stamps = (julian_day - VFP_EPOCH_JULIAN_DAY) * MILLIS_PER_DAY + millis
+    values = np.where(valid, stamps, 0).astype('datetime64[ms]')
+    values[~valid] = np.datetime64('NaT')
+    return values, ~valid
+
+
+def _days_from_civil(year, month, day):
+    """Proleptic Gregorian (year, month, day) arrays -> days since 1970-01-01"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * np.where(month > 2, month - 3, month + 9) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _patch_rows(block, rows, values, mask, scalar_decode):
+    """Decode `rows` with the scalar decoder and write them into the kernel output"""
+    size = block.shape[1]
+    data = np.ascontiguousarray(block[rows]).tobytes()
+    decoded = [scalar_decode(data[i:i + size]) for i in range(0, len(rows) * size, size)]
+    mask = mask.copy()
+    for row, value in zip(rows, decoded):
+        if value is None:
+            mask[row] = True
+            continue
+        try:
+            values[row] = value
+        except OverflowError:
+            # Wider than int64: fall back to an object column for this batch
+            values = values.astype(object)
+            values[row] = value
+    if values.dtype == object:
+        values[mask] = None
+    return values, mask
@@ -0,0 +1,244 @@
+"""
+Key-based delta loading: bring an existing table in line with the DBF by applying
+only the INSERTs, UPDATEs and DELETEs needed, instead of TRUNCATE + full reload.
+
+Rows are identified by the table's keys (tables.json, the same fields as
+Converter::primaryKey in PHP) and compared by a 64-bit fingerprint computed
+column-wise with NumPy, the same way for the DBF rows and for the rows read
+back from the database. Each column is first brought into the form its
+column type stores, so a value the database rounded or reformatted still
+matches:
+
+    N / Y / I         integer of value * 10**decs      DECIMAL(size, decs) / INT
+    F / B             float32 bits                     FLOAT (single precision)
+    L                 1 / 0                            BOOLEAN
+    D                 datetime64[D]                    DATE (or ISO text in VARCHAR columns)
+    T                 milliseconds, rounded to the     DATETIME(3) / TIMESTAMP / ISO text;
+                      fractional digits the column     a DATETIME column created before
+                      keeps                            DATETIME(3) keeps whole seconds
+    anything else     Python's string hash (fingerprints never leave the process)
+
+Everything runs in one transaction, so readers keep seeing the previous table
+until the commit instead of an empty one.
+"""
+
+import decimal
+import os
+import time
+
+import numpy as np
+
+from sync_database import (KEY_DELETE_CHUNK, column_width_transforms, connect_database, ensure_key_index,
+                           existing_mysql_columns, get_table_name, key_delete_sql)
+
+# Rows per executemany call for inserts and updates
+DELTA_CHUNK = 1000
+# Rows fetched per round trip when reading the table's current fingerprints
+FETCH_SIZE = 10000
+
+NUMERIC_TYPES = frozenset(['N', 'Y', 'I'])
+FLOAT_TYPES = frozenset(['F', 'B'])
+LOGICAL_TRUE = frozenset([True, '1', 'T', 't', 'Y', 'y', 'TRUE', 'true'])
+
+# Odd multiplier and NULL marker for combining column hashes (x -> x * P ^ h is a bijection)
+_MIX = np.uint64(0x100000001B3)
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+class DeltaKeyError(ValueError):
+    """A DBF row has an empty key or one used by another row, so rows cannot be matched by key"""
+
+
+class DeltaCounts:
+    """Rows inserted / updated / deleted / unchanged by one delta load"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+
+    @property
+    def dbf_rows(self):
+        return self.inserted + self.updated + self.unchanged
+
+    def describe(self):
+        return (f"{self.inserted:,} inserted, {self.updated:,} updated, {self.deleted:,} deleted, "
+                f"{self.unchanged:,} unchanged")
+
+
+def delta_sync_stream(filename, structures, batches, directory, key_fields):
+    """
+    Apply the difference between `batches` (RecordBatches of the whole DBF, e.g. utils.read_dbf_iter)
+    and the existing table. Raises DeltaKeyError (nothing is changed) if a DBF key is empty or
+    occurs twice. Returns a DeltaCounts.
+    """
+    table_name = get_table_name(filename, directory)
+    db_type = os.getenv("DB_TYPE", "mysql")
+    connection, quote, placeholder = connect_database(db_type)
+    cursor = connection.cursor()
+    counts = DeltaCounts()
+    start_time = time.time()
+    try:
+        transforms = None
+        if db_type == "mysql":
+            structures = existing_mysql_columns(cursor, table_name, structures)
+            structures = _with_stored_fractions(cursor, table_name, structures)
+            transforms = column_width_transforms(structures)
+        ensure_key_index(cursor, db_type, table_name, key_fields)
+
+        names = [struct['name'] for struct in structures]
+        key_positions = [names.index(name) for name in key_fields]
+        current = _table_fingerprints(cursor, quote, table_name, names, key_positions, structures)
+        print(f"🔑 Compared against {len(current):,} rows in {table_name} "
+              f"({time.time() - start_time:.2f}s)", flush=True)
+
+        insert_sql = (f"INSERT INTO {quote(table_name)} ({', '.join(quote(name) for name in names)}) "
+                      f"VALUES ({', '.join([placeholder] * len(names))})")
+        value_names = [name for name in names if name not in key_fields]
+        update_sql = (f"UPDATE {quote(table_name)} SET {', '.join(f'{quote(name)} = {placeholder}' for name in value_names)} "
+                      f"WHERE {' AND '.join(f'{quote(name)} = {placeholder}' for name in key_fields)}")
+        value_positions = [names.index(name) for name in value_names]
+
+        seen = set()
+        for batch in batches:
+            inserts = []
+            updates = []
+            replaced = []
+            rows = batch.row_tuples(names, transforms)
+            for row, fingerprint in zip(rows, row_fingerprints(rows, structures).tolist()):
+                key = tuple(row[position] for position in key_positions)
+                if key in seen or None in key:
+                    problem = "is empty" if None in key else "occurs more than once"
+                    raise DeltaKeyError(f"Key {', '.join(key_fields)} = {key} {problem} in {filename}")
+                seen.add(key)
+                stored = current.pop(key, False)
+                if stored is False:
+                    inserts.append(row)
+                elif stored is None:
+                    # The table holds this key more than once: replace all of them
+                    replaced.append(key)
+                    inserts.append(row)
+                elif stored != fingerprint:
+                    updates.append(tuple(row[position] for position in value_positions) + key)
+                else:
+                    counts.unchanged += 1
+
+            if replaced:
+                _delete_keys(cursor, db_type, quote, placeholder, table_name, key_fields, replaced)
+                counts.updated += len(replaced)
+            for i in range(0, len(inserts), DELTA_CHUNK):
+                cursor.executemany(insert_sql, inserts[i:i + DELTA_CHUNK])
+            counts.inserted += len(inserts) - len(replaced)
+            for i in range(0, len(updates), DELTA_CHUNK):
+                cursor.executemany(update_sql, updates[i:i + DELTA_CHUNK])
+            counts.updated += len(updates)
+
+        # Keys left in the table but no longer in the DBF
+        stale = list(current)
+        counts.deleted = _delete_keys(cursor, db_type, quote, placeholder, table_name, key_fields, stale)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+    print(f"🔀 Delta: {counts.describe()} ({time.time() - start_time:.2f}s)", flush=True)
+    return counts
+
+
+def _table_fingerprints(cursor, quote, table_name, names, key_positions, structures):
+    """{key tuple: fingerprint} of the table's rows; None for keys stored more than once"""
+    cursor.execute(f"SELECT {', '.join(quote(name) for name in names)} FROM {quote(table_name)}")
+    fingerprints = {}
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for row, fingerprint in zip(rows, row_fingerprints(rows, structures).tolist()):
+            key = tuple(_key_value(row[position]) for position in key_positions)
+            fingerprints[key] = None if key in fingerprints else fingerprint
+    return fingerprints
+
+
+def row_fingerprints(rows, structures):
+    """uint64 fingerprint per row tuple (values in `structures` order)"""
+    fingerprints = np.zeros(len(rows), dtype=np.uint64)
+    if not rows:
+        return fingerprints
+    for values, struct in zip(zip(*rows), structures):
+        hashes, nulls = _column_hashes(values, struct)
+        hashes[nulls] = _NULL_HASH
+        fingerprints *= _MIX
+        fingerprints ^= hashes
+    return fingerprints
+
+
+def _column_hashes(values, struct):
+    """(uint64 value hashes, null mask) for one column's Python values"""
+    values = np.array(values, dtype=object)
+    nulls = np.equal(values, None)
+    field_type = struct.get('type')
+    try:
+        if field_type in NUMERIC_TYPES or field_type in FLOAT_TYPES:
+            numbers = np.where(nulls, 0, values).astype(np.float64)
+            if field_type in FLOAT_TYPES:
+                return numbers.astype(np.float32).view(np.uint32).astype(np.uint64), nulls
+            scaled = np.rint(numbers * 10.0 ** (struct.get('decs') or 0))
+            return scaled.astype(np.int64).view(np.uint64), nulls
+        if field_type == 'L':
+            return np.fromiter((value in LOGICAL_TRUE for value in values.tolist()), dtype=np.uint64,
+                               count=len(values)), nulls
+        if field_type in ('D', 'T'):
+            unit = 'datetime64[D]' if field_type == 'D' else 'datetime64[ms]'
+            stamps = np.where(nulls, 'NaT', values).astype(unit)
+            nulls = nulls | np.isnat(stamps)
+            stamps = stamps.view(np.int64)
+            step = 10 ** (3 - min(struct.get('fraction_digits', 3), 3))
+            if field_type == 'T' and step > 1:
+                # The column rounds to fewer digits than the DBF's milliseconds (half up, like MySQL)
+                stamps = (stamps + step // 2) // step * step
+            return stamps.view(np.uint64), nulls
+    except (TypeError, ValueError, OverflowError):
+        pass  # unexpected text in a typed column: compare the values as they are
+    return np.fromiter(map(hash, values.tolist()), dtype=np.int64, count=len(values)).view(np.uint64), nulls
+
+
+def _with_stored_fractions(cursor, table_name, structures):
+    """`structures` with the fractional-second digits of each T column's MySQL type as 'fraction_digits'"""
+    cursor.execute("SELECT COLUMN_NAME, DATETIME_PRECISION FROM information_schema.columns "
+                   "WHERE table_schema = DATABASE() AND table_name = %s", (table_name,))
+    digits = {name.upper(): precision for name, precision in cursor.fetchall() if precision is not None}
+    return [dict(struct, fraction_digits=int(digits[struct['name'].upper()]))
+            if struct.get('type') == 'T' and struct['name'].upper() in digits else struct
+            for struct in structures]
+
+
+def _delete_keys(cursor, db_type, quote, placeholder, table_name, key_fields, keys):
+    """Delete every row with one of `keys` (None matches NULL); returns the number of rows deleted"""
+    deleted = 0
+    null_keys = [key for key in keys if None in key]
+    keys = [key for key in keys if None not in key]
+    chunk_size = max(1, KEY_DELETE_CHUNK // len(key_fields))
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i:i + chunk_size]
+        cursor.execute(key_delete_sql(table_name, key_fields, len(chunk), quote, placeholder,
+                                      values_list=db_type == "sqlite"),
+                       [value for key in chunk for value in key])
+        deleted += cursor.rowcount
+    for key in null_keys:
+        conditions = [f"{quote(name)} IS NULL" if value is None else f"{quote(name)} = {placeholder}"
+                      for name, value in zip(key_fields, key)]
+        cursor.execute(f"DELETE FROM {quote(table_name)} WHERE {' AND '.join(conditions)}",
+                       [value for value in key if value is not None])
+        deleted += cursor.rowcount
+    return deleted
+
+
+def _key_value(value):
+    # Key columns come back as the DBF wrote them, except DECIMAL/float ITEMCOUNT-style numbers
+    if isinstance(value, decimal.Decimal) and value == value.to_integral_value():
+        return int(value)
+    return value
@@ -0,0 +1,112 @@
+"""
+Skipping DBF files that have not changed since their last successful load.
+
+Master files like apvend, icgroup or glbatch change a few times a month, yet
+every run used to read and reload them. After a table is synced, the manifest
+stores a fingerprint of its DBF:
+
+    - file size and modification time
+    - header record count and last-update date (header bytes 1-3)
+    - a hash of the header, the last 64 KiB and MANIFEST_SAMPLE_BLOCKS blocks
+      of 4 KiB spread over the file
+
+On the next run a file whose fingerprint, filter settings and table row count
+all match its entry is not read at all. Anything else (no entry, a change, a
+table that was dropped or edited, FORCE_FULL_SYNC, `python main.py --force`)
+reads it as before. A failed sync removes the entry.
+"""
+
+import datetime
+import hashlib
+import os
+
+from watermark import STATE_LOCK, load_state_file, watermark_key, write_state_file
+
+MANIFEST_FILE = os.getenv(
+    "DBF_MANIFEST_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sync_state", "file_manifest.json"),
+)
+# 4 KiB blocks hashed across the file besides the header and the last 64 KiB; 0 = header and end only
+MANIFEST_SAMPLE_BLOCKS = int(os.getenv("DBF_MANIFEST_SAMPLE_BLOCKS", "64"))
+_SAMPLE_BYTES = 4096
+_END_BYTES = 65536
+
+
+class FileCheck:
+    """Fingerprint of a DBF and whether its table can be left as it is (reason says why or why not)"""
+
+    def __init__(self, fingerprint, skip, reason):
+        self.fingerprint = fingerprint
+        self.skip = skip
+        self.reason = reason
+
+
+def file_fingerprint(dbf_file_path):
+    """Size, mtime, header record count / last-update date and sampled content hash of a DBF"""
+    stat = os.stat(dbf_file_path)
+    size = stat.st_size
+    content = hashlib.blake2b(digest_size=16)
+    with open(dbf_file_path, "rb") as handle:
+        header = handle.read(32)
+        header_length = int.from_bytes(header[8:10], "little") if len(header) >= 12 else len(header)
+        handle.seek(0)
+        content.update(handle.read(header_length))
+        offsets = [header_length + (size - header_length) * index // MANIFEST_SAMPLE_BLOCKS
+                   for index in range(MANIFEST_SAMPLE_BLOCKS)] if size > header_length else []
+        for offset in offsets + [max(header_length, size - _END_BYTES)]:
+            handle.seek(offset)
+            content.update(handle.read(_END_BYTES if offset >= size - _END_BYTES else _SAMPLE_BYTES))
+    return {
+        "size": size,
+        "mtime_ns": stat.st_mtime_ns,
+        "record_count": int.from_bytes(header[4:8], "little") if len(header) >= 8 else 0,
+        "last_update": header[1:4].hex(),
+        "content_hash": content.hexdigest(),
+    }
+
+
+def check_file(dbf_file_path, table_name, context, table_rows, force=False):
+    """
+    Compare a DBF with its manifest entry.
+
+    context:    JSON-serializable settings the loaded rows depend on (filters, cutoff dates)
+    table_rows: current row count of the table (None if it does not exist)
+    force:      never skip (the fingerprint is still taken)
+    """
+    fingerprint = file_fingerprint(dbf_file_path)
+    previous = load_state_file(MANIFEST_FILE).get(watermark_key(table_name))
+    if force:
+        return FileCheck(fingerprint, False, "reading requested")
+    if previous is None:
+        return FileCheck(fingerprint, False, "not in the manifest")
+    changed = [name for name, value in fingerprint.items() if previous.get(name) != value]
+    if changed:
+        return FileCheck(fingerprint, False, f"file changed ({', '.join(changed)})")
+    if previous.get("context") != context:
+        return FileCheck(fingerprint, False, "filter settings changed since last sync")
+    if table_rows is None:
+        return FileCheck(fingerprint, False, "table does not exist")
+    if table_rows != previous.get("table_rows"):
+        return FileCheck(fingerprint, False, f"table has {table_rows:,} rows, expected {previous.get('table_rows', 0):,}")
+    return FileCheck(fingerprint, True, f"unchanged since {previous.get('synced_at', 'last sync')}")
+
+
+def save_manifest_entry(table_name, check, context, table_rows):
+    """Record the fingerprint a table was loaded from, after it synced successfully"""
+    entry = dict(check.fingerprint)
+    entry["context"] = context
+    entry["table_rows"] = table_rows
+    entry["synced_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+
+    with STATE_LOCK:
+        manifest = load_state_file(MANIFEST_FILE)
+        manifest[watermark_key(table_name)] = entry
+        write_state_file(MANIFEST_FILE, manifest)
+
+
+def clear_manifest_entry(table_name):
+    """Forget a table's fingerprint so its next sync reads the file"""
+    with STATE_LOCK:
+        manifest = load_state_file(MANIFEST_FILE)
+        if manifest.pop(watermark_key(table_name), None) is not None:
+            write_state_file(MANIFEST_FILE, manifest)
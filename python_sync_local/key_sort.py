@@ -0,0 +1,150 @@
+"""
+Key-ordered full loads: rows sorted by the table key before they reach the database.
+
+DBF records come in physical order, which for a table keyed like ictran
+(REFNO, ITEMCOUNT) is only roughly key order once UBS edits and re-saves
+documents. Inserted in that order, a table clustered on its key (an InnoDB
+PRIMARY KEY, or the key index built on it) splits pages all over the tree and
+ends up larger than it needs to be. For tables with "sort" in tables.json a
+full load sorts the rows by the table's keys first:
+
+    - rows are collected until they reach SORT_MEMORY_MB; a table that fits is
+      sorted in memory
+    - past that, each full buffer is sorted and spilled to a temporary file as
+      a run, and the runs are merged back in key order while loading
+    - keys compare the way MySQL does: strings stripped and case-insensitive,
+      NULL before any value
+
+`python benchmark.py sorted` loads ictran in file order and in key order into
+a keyed MySQL table and compares load time and data_length / index_length.
+"""
+
+import heapq
+import os
+import pickle
+import tempfile
+import time
+
+from record_batch import RecordBatch
+
+# Rows held in memory while sorting; beyond this sorted runs are spilled to temporary files
+SORT_MEMORY_MB = float(os.getenv("SORT_MEMORY_MB", "256"))
+# DBF field types whose keys compare as numbers
+_NUMERIC_TYPES = frozenset(['N', 'F', 'I', 'Y', 'B', 'L'])
+
+
+def row_keys(batch, key_fields):
+    """Sort key of every row of a batch, as a list of tuples in `key_fields` order"""
+    types = {field['name']: field.get('type') for field in batch.structure}
+    columns = []
+    for name in key_fields:
+        if types.get(name) in _NUMERIC_TYPES:
+            columns.append([(0, 0) if value is None else (1, value) for value in batch.column_values(name)])
+        else:
+            columns.append(batch.string_values(name).tolist())
+    return list(zip(*columns))
+
+
+def _sorted_batch(batch, key_fields):
+    keys = row_keys(batch, key_fields)
+    return batch.take(sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def _spill(batch, batch_rows):
+    run = tempfile.TemporaryFile(prefix="dbf-sort-")
+    for start in range(0, len(batch), batch_rows):
+        pickle.dump(batch.slice(start, start + batch_rows), run, protocol=pickle.HIGHEST_PROTOCOL)
+    size = run.tell()
+    run.seek(0)
+    return run, size
+
+
+def _run_rows(run, key_fields):
+    # (key, chunk, row) for every row of a spilled run, in order; closes (deletes) the file at the end
+    try:
+        while True:
+            try:
+                chunk = pickle.load(run)
+            except EOFError:
+                return
+            for index, key in enumerate(row_keys(chunk, key_fields)):
+                yield key, chunk, index
+    finally:
+        run.close()
+
+
+def _merge_runs(runs, key_fields, batch_rows):
+    # Rows that follow each other in the same chunk are taken as one slice
+    pieces = []
+    pending = 0
+    current = None
+    merged = heapq.merge(*(_run_rows(run, key_fields) for run in runs), key=lambda item: item[0])
+    for _, chunk, index in merged:
+        if current is not None and current[0] is chunk and current[2] == index:
+            current[2] += 1
+        else:
+            if current is not None:
+                pieces.append(current[0].slice(current[1], current[2]))
+            current = [chunk, index, index + 1]
+        pending += 1
+        if pending >= batch_rows:
+            pieces.append(current[0].slice(current[1], current[2]))
+            current = None
+            yield RecordBatch.concat(pieces)
+            pieces = []
+            pending = 0
+    if current is not None:
+        pieces.append(current[0].slice(current[1], current[2]))
+    if pieces:
+        yield RecordBatch.concat(pieces)
+
+
+def sort_batches(batches, key_fields, memory_mb=None, batch_rows=5000):
+    """
+    RecordBatches of all rows of `batches` in `key_fields` order, `batch_rows` rows each.
+    Reads every batch before yielding the first; spills sorted runs to temporary files
+    when the rows exceed `memory_mb` (default SORT_MEMORY_MB).
+    """
+    budget = (SORT_MEMORY_MB if memory_mb is None else memory_mb) * 1024 * 1024
+    sort_seconds = 0.0
+    buffered = []
+    buffered_bytes = 0
+    runs = []
+    spilled_bytes = 0
+    rows = 0
+    try:
+        for batch in batches:
+            if not len(batch):
+                continue
+            buffered.append(batch)
+            buffered_bytes += batch.approx_nbytes()
+            rows += len(batch)
+            if buffered_bytes >= budget:
+                start = time.time()
+                run, size = _spill(_sorted_batch(RecordBatch.concat(buffered), key_fields), batch_rows)
+                runs.append(run)
+                spilled_bytes += size
+                sort_seconds += time.time() - start
+                buffered = []
+                buffered_bytes = 0
+        start = time.time()
+        if buffered:
+            in_memory = _sorted_batch(RecordBatch.concat(buffered), key_fields)
+            buffered = []
+            if runs:
+                run, size = _spill(in_memory, batch_rows)
+                runs.append(run)
+                spilled_bytes += size
+        sort_seconds += time.time() - start
+    except BaseException:
+        for run in runs:
+            run.close()
+        raise
+
+    spilled = f", {len(runs)} runs spilled ({spilled_bytes / 1024 / 1024:,.1f} MB)" if runs else " in memory"
+    print(f"🔢 Sorted {rows:,} rows by {', '.join(key_fields)} in {sort_seconds:.2f}s{spilled}", flush=True)
+    if runs:
+        yield from _merge_runs(runs, key_fields, batch_rows)
+    elif rows:
+        for offset in range(0, rows, batch_rows):
+            yield in_memory.slice(offset, offset + batch_rows)
@@ -0,0 +1,215 @@
+"""
+Per-table load strategy picked from the history of earlier syncs.
+
+Tables with "load": "auto" in tables.json pick, on every run, whichever of these
+is predicted to be cheapest:
+
+    append     read and append the records added since the last sync (watermark.py)
+    blocks     replace the rows of the changed blocks by key (block_sync.py)
+    delta      read the whole file, write only the changed rows (delta_load.py)
+    swap       full load into a MySQL staging table, then RENAME (sync_database.py)
+    truncate   full reload in place; leaves the table empty while loading, so it is
+               only a candidate where the table's "strategies" list it
+
+append / blocks are candidates when their plan allows an incremental read, delta
+when the table exists and has keys. After every successful sync the history file
+stores, per table, the record and row counts, the share of rows that changed (from
+delta counts and incremental reads) and the seconds each strategy took per MB of
+the DBF it read. A prediction uses the table's own history, then the average over
+all tables, then DEFAULT_SECONDS_PER_MB scaled by how the timed strategies compared
+with their defaults (so an untimed strategy that should win gets tried). A delta costs a scan of the whole file
+plus writing the expected changed rows at the speed of a swap; a delta that hit
+duplicate or empty keys is not tried again for LOAD_DELTA_RETRY_HOURS.
+
+A fixed "load" in tables.json, or LOAD_<NAME> in the environment (e.g.
+LOAD_ICTRAN=swap), overrides the choice; incremental reads still apply as before.
+"""
+
+import datetime
+import os
+
+from watermark import STATE_LOCK, load_state_file, watermark_key, write_state_file
+
+LOAD_HISTORY_FILE = os.getenv(
+    "LOAD_HISTORY_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sync_state", "load_history.json"),
+)
+# Weight of the newest run in the running averages (1 = only the last run counts)
+LOAD_HISTORY_WEIGHT = float(os.getenv("LOAD_HISTORY_WEIGHT", "0.3"))
+# Hours before a table whose delta failed on its keys is tried with a delta again
+LOAD_DELTA_RETRY_HOURS = float(os.getenv("LOAD_DELTA_RETRY_HOURS", "24"))
+# Seconds per MB of DBF read, until a strategy has been timed on this database ("delta" = the scan only)
+DEFAULT_SECONDS_PER_MB = {"append": 0.4, "blocks": 0.5, "delta": 0.15, "swap": 0.5, "truncate": 0.4}
+# Share of rows a delta is assumed to change before one has been measured
+DEFAULT_CHANGED_FRACTION = 0.05
+INCREMENTAL_STRATEGIES = ("append", "blocks")
+FULL_STRATEGIES = ("delta", "swap", "truncate")
+# Key of the averages over all tables
+_ALL_TABLES = "*"
+
+
+class LoadDecision:
+    """
+    The strategy for one run, why, and the predicted seconds of every candidate.
+    full: the full load to run if an incremental strategy cannot be used after all.
+    """
+
+    def __init__(self, strategy, reason, costs=None, full=None):
+        self.strategy = strategy
+        self.reason = reason
+        self.costs = costs or {}
+        self.full = full or strategy
+
+    @property
+    def incremental(self):
+        return self.strategy in INCREMENTAL_STRATEGIES
+
+    def describe(self):
+        others = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in sorted(self.costs.items(), key=lambda item: item[1])
+                           if name != self.strategy)
+        return f"{self.strategy}: {self.reason}" + (f" (vs {others})" if others else "")
+
+
+def full_strategy(strategy, db_type=None):
+    """The strategy a full load really runs: outside MySQL a swap reloads the table in place"""
+    db_type = db_type or os.getenv("DB_TYPE", "mysql")
+    return "truncate" if strategy == "swap" and db_type != "mysql" else strategy
+
+
+def choose_strategy(spec, table_name, file_mb, table_rows, incremental=None):
+    """
+    LoadDecision for one run of a table_manifest.TableSpec.
+
+    file_mb:     MB of records in the DBF
+    table_rows:  current row count of the table (None if it does not exist)
+    incremental: ("append" / "blocks", share of the file it reads) if the plan allows an
+                 incremental read, else None
+    """
+    if spec.load != "auto":
+        where = f"LOAD_{spec.name.upper()}" if spec.load_overridden else "tables.json"
+        full = full_strategy("swap" if spec.load == "delta" and table_rows is None else spec.load)
+        if incremental is not None:
+            return LoadDecision(incremental[0], f"incremental read possible, load {spec.load} set in {where}",
+                                full=full)
+        if full != spec.load and spec.load == "delta":
+            return LoadDecision(full, "first load of the table")
+        return LoadDecision(full, f"load {spec.load} set in {where}")
+
+    history = load_state_file(LOAD_HISTORY_FILE)
+    table = history.get(watermark_key(table_name), {})
+    overall = history.get(watermark_key(_ALL_TABLES), {})
+    notes = []
+    costs = {}
+    if incremental is not None:
+        strategy, share = incremental
+        costs[strategy] = share * file_mb * _seconds_per_mb(strategy, table, overall)
+
+    candidates = [full_strategy(name) for name in spec.strategies]
+    if "delta" in candidates:
+        retry = _delta_retry(table)
+        if not spec.keys:
+            candidates.remove("delta")
+        elif table_rows is None:
+            candidates.remove("delta")
+            notes.append("table does not exist yet")
+        elif retry:
+            candidates.remove("delta")
+            notes.append(retry)
+    for strategy in dict.fromkeys(candidates):
+        if strategy == "delta":
+            changed = table.get("changed_fraction", DEFAULT_CHANGED_FRACTION)
+            write = _seconds_per_mb(full_strategy("swap"), table, overall)
+            costs["delta"] = file_mb * (_seconds_per_mb("delta", table, overall) + changed * write)
+            notes.append(f"{changed:.1%} of rows change per sync")
+        else:
+            costs[strategy] = file_mb * _seconds_per_mb(strategy, table, overall)
+    full_costs = {name: seconds for name, seconds in costs.items() if name not in INCREMENTAL_STRATEGIES}
+    full = min(full_costs, key=full_costs.get) if full_costs else full_strategy("swap")
+    if not costs:
+        return LoadDecision(full, "; ".join(notes + [f"no usable strategy among {', '.join(spec.strategies)}"]))
+
+    best = min(costs, key=lambda name: (costs[name], name not in INCREMENTAL_STRATEGIES))
+    runs = table.get("strategies", {}).get(best, {}).get("runs", 0)
+    basis = f"{runs} timed runs" if runs else "no timed run yet"
+    reason = f"predicted {costs[best]:.1f}s for {file_mb:,.1f} MB ({basis})"
+    return LoadDecision(best, "; ".join([reason] + notes), costs, full)
+
+
+def _seconds_per_mb(strategy, table, overall):
+    for source in (table, overall):
+        timed = source.get("strategies", {}).get(strategy)
+        if timed:
+            return timed["seconds_per_mb"]
+    # Never timed: the default, scaled by how the strategies that were timed compare with theirs
+    for source in (table, overall):
+        ratios = [timed["seconds_per_mb"] / DEFAULT_SECONDS_PER_MB[name]
+                  for name, timed in source.get("strategies", {}).items()]
+        if ratios:
+            return DEFAULT_SECONDS_PER_MB[strategy] * sum(ratios) / len(ratios)
+    return DEFAULT_SECONDS_PER_MB[strategy]
+
+
+def _delta_retry(table):
+    failed = table.get("delta_failed")
+    if not failed:
+        return None
+    age = datetime.datetime.now() - datetime.datetime.fromisoformat(failed["at"])
+    if age.total_seconds() >= LOAD_DELTA_RETRY_HOURS * 3600:
+        return None
+    return f"delta failed {age.total_seconds() / 3600:.1f}h ago ({failed['error']})"
+
+
+def _average(old, new):
+    return new if old is None else old + LOAD_HISTORY_WEIGHT * (new - old)
+
+
+def record_load(table_name, strategy, seconds, read_mb, read_records, records, table_rows, changed_fraction=None,
+                scan_seconds=None):
+    """
+    Add a successful sync to the history.
+
+    read_mb:          MB of the DBF the strategy read (read_records of its records)
+    records:          records in the DBF
+    changed_fraction: share of the table's rows that changed, if the run tells (delta counts, incremental reads)
+    scan_seconds:     for a delta, the seconds without writing the changed rows
+    """
+    if read_mb <= 0:
+        return
+    timed_seconds = seconds if scan_seconds is None else scan_seconds
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    with STATE_LOCK:
+        history = load_state_file(LOAD_HISTORY_FILE)
+        for key in (watermark_key(table_name), watermark_key(_ALL_TABLES)):
+            entry = history.setdefault(key, {})
+            timed = entry.setdefault("strategies", {}).setdefault(strategy, {"runs": 0})
+            timed["seconds_per_mb"] = _average(timed.get("seconds_per_mb"), timed_seconds / read_mb)
+            timed["records_per_second"] = round(read_records / seconds) if seconds > 0 else None
+            timed["runs"] += 1
+            timed["last_run"] = now
+        entry = history[watermark_key(table_name)]
+        entry["records"] = records
+        entry["table_rows"] = table_rows
+        if changed_fraction is not None:
+            entry["changed_fraction"] = _average(entry.get("changed_fraction"), changed_fraction)
+        if strategy == "delta":
+            entry.pop("delta_failed", None)
+        write_state_file(LOAD_HISTORY_FILE, history)
+
+
+def record_delta_failure(table_name, error):
+    """Remember that a delta could not match rows by key, so auto tables skip it for a while"""
+    with STATE_LOCK:
+        history = load_state_file(LOAD_HISTORY_FILE)
+        entry = history.setdefault(watermark_key(table_name), {})
+        entry["delta_failed"] = {"at": datetime.datetime.now().isoformat(timespec="seconds"), "error": str(error)}
+        write_state_file(LOAD_HISTORY_FILE, history)
+
+
+def delta_scan_seconds(table_name, seconds, changed_rows, read_mb, records):
+    """Seconds of a delta minus writing its changed rows at the table's full-load (swap) speed"""
+    history = load_state_file(LOAD_HISTORY_FILE)
+    table = history.get(watermark_key(table_name), {})
+    overall = history.get(watermark_key(_ALL_TABLES), {})
+    write = _seconds_per_mb(full_strategy("swap"), table, overall)
+    written_mb = read_mb * changed_rows / records if records else 0.0
+    return max(seconds * 0.1, seconds - written_mb * write)
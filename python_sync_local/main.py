@@ -1,13 +1,38 @@
-from utils import read_dbf, sync_to_server, test_server_response
-from sync_database import create_sync_logs_table, sync_to_database
+from utils import read_dbf_iter, read_dbf_structure, sync_to_server, test_server_response
+from sync_database import (connect_database, count_table_rows, create_sync_logs_table, replace_rows_by_key,
+                           rollback_table_swap, sync_to_database_stream)
+from table_schema import migrate_mysql_table
+from watermark import clear_watermark, plan_tail_read, save_watermark
+from block_sync import clear_block_state, iter_block_changes, plan_block_sync, save_block_state
+from delta_load import DeltaKeyError, delta_sync_stream
+from file_manifest import check_file, clear_manifest_entry, save_manifest_entry
+from load_strategy import choose_strategy, delta_scan_seconds, full_strategy, record_delta_failure, record_load
 from sync_lock import acquire_sync_lock, release_sync_lock, is_sync_running
+from row_filters import parse_filter
+from pipeline import TablePipeline, prepare_job
+from table_scheduler import RecurringScheduler, TableScheduler, resolve_sync_workers
+from table_manifest import get_tables
+from dbf_reader import read_record_count
+from watch_mode import watch_files
+import mysql_pool
+import itertools
 import os
 import sys
+import threading
 import time
 import atexit
 
+# The tables to sync and how (source path, keys, filter, load strategy, parallelism, dependencies,
+# schedule) are declared in tables.json, see table_manifest.py
 
-def main():
+# Minutes between reports of what scheduled mode has been doing
+SCHEDULE_REPORT_MINUTES = float(os.getenv("SCHEDULE_REPORT_MINUTES", "60"))
+
+# FORCE_FULL_SYNC=1 reloads every table in full (and stores fresh watermarks)
+FORCE_FULL_SYNC = os.getenv("FORCE_FULL_SYNC", "").strip().lower() in ("1", "true", "yes")
+
+
+def main(force=False):
     # Check if PHP sync is running
     # if is_sync_running('php'):
     #     print("❌ PHP sync is currently running. Please wait for it to complete.", flush=True)
@@ -25,7 +50,7 @@ def main():
         create_sync_logs_table()
 
         # test_server_response()
-        sync_all()
+        sync_all(force=force)
     except Exception as e:
         print(f"❌ Sync failed: {e}", flush=True)
         release_sync_lock('python')
@@ -34,260 +59,524 @@ def main():
         # Ensure lock is released
         release_sync_lock('python')
 
-    # while True:
-    #     # Call your function or logic here
-    #     print("Running task...")
-    #     sync_all()
-    #     # Wait 5 seconds
-    #     print("Waiting ... ... ...")
-    #     time.sleep(30)
-
-    # single_sync()
+    # Continuous syncing as UBS writes the files: python main.py --watch (see watch())
 
 
-def sync_all():
+def sync_all(force=False, only=None):
+    """
+    Sync every table of tables.json, or the DBF names in `only`. Files unchanged since their
+    last successful load (file_manifest.py) are skipped unless `force` is set.
+    Returns {dbf name: how it was read, or "failed"} for the DBFs found.
+    """
     start_time = time.time()
     print("🚀 Starting FAST DBF to MySQL sync...", flush=True)
     
-    grouped_dbfs = {
-        "UBSACC2015": [
-            "arcust",
-            "apvend",
-            "arpay",
-            "arpost",
-            "gldata",
-            "glbatch",
-            "glpost",
-        ],
-        "UBSSTK2015": [
-            "icitem",
-            "icgroup",
-            "artran",
-            "ictran",
-        ],
-    }
-
-    dbf_subpath=os.getenv("DBF_SUBPATH", "Sample")
-    total_files = sum(len(dbf_list) for dbf_list in grouped_dbfs.values())
+    tables = [spec for spec in get_tables().values() if not only or spec.name in only]
+    total_files = len(tables)
     processed_files = 0
+    
+    workers = resolve_sync_workers()
+    read_modes = {}
+    pipeline = scheduler = None
+    if workers > 1:
+        # Several tables at once, each read and loaded by one worker; the biggest ones start first
+        started = itertools.count(1)
 
-    for directory_name, dbf_list in grouped_dbfs.items():
-        directory_path = f"C:/{directory_name}/"+dbf_subpath
-        for dbf_name in dbf_list:
-            file_name = dbf_name + ".dbf"
-            full_path = os.path.join(directory_path, file_name)
-            
-            # Check if file exists before processing
-            if not os.path.exists(full_path):
-                print(f"⚠️  File {full_path} not found, skipping...", flush=True)
-                continue
-                
-            try:
-                file_start = time.time()
-                print(f"📁 [{processed_files+1}/{total_files}] Processing {file_name}...", flush=True)
-                
-                # Define progress callback for this file
-                def progress_callback(records_read, status_message):
-                    print(status_message, flush=True)
-                
-                print(f"🔍 Reading DBF file: {file_name}...", flush=True)
-                # Skip records before 2025-12-01 ONLY for ictran (performance optimization)
-                # ⚠️ CRITICAL: icitem is MASTER DATA - do NOT filter by date! All items must sync.
-                skip_before_date = None
-                if dbf_name == 'ictran':
-                    skip_before_date = os.getenv("SKIP_BEFORE_DATE", "20251201")  # Default: 2025-12-01
-                    print(f"📅 Date filtering enabled for {dbf_name}: Skipping records before {skip_before_date}", flush=True)
-                data = read_dbf(full_path, progress_callback=progress_callback, skip_before_date=skip_before_date)
-                
-                # Check if we got valid data
-                if not data or not data.get('structure') or not data.get('rows'):
-                    print(f"⚠️  No data in {file_name}, skipping...", flush=True)
-                    continue
-                
-                original_record_count = len(data['rows'])
-                print(f"📊 Read {original_record_count:,} records from {file_name}", flush=True)
-                
-                # Filter artran: 
-                # - DO type orders: KEEP ALL (DO should sync FROM UBS TO server)
-                # - INV with DATE <= 2025-12-12: Skip ALL
-                # - INV with DATE > 2025-12-12: Keep ALL (future dates allowed)
-                # - Other types: Keep ALL
-                if dbf_name == 'artran':
-                    print(f"🔍 Filtering artran records...", flush=True)
-                    cutoff_date_str = '20251212'  # YYYYMMDD format (DBF date format)
-                    original_count = len(data['rows'])
-                    
-                    filtered_records = []
-                    inv_skipped_count = 0
-                    
-                    for row in data['rows']:
-                        date_value = row.get('DATE')
-                        type_value = str(row.get('TYPE', '')).strip().upper()
-                        
-                        # ✅ FIX: DO type orders should sync FROM UBS TO server (not skipped)
-                        # Skip INV with date <= 2025-12-12
-                        if type_value == 'INV':
-                            date_str = None
-                            if date_value:
-                                try:
-                                    date_str = str(date_value).strip()
-                                    # Handle YYYYMMDD format (8 digits)
-                                    if len(date_str) >= 8 and date_str[:8].isdigit():
-                                        date_str = date_str[:8]
-                                    # Handle YYYY-MM-DD format
-                                    elif '-' in date_str and len(date_str) >= 10:
-                                        date_parts = date_str[:10].split('-')
-                                        if len(date_parts) == 3:
-                                            date_str = ''.join(date_parts)
-                                except Exception:
-                                    pass
-                            
-                            # Check if date is <= cutoff
-                            if date_str and date_str <= cutoff_date_str:
-                                inv_skipped_count += 1
-                                continue
-                        
-                        # Keep all records (DO, INV with date > 2025-12-12, other types, etc.)
-                        filtered_records.append(row)
-                    
-                    data['rows'] = filtered_records
-                    filtered_count = len(filtered_records)
-                    skipped_count = original_count - filtered_count
-                    
-                    if inv_skipped_count > 0:
-                        print(f"⏭️  Skipped {inv_skipped_count:,} INV records with date <= 2025-12-12", flush=True)
-                    if skipped_count > 0:
-                        print(f"⏭️  Total filtered: {skipped_count:,} record(s) ({filtered_count:,} remaining)", flush=True)
-                    print(f"✅ Filtering complete: {filtered_count:,} records to sync (DO orders included)", flush=True)
-                
-                # Filter ictran: Keep all records
-                # Orphaned items (where parent order was deleted) will be cleaned up by database cleanup script
-                elif dbf_name == 'ictran':
-                    # Note: ictran items are linked to artran via REFNO
-                    # Since we filter artran above, some ictran items may become orphaned
-                    # These will be cleaned up by the database cleanup script that deletes:
-                    # DELETE oi FROM order_items oi LEFT JOIN orders o ON oi.reference_no = o.reference_no 
-                    # WHERE o.reference_no IS NULL
-                    pass
-                
-                record_count_to_sync = len(data['rows'])
-                print(f"💾 Syncing {record_count_to_sync:,} records to database...", flush=True)
-                sync_to_database(file_name, data, directory_name)
-                
-                file_time = time.time() - file_start
-                print(f"✅ {file_name} completed in {file_time:.2f}s ({record_count_to_sync:,} records)", flush=True)
-                
-            except Exception as e:
-                print(f"❌ Error processing {file_name}: {e}", flush=True)
-                import traceback
-                traceback.print_exc()
+        def sync_table(spec):
+            if os.path.exists(spec.path):
+                print(f"📁 [{next(started)}/{total_files}] Processing {spec.file_name}...", flush=True)
+            job = prepare_job(spec, lambda spec: prepare_table(spec, force=force), read_ahead)
+            if job.table is None and job.error is None:
+                return False  # file not found
+            synced = load_table(job)
+            read_modes[spec.name] = job.table.read_mode if synced else "failed"
+            return synced
+
+        print(f"👷 Syncing up to {workers} tables at once", flush=True)
+        scheduler = TableScheduler(sync_table, workers, name=lambda spec: spec.name,
+                                   weight=lambda spec: read_record_count(spec.path),
+                                   dependencies={spec.name: spec.depends_on for spec in tables})
+        results = scheduler.run(tables)
+        processed_files = sum(1 for result in results.values() if result is True)
+    else:
+        # The reader stage prepares and decodes tables ahead; they are loaded here one by one, in order
+        pipeline = TablePipeline(lambda spec: prepare_table(spec, force=force), read_ahead)
+        for job in pipeline.run(tables):
+            if job.table is None and job.error is None:
+                job.start()  # file not found
                 continue
-            
-            processed_files += 1
+            print(f"📁 [{processed_files+1}/{total_files}] Processing {job.spec.file_name}...", flush=True)
+            job.start()
+            synced = load_table(job)
+            if synced:
+                processed_files += 1
+            read_modes[job.spec.name] = job.table.read_mode if synced else "failed"
     
     total_time = time.time() - start_time
     print(f"\n🎉 SYNC COMPLETED!", flush=True)
     print(f"⏱️  Total time: {total_time:.2f} seconds", flush=True)
     print(f"📊 Files processed: {processed_files}/{total_files}", flush=True)
     print(f"⚡ Average per file: {total_time/processed_files:.2f}s" if processed_files > 0 else "", flush=True)
+    if read_modes:
+        print("📋 Files: " + ", ".join(f"{name} {mode}" for name, mode in read_modes.items()), flush=True)
+    if pipeline is not None and pipeline.enabled:
+        print(f"🔀 Pipeline: {pipeline.describe()}", flush=True)
+    if scheduler is not None:
+        for line in scheduler.describe_workers():
+            print(f"👷 {line}", flush=True)
+    pool = mysql_pool.get_pool()
+    if pool.opened:
+        print(f"🔌 MySQL connections: {pool.describe()}", flush=True)
+        pool.close_all()
+    return read_modes
 
 
-def single_sync():
-    directory_name = "UBSACC2015"
-    directory_path = f"C:/{directory_name}/Sample"
-    file_name = "arcust.dbf"
-    full_path = os.path.join(directory_path, file_name)
-    data = read_dbf(full_path)
-    print(data)
-    sync_to_database(file_name, data, directory_name)
+class TableRun:
+    """What prepare_table worked out for one DBF; load_table syncs it"""
 
+    def __init__(self, spec):
+        self.spec = spec
+        self.directory_name = spec.directory
+        self.dbf_name = spec.name
+        self.file_name = spec.file_name
+        self.full_path = spec.path
+        self.table_name = spec.table_name
+        self.skip_before_date = spec.skip_before_date
+        self.row_filter = None
+        self.structure_info = None
+        self.sync_context = None
+        self.key_fields = None
+        self.file_check = None
+        self.tail_plan = None
+        self.block_plan = None
+        self.decision = None
+        self.file_mb = 0.0
 
-def sync_icgroup_only():
+    @property
+    def skipped(self):
+        return self.file_check is not None and self.file_check.skip
+
+    @property
+    def read_mode(self):
+        """How the DBF was read: skipped (unchanged), tail read, changed blocks read or full read"""
+        if self.skipped:
+            return "skipped"
+        if self.block_plan is not None and self.block_plan.incremental:
+            return "blocks read"
+        if self.tail_plan is not None and self.tail_plan.append:
+            return "tail read"
+        return "full read"
+
+    def open_batches(self):
+        """
+        The rows to load: the planned blocks or record range, or the whole file. Each read gets
+        a freshly compiled row filter, so records counted by an abandoned read are not reported.
+        """
+        self.row_filter = get_table_filter(self.spec)
+        if self.block_plan is not None:
+            return (batch for _, batch in iter_block_changes(self.full_path, self.block_plan,
+                                                             skip_before_date=self.skip_before_date,
+                                                             row_filter=self.row_filter) if len(batch))
+        read_range = {}
+        if self.tail_plan is not None:
+            read_range = {"start": self.tail_plan.start, "stop": self.tail_plan.stop}
+        return read_dbf_iter(self.full_path, progress_callback=print_progress, skip_before_date=self.skip_before_date,
+                             row_filter=self.row_filter, workers=self.spec.read_workers, **read_range)
+
+
+def print_progress(records_read, status_message):
+    print(status_message, flush=True)
+
+
+def prepare_table(spec, force=False):
     """
-    Sync only icgroup.dbf from UBSSTK2015 directory to local MySQL
-    Creates/updates the ubs_ubsstk2015_icgroup table
+    Reader stage of one table_manifest.TableSpec: manifest check, filters, structure and
+    tail / block plan. Returns a TableRun (with only the manifest check if the file is
+    unchanged), or None if the DBF does not exist. `force` reads the file even if it is unchanged.
     """
-    import mysql.connector
+    full_path = spec.path
+    dbf_name = spec.name
     
-    start_time = time.time()
-    print("🚀 Starting icgroup DBF to MySQL sync...")
+    # Check if file exists before processing
+    if not os.path.exists(full_path):
+        print(f"⚠️  File {full_path} not found, skipping...", flush=True)
+        return None
     
-    # Show database connection info
-    db_host = os.getenv("DB_HOST", "localhost")
-    db_user = os.getenv("DB_USER", "root")
-    db_name = os.getenv("DB_NAME", "your_database")
-    print(f"📊 Database: {db_name} @ {db_host} (user: {db_user})")
+    run = TableRun(spec)
+    print(f"🔍 Reading DBF file: {run.file_name}...", flush=True)
+    # Only tables with skip_before_date in tables.json (ictran); master data like icitem must sync in full
+    if run.skip_before_date:
+        print(f"📅 Date filtering enabled for {dbf_name}: Skipping records before {run.skip_before_date}", flush=True)
+    run.row_filter = get_table_filter(spec)
+    if run.row_filter is not None:
+        print(f"🔍 Filtering {dbf_name} records: {run.row_filter.describe()}", flush=True)
+    # Settings the loaded rows depend on; a change forces a full reload of tail/block synced tables
+    run.sync_context = {
+        "skip_before_date": run.skip_before_date,
+        "filter": run.row_filter.describe() if run.row_filter is not None else None,
+    }
+    table_name = run.table_name
+    table_rows = count_table_rows(table_name)
+    run.file_check = check_file(full_path, table_name, run.sync_context, table_rows,
+                                force=force or FORCE_FULL_SYNC)
+    if run.skipped:
+        print(f"⏭️  {run.file_name} {run.file_check.reason}, not reading it", flush=True)
+        return run
+    run.structure_info = read_dbf_structure(full_path)
+    run.key_fields = spec.keys
     
-    directory_name = "UBSSTK2015"
-    dbf_subpath = os.getenv("DBF_SUBPATH", "Sample")
-    directory_path = f"C:/{directory_name}/{dbf_subpath}"
-    file_name = "icgroup.dbf"
-    full_path = os.path.join(directory_path, file_name)
-    
-    # Check if file exists
-    if not os.path.exists(full_path):
-        print(f"❌ File {full_path} not found!")
-        print(f"💡 Please check if the file exists at: {full_path}")
-        return False
+    if spec.incremental == "blocks":
+        # Edited-in-place tables: re-read only blocks whose hash changed
+        block_plan = plan_block_sync(full_path, table_name, run.sync_context, table_rows,
+                                     run.key_fields, force_full=FORCE_FULL_SYNC)
+        print(f"🧱 Changed blocks: {block_plan.detected:,}/{len(block_plan.hashes):,} "
+              f"({block_plan.changed_fraction:.1%}) of {block_plan.block_records:,} records", flush=True)
+        if not block_plan.incremental:
+            print(f"📌 Full reload: {block_plan.reason}", flush=True)
+        elif block_plan.changed:
+            records = sum(stop - start for start, stop in map(block_plan.block_range, block_plan.changed))
+            print(f"📌 Block sync: re-reading {len(block_plan.changed):,} changed blocks ({records:,} records)",
+                  flush=True)
+        run.block_plan = block_plan
+    elif spec.incremental == "append":
+        # Append-only tables: read just the new records if nothing before them changed
+        tail_plan = plan_tail_read(full_path, table_name, run.sync_context, table_rows,
+                                   force_full=FORCE_FULL_SYNC)
+        if tail_plan.append:
+            print(f"📌 Tail read: {tail_plan.reason}, reading {tail_plan.new_records:,} new records", flush=True)
+        else:
+            print(f"📌 Full reload: {tail_plan.reason}", flush=True)
+        run.tail_plan = tail_plan
     
+    # Incremental read, delta, swap or truncate: fixed in tables.json or picked from the load history
+    records = run.structure_info['record_count']
+    incremental = None
+    if run.block_plan is not None and run.block_plan.incremental:
+        changed_records = sum(stop - start for start, stop in map(run.block_plan.block_range, run.block_plan.changed))
+        incremental = ("blocks", changed_records / records if records else 0.0)
+    elif run.tail_plan is not None and run.tail_plan.append:
+        incremental = ("append", run.tail_plan.new_records / records if records else 0.0)
+    run.file_mb = os.path.getsize(full_path) / (1024 * 1024)
+    run.decision = choose_strategy(spec, table_name, run.file_mb, table_rows, incremental)
+    print(f"🧭 Load strategy {run.decision.describe()}", flush=True)
+    if incremental is not None and not run.decision.incremental:
+        reason = f"{run.decision.strategy} predicted cheaper than {incremental[0]}"
+        if run.block_plan is not None:
+            run.block_plan = run.block_plan.full_reload(reason)
+        if run.tail_plan is not None:
+            run.tail_plan = run.tail_plan.full_reload(reason)
+        print(f"📌 Full reload: {reason}", flush=True)
+    return run
+
+
+def read_ahead(run):
+    """What the reader stage decodes ahead for a prepared table (None: nothing)"""
+    if run is None or run.skipped or not run.structure_info['structure']:
+        return None
+    if run.block_plan is not None and run.block_plan.incremental:
+        if not run.block_plan.changed:
+            return None
+        return iter_block_changes(run.full_path, run.block_plan, run.key_fields, run.skip_before_date, run.row_filter)
+    return run.open_batches()
+
+
+def load_table(job):
+    """
+    Loader stage of one table prepared by prepare_table; job.stream holds the batches
+    (or block changes) read ahead. Returns True if the table was synced.
+    """
+    run = job.table
+    tail_plan = run.tail_plan if run is not None else None
+    block_plan = run.block_plan if run is not None else None
     try:
-        print(f"📁 Processing {file_name}...")
-        
-        # Read DBF file
-        data = read_dbf(full_path)
-        
-        # Check if we got valid data
-        if not data or not data.get('structure') or not data.get('rows'):
-            print(f"⚠️  No data in {file_name}, skipping...")
-            return False
+        if job.error is not None:
+            raise job.error
+        if run.skipped:
+            print(f"✅ {run.file_name} skipped, table is up to date", flush=True)
+            return True
+        file_start = time.time()
+        file_name = run.file_name
+        directory_name = run.directory_name
+        structure_info = run.structure_info
+        key_fields = run.key_fields
+        records = structure_info['record_count']
         
-        # Sync to database
-        sync_to_database(file_name, data, directory_name)
+        # What the load history is told: the strategy used, records it read, share of rows changed
+        full_load = run.decision.full
+        strategy, read_records, changed_fraction, changed_rows = full_load, records, None, None
+        record_count_to_sync = None
+        batches = job.stream
+        if block_plan is not None and block_plan.incremental:
+            record_count_to_sync = sync_changed_blocks(file_name, directory_name, structure_info, key_fields,
+                                                       block_plan, job.stream)
+            strategy = "blocks"
+            read_records = sum(stop - start for start, stop in map(block_plan.block_range, block_plan.changed))
+            changed_fraction = block_plan.changed_fraction
+            if record_count_to_sync is None:
+                block_plan = run.block_plan = block_plan.full_reload("block changes did not match the table")
+                print(f"📌 Full reload: {block_plan.reason}", flush=True)
+                batches = None
+                strategy, read_records, changed_fraction = full_load, records, None
         
-        # Verify table was created
-        table_name = "ubs_ubsstk2015_icgroup"
-        try:
-            connection = mysql.connector.connect(
-                host=db_host,
-                user=db_user,
-                password=os.getenv("DB_PASSWORD", ""),
-                database=db_name
-            )
-            cursor = connection.cursor()
+        if record_count_to_sync is None:
+            if batches is None:
+                batches = run.open_batches()
             
-            # Check if table exists
-            cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
-            table_exists = cursor.fetchone()
+            # Filter ictran: Keep all records
+            # Orphaned items (where parent order was deleted) will be cleaned up by database cleanup script
+            # Note: ictran items are linked to artran via REFNO
+            # Since we filter artran above, some ictran items may become orphaned
+            # These will be cleaned up by the database cleanup script that deletes:
+            # DELETE oi FROM order_items oi LEFT JOIN orders o ON oi.reference_no = o.reference_no 
+            # WHERE o.reference_no IS NULL
             
-            if table_exists:
-                # Get record count
-                cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
-                count = cursor.fetchone()[0]
-                print(f"✅ Table '{table_name}' verified in database '{db_name}'")
-                print(f"📊 Record count: {count} records")
+            # Check if we got valid data - peek at the first batch so empty files never truncate the table
+            first_batch = next(batches, None) if structure_info['structure'] else None
+            append = tail_plan is not None and tail_plan.append
+            if append:
+                strategy, read_records = "append", tail_plan.new_records
+                changed_fraction = tail_plan.new_records / records if records else 0.0
+            if append and first_batch is None:
+                print(f"✅ No new records to append, table is up to date", flush=True)
+                record_count_to_sync = 0
             else:
-                print(f"⚠️  WARNING: Table '{table_name}' not found in database '{db_name}'")
-                print(f"💡 Please check if you're looking at the correct database")
-            
-            cursor.close()
-            connection.close()
-            
-        except Exception as verify_error:
-            print(f"⚠️  Could not verify table creation: {verify_error}")
+                if not structure_info['structure'] or first_batch is None:
+                    print(f"⚠️  No data in {file_name}, skipping...", flush=True)
+                    return False
+                batches = itertools.chain([first_batch], batches)
+                
+                if not append and strategy == "delta" and count_table_rows(run.table_name) is None:
+                    strategy = full_strategy("swap")  # the table is gone, load it anew
+                if not append and strategy == "delta":
+                    print(f"💾 Syncing records to database (delta by {', '.join(key_fields)}, "
+                          f"{structure_info['record_count']:,} in file)...", flush=True)
+                    try:
+                        counts = delta_sync_stream(file_name, structure_info['structure'], batches,
+                                                   directory_name, key_fields)
+                        record_count_to_sync = counts.dbf_rows
+                        changed_rows = counts.inserted + counts.updated + counts.deleted
+                        changed_fraction = changed_rows / max(counts.dbf_rows + counts.deleted, 1)
+                    except DeltaKeyError as e:
+                        print(f"⚠️  {e}; reloading the table in full", flush=True)
+                        record_delta_failure(run.table_name, e)
+                        strategy = full_strategy("swap")
+                        if job.stream is not None:
+                            job.stream.close()
+                        batches = run.open_batches()
+                
+                if record_count_to_sync is not None:
+                    pass  # loaded as a delta
+                elif append:
+                    print(f"💾 Syncing records to database (appending, {tail_plan.new_records:,} new in file)...", flush=True)
+                    record_count_to_sync = sync_to_database_stream(
+                        file_name, structure_info['structure'], batches, directory_name,
+                        record_count_hint=tail_plan.new_records, append=True
+                    )
+                else:
+                    print(f"💾 Syncing records to database (streaming, {structure_info['record_count']:,} in file)...", flush=True)
+                    record_count_to_sync = sync_to_database_stream(
+                        file_name, structure_info['structure'], batches, directory_name,
+                        record_count_hint=structure_info['record_count'], key_fields=key_fields,
+                        load=strategy, shards=run.spec.shards, sort=run.spec.sort
+                    )
         
-        file_time = time.time() - start_time
-        record_count = len(data['rows']) if data.get('rows') else 0
-        print(f"✅ {file_name} completed in {file_time:.2f}s ({record_count} records)")
-        print(f"📊 Table 'ubs_ubsstk2015_icgroup' created/updated in database '{db_name}'")
+        table_rows = count_table_rows(run.table_name)
+        if tail_plan is not None:
+            save_watermark(run.table_name, tail_plan, run.sync_context, table_rows)
+        if block_plan is not None:
+            save_block_state(run.table_name, block_plan, run.sync_context, table_rows)
+        save_manifest_entry(run.table_name, run.file_check, run.sync_context, table_rows)
         
+        row_filter = run.row_filter
+        if row_filter is not None:
+            for rule in row_filter.rules:
+                if rule.action == 'drop' and rule.matched > 0:
+                    print(f"⏭️  Skipped {rule.matched:,} records where {rule.text}", flush=True)
+            print(f"✅ Filtering complete: {record_count_to_sync:,} records to sync", flush=True)
+        
+        file_time = time.time() - file_start
+        read_mb = run.file_mb * read_records / records if records else 0.0
+        scan_seconds = None
+        if changed_rows is not None:
+            scan_seconds = delta_scan_seconds(run.table_name, file_time, changed_rows, run.file_mb, records)
+        record_load(run.table_name, strategy, file_time, read_mb, read_records, records, table_rows,
+                    changed_fraction=changed_fraction, scan_seconds=scan_seconds)
+        print(f"✅ {file_name} completed in {file_time:.2f}s ({record_count_to_sync:,} records)", flush=True)
         return True
         
     except Exception as e:
-        print(f"❌ Error processing {file_name}: {e}")
+        print(f"❌ Error processing {job.spec.file_name}: {e}", flush=True)
         import traceback
         traceback.print_exc()
+        # The table may hold part of this run; reload it in full next time
+        if tail_plan is not None:
+            clear_watermark(run.table_name)
+        if block_plan is not None:
+            clear_block_state(run.table_name)
+        if run is not None:
+            clear_manifest_entry(run.table_name)
         return False
 
 
+def sync_changed_blocks(file_name, directory_name, structure_info, key_fields, block_plan, changes):
+    """
+    Replace the rows of the changed blocks of an incremental block plan; `changes` are the
+    block_sync.iter_block_changes items read for it. Returns the number of rows inserted, or
+    None if the table did not hold the rows the changed blocks had before; nothing is changed
+    then and the caller reloads the table in full.
+    """
+    if not block_plan.changed:
+        print(f"✅ No changed blocks, table is up to date", flush=True)
+        return 0
+    
+    print(f"💾 Syncing records to database (replacing rows by {', '.join(key_fields)})...", flush=True)
+    replaced = replace_rows_by_key(file_name, structure_info['structure'], directory_name, key_fields, changes,
+                                   expected_deleted=block_plan.expected_deleted)
+    if replaced is None:
+        return None
+    deleted, inserted = replaced
+    print(f"🔁 Replaced {deleted:,} rows with {inserted:,} rows", flush=True)
+    return inserted
+
+
+def get_table_filter(spec):
+    """Compiled row filter of a table from tables.json / FILTER_<NAME>, or None"""
+    text = spec.filter
+    if not text or not text.strip():
+        return None
+    return parse_filter(text, spec.params, name=spec.name)
+
+
+def sync_icgroup_only():
+    """
+    Sync only icgroup.dbf from UBSSTK2015 directory to local MySQL
+    Creates/updates the ubs_ubsstk2015_icgroup table
+    """
+    return sync_all(only=["icgroup"]).get("icgroup", "failed") != "failed"
+
+
+def sync_table(spec):
+    """
+    Sync one table_manifest.TableSpec on this thread (watch and scheduled mode); an
+    unchanged file is skipped as in sync_all. Returns how the DBF was read, "failed",
+    or None if it does not exist.
+    """
+    start = time.time()
+    if os.path.exists(spec.path):
+        print(f"📁 Processing {spec.file_name}...", flush=True)
+    job = prepare_job(spec, prepare_table, read_ahead)
+    if job.table is None and job.error is None:
+        return None  # file not found
+    if not load_table(job):
+        return "failed"
+    if not job.table.skipped:
+        print(f"🔄 {spec.name} synced ({job.table.read_mode}) in {time.time() - start:.2f}s", flush=True)
+    return job.table.read_mode
+
+
+def sync_tables(tables):
+    """Sync tables one after another on this thread, for watch mode"""
+    for spec in tables:
+        sync_table(spec)
+
+
+def watch():
+    """
+    Keep running and sync each table of tables.json shortly after UBS writes its DBF
+    (python main.py --watch, see watch_mode.py). Stop with Ctrl+C.
+    """
+    create_sync_logs_table()
+    try:
+        watch_files({spec.path: spec for spec in get_tables().values()}, sync_tables)
+    finally:
+        pool = mysql_pool.get_pool()
+        if pool.opened:
+            pool.close_all()
+
+
+def schedule():
+    """
+    Keep syncing each table of tables.json at its "every" interval, the most urgent first,
+    on SYNC_WORKERS workers (python main.py --schedule, see table_scheduler.py). Stop with Ctrl+C.
+    """
+    tables = [spec for spec in get_tables().values() if os.path.exists(spec.path)]
+    workers = resolve_sync_workers()
+    scheduler = RecurringScheduler(sync_table, workers, name=lambda spec: spec.name,
+                                   schedule=lambda spec: (spec.every, spec.priority),
+                                   dependencies={spec.name: spec.depends_on for spec in tables})
+    stop = threading.Event()
+
+    def report():
+        while not stop.wait(SCHEDULE_REPORT_MINUTES * 60):
+            print(f"📈 Workers busy {scheduler.busy_share():.1%} of the time since the start", flush=True)
+            for line in scheduler.describe():
+                print(f"   {line}", flush=True)
+
+    create_sync_logs_table()
+    print(f"⏰ Scheduled sync of {len(tables)} tables on {workers} workers", flush=True)
+    if SCHEDULE_REPORT_MINUTES > 0:
+        threading.Thread(target=report, name="schedule-report", daemon=True).start()
+    try:
+        scheduler.run(tables, stop)
+    except KeyboardInterrupt:
+        print("\n🛑 Scheduled sync stopped", flush=True)
+    finally:
+        stop.set()
+        for line in scheduler.describe():
+            print(f"   {line}", flush=True)
+        pool = mysql_pool.get_pool()
+        if pool.opened:
+            pool.close_all()
+
+
+def rollback_table(table_name):
+    """
+    Put the previous generation of a MySQL table back (python main.py --rollback <table>).
+    Its sync state is dropped, so the next sync reloads it in full.
+    """
+    rollback_table_swap(table_name)
+    clear_watermark(table_name)
+    clear_block_state(table_name)
+    clear_manifest_entry(table_name)
+
+
+def migrate_schema(names=None):
+    """
+    ALTER the existing MySQL tables of tables.json to the column types of table_schema.py
+    (python main.py --migrate-schema [table ...]; a table is its name or its DBF name).
+    """
+    if os.getenv("DB_TYPE", "mysql") != "mysql":
+        print("⚠️  --migrate-schema only applies to MySQL (DB_TYPE=mysql)", flush=True)
+        return
+    wanted = {name.lower() for name in names or []}
+    connection, _, _ = connect_database("mysql")
+    cursor = connection.cursor()
+    try:
+        for spec in get_tables().values():
+            table_name = spec.table_name
+            if wanted and not wanted & {table_name, spec.name}:
+                continue
+            if not os.path.exists(spec.path) or count_table_rows(table_name) is None:
+                print(f"⚠️  Skipping {table_name}: DBF or table missing", flush=True)
+                continue
+            structures = read_dbf_structure(spec.path)['structure']
+            if not migrate_mysql_table(cursor, table_name, structures):
+                print(f"✅ {table_name} already has the current column types", flush=True)
+            connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) == 3 and sys.argv[1] == "--rollback":
+        rollback_table(sys.argv[2])
+    elif len(sys.argv) >= 2 and sys.argv[1] == "--migrate-schema":
+        migrate_schema(sys.argv[2:])
+    elif len(sys.argv) == 2 and sys.argv[1] == "--watch":
+        watch()
+    elif len(sys.argv) == 2 and sys.argv[1] == "--schedule":
+        schedule()
+    else:
+        # --force reads every DBF, also those unchanged since their last load
+        main(force="--force" in sys.argv[1:])
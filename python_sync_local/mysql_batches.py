@@ -0,0 +1,158 @@
+"""
+Packet-aware multi-row INSERTs for MySQL.
+
+mysql.connector sends an executemany of `INSERT ... VALUES (...)` as one
+multi-row INSERT statement, so every executemany call has to fit in the
+server's max_allowed_packet. InsertBatcher groups rows into statements by
+their estimated encoded size (the limit is read once per connection) and by a
+row target that follows how long each statement + commit takes:
+
+    statement + commit faster than TARGET / 2   rows per statement doubled
+    statement + commit slower than TARGET       rows per statement halved
+
+Rows are never cut down to fit a packet. A single row larger than the packet
+is an error naming max_allowed_packet, instead of silently losing text.
+"""
+
+import os
+import re
+import time
+
+import numpy as np
+
+# Seconds one INSERT statement + commit should take; the rows per statement adapt towards it
+COMMIT_TARGET_SECONDS = float(os.getenv("MYSQL_COMMIT_TARGET_SECONDS", "1.0"))
+START_ROWS = 1000
+MIN_ROWS = 100
+MAX_ROWS = 50000
+# Share of max_allowed_packet a statement may use (the size estimate is close, not exact)
+PACKET_FILL = 0.8
+# Bytes a value takes at most as SQL text, for column kinds with a fixed upper bound
+_FIXED_WIDTHS = {'b': 5, 'i': 21, 'u': 21, 'f': 25, 'M': 30}
+# Characters the connector escapes with a backslash
+_ESCAPED = re.compile(r"[\\'\"\n\r\x00\x1a]")
+
+
+def read_max_allowed_packet(cursor):
+    """The session's max_allowed_packet in bytes"""
+    cursor.execute("SELECT @@SESSION.max_allowed_packet")
+    return int(cursor.fetchone()[0])
+
+
+def encoded_rows(batch, names, transforms=None):
+    """
+    (row tuples, int64 array of estimated bytes per row as INSERT text) for a RecordBatch.
+    Strings are measured as UTF-8 plus quotes and escapes, other values by their widest text.
+    """
+    columns = []
+    sizes = np.full(len(batch), 2 + len(names), dtype=np.int64)  # "(", ")" and the commas
+    for name in names:
+        values = batch.column_values(name)
+        if transforms and name in transforms:
+            values = transforms[name](values)
+        columns.append(values)
+        kind = batch.columns[name].dtype.kind if name in batch.columns else 'O'
+        width = _FIXED_WIDTHS.get(kind)
+        if width is not None:
+            sizes += width
+            continue
+        distinct = {value: _value_bytes(value) for value in dict.fromkeys(values)}
+        sizes += np.fromiter(map(distinct.__getitem__, values), dtype=np.int64, count=len(values))
+    return list(zip(*columns)), sizes
+
+
+def _value_bytes(value):
+    if value is None:
+        return 4
+    if isinstance(value, bytes):
+        return 2 * len(value) + 3
+    text = value if isinstance(value, str) else str(value)
+    return len(text.encode('utf-8', 'surrogatepass')) + len(_ESCAPED.findall(text)) + 2
+
+
+class InsertBatcher:
+    """
+    Collects rows from RecordBatches and sends them as multi-row INSERTs sized to the packet.
+
+        batcher = InsertBatcher(cursor, connection, insert_sql, names, transforms)
+        for batch in batches:
+            batcher.add(batch)
+        batcher.finish()
+
+    Each statement is followed by a commit. `on_flush(rows_so_far)` is called after each one.
+    """
+
+    def __init__(self, cursor, connection, insert_sql, names, transforms=None, max_packet=None, on_flush=None):
+        self.cursor = cursor
+        self.connection = connection
+        self.insert_sql = insert_sql
+        self.names = names
+        self.transforms = transforms
+        self.max_packet = max_packet or read_max_allowed_packet(cursor)
+        self.budget = int(self.max_packet * PACKET_FILL) - len(insert_sql.encode('utf-8'))
+        self.on_flush = on_flush
+        self.target_rows = START_ROWS
+        self.rows = 0
+        self.statements = 0
+        self.largest_statement = 0
+        self._pending = []
+        self._pending_sizes = []
+        self._pending_bytes = 0
+
+    def add(self, batch):
+        """Queue a batch's rows, sending every full statement"""
+        if not len(batch):
+            return
+        rows, sizes = encoded_rows(batch, self.names, self.transforms)
+        too_large = np.flatnonzero(sizes > self.budget)
+        if len(too_large):
+            index = int(too_large[0])
+            raise ValueError(f"A row of about {int(sizes[index]):,} bytes does not fit in max_allowed_packet "
+                             f"({self.max_packet:,} bytes); raise max_allowed_packet on the MySQL server")
+        self._pending.extend(rows)
+        self._pending_sizes.extend(sizes.tolist())
+        self._pending_bytes += int(sizes.sum())
+        while len(self._pending) >= self.target_rows or self._pending_bytes > self.budget:
+            self._flush()
+
+    def finish(self):
+        """Send what is left; returns the number of rows inserted"""
+        while self._pending:
+            self._flush()
+        return self.rows
+
+    def _flush(self):
+        # As many pending rows as fit both the row target and the byte budget
+        limit = min(self.target_rows, len(self._pending))
+        cumulative = np.cumsum(self._pending_sizes[:limit])
+        count = max(1, int(np.searchsorted(cumulative, self.budget, side='right')))
+        statement_bytes = int(cumulative[count - 1])
+        rows = self._pending[:count]
+        del self._pending[:count]
+        del self._pending_sizes[:count]
+        self._pending_bytes -= statement_bytes
+
+        start = time.time()
+        self.cursor.executemany(self.insert_sql, rows)
+        self.connection.commit()
+        self._adapt(time.time() - start, count)
+
+        self.rows += count
+        self.statements += 1
+        self.largest_statement = max(self.largest_statement, statement_bytes)
+        if self.on_flush is not None:
+            self.on_flush(self.rows)
+
+    def _adapt(self, elapsed, count):
+        # Only full statements say something about the row target
+        if count < self.target_rows:
+            return
+        if elapsed < COMMIT_TARGET_SECONDS / 2:
+            self.target_rows = min(MAX_ROWS, self.target_rows * 2)
+        elif elapsed > COMMIT_TARGET_SECONDS:
+            self.target_rows = max(MIN_ROWS, self.target_rows // 2)
+
+    def describe(self):
+        return (f"{self.rows:,} rows in {self.statements:,} INSERT statements "
+                f"(largest ~{self.largest_statement / 1024:,.0f} KB of {self.max_packet / (1024 * 1024):,.0f} MB "
+                f"max_allowed_packet, {self.target_rows:,} rows per statement at the end)")
@@ -0,0 +1,209 @@
+"""
+One pool of MySQL connections for a whole sync run.
+
+Every loader used to open its own connection, run four SET SESSION statements
+and close it again, several times per table. connect() hands out pooled
+connections instead:
+
+    - session settings are applied once, when a connection is opened
+    - an idle connection is pinged before it is handed out again; one that
+      fails is dropped and a new one opened
+    - close() on a pooled connection gives it back: an open transaction is
+      rolled back and unread results are discarded first
+    - bulk=True connections (LOAD DATA LOCAL streaming, NO_AUTO_VALUE_ON_ZERO)
+      are pooled separately from the ordinary ones
+    - relax_checks() turns unique_checks / foreign_key_checks off for a bulk
+      load; they are turned back on when the connection is given back
+
+stats() / describe() report how many connections were opened and reused for
+the run summary.
+"""
+
+import os
+import threading
+
+import mysql.connector
+
+# Idle connections kept per kind; more can be open at once, the extra ones are closed when given back
+POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "4"))
+SESSION_SETTINGS = (
+    "SET SESSION wait_timeout = 28800, interactive_timeout = 28800, "  # 8 hours
+    "net_read_timeout = 600, net_write_timeout = 600"  # 10 minutes
+)
+
+
+class PooledConnection:
+    """A pooled mysql.connector connection; close() gives it back to the pool instead of disconnecting"""
+
+    def __init__(self, pool, raw, bulk):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_raw', raw)
+        object.__setattr__(self, '_bulk', bulk)
+        object.__setattr__(self, '_released', False)
+        object.__setattr__(self, '_relaxed', False)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._raw, name, value)
+        if name == 'autocommit':
+            with self._pool._lock:
+                self._pool._autocommit[id(self._raw)] = value
+
+    def relax_checks(self):
+        """unique_checks and foreign_key_checks off until the connection is given back"""
+        cursor = self._raw.cursor()
+        try:
+            cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        finally:
+            cursor.close()
+        object.__setattr__(self, '_relaxed', True)
+
+    def close(self):
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            self._pool.release(self._raw, self._bulk, relaxed=self._relaxed)
+
+    def discard(self):
+        """Disconnect instead of giving the connection back (e.g. after a failure mid-protocol)"""
+        if not self._released:
+            object.__setattr__(self, '_released', True)
+            self._pool.release(self._raw, self._bulk, discard=True)
+
+
+class MySQLConnectionPool:
+    """Thread-safe pool of connections to the database in DB_HOST / DB_NAME"""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = {False: [], True: []}
+        self._autocommit = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.dropped = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def connect(self, autocommit=False, bulk=False):
+        """A connection with the given autocommit mode; close() it to give it back"""
+        raw = None
+        while raw is None:
+            with self._lock:
+                candidate = self._idle[bulk].pop() if self._idle[bulk] else None
+            if candidate is None:
+                raw = self._open(bulk)
+                with self._lock:
+                    self.opened += 1
+            elif self._healthy(candidate):
+                raw = candidate
+                with self._lock:
+                    self.reused += 1
+            else:
+                self._discard(candidate)
+                with self._lock:
+                    self.dropped += 1
+        # Tables load on several threads; the connection is this thread's now, the mode map is shared
+        with self._lock:
+            current = self._autocommit.get(id(raw))
+        if current != autocommit:
+            raw.autocommit = autocommit
+        with self._lock:
+            self._autocommit[id(raw)] = autocommit
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return PooledConnection(self, raw, bulk)
+
+    def release(self, raw, bulk, discard=False, relaxed=False):
+        with self._lock:
+            self.in_use -= 1
+        if discard:
+            self._discard(raw)
+            return
+        try:
+            if getattr(raw, 'infile_stream', None) is not None:
+                raw.infile_stream = None
+            if raw.unread_result:
+                raw.consume_results()
+            if raw.in_transaction:
+                raw.rollback()
+            if relaxed:
+                cursor = raw.cursor()
+                cursor.execute("SET SESSION unique_checks = 1, foreign_key_checks = 1")
+                cursor.close()
+        except mysql.connector.Error:
+            self._discard(raw)
+            return
+        with self._lock:
+            if len(self._idle[bulk]) < self.size:
+                self._idle[bulk].append(raw)
+                return
+        self._discard(raw)
+
+    def close_all(self):
+        """Disconnect every idle connection, e.g. at the end of a run"""
+        with self._lock:
+            idle = self._idle[False] + self._idle[True]
+            self._idle = {False: [], True: []}
+        for raw in idle:
+            self._discard(raw)
+
+    def stats(self):
+        return {"opened": self.opened, "reused": self.reused, "dropped": self.dropped,
+                "in_use": self.in_use, "peak_in_use": self.peak_in_use}
+
+    def describe(self):
+        return (f"{self.opened:,} opened, {self.reused:,} reused, {self.dropped:,} dropped after a failed "
+                f"health check, at most {self.peak_in_use:,} in use at once")
+
+    def _open(self, bulk):
+        settings = dict(
+            host=os.getenv("DB_HOST", "localhost"),
+            user=os.getenv("DB_USER", "root"),
+            password=os.getenv("DB_PASSWORD", ""),
+            database=os.getenv("DB_NAME", "your_database"),
+            use_unicode=True,
+            charset='utf8mb4',
+            connection_timeout=60,
+        )
+        if bulk:
+            from ultra_fast_import import MYSQL_LOCAL_INFILE, StreamingInfileConnection
+            raw = StreamingInfileConnection(sql_mode='NO_AUTO_VALUE_ON_ZERO',
+                                            allow_local_infile=MYSQL_LOCAL_INFILE, **settings)
+        else:
+            raw = mysql.connector.connect(**settings)
+        cursor = raw.cursor()
+        try:
+            cursor.execute(SESSION_SETTINGS)
+        finally:
+            cursor.close()
+        with self._lock:
+            self._autocommit[id(raw)] = False  # the connector's default
+        return raw
+
+    def _healthy(self, raw):
+        try:
+            return raw.is_connected()
+        except mysql.connector.Error:
+            return False
+
+    def _discard(self, raw):
+        with self._lock:
+            self._autocommit.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+_pool = MySQLConnectionPool()
+
+
+def connect(autocommit=False, bulk=False):
+    """Pooled connection to the configured MySQL database (see MySQLConnectionPool.connect)"""
+    return _pool.connect(autocommit=autocommit, bulk=bulk)
+
+
+def get_pool():
+    return _pool
@@ -0,0 +1,220 @@
+"""
+Parallel decoding of one DBF file by record-range sharding.
+
+DBF records are fixed length, so a file splits into record ranges that worker
+processes decode independently, each with its own DBFReader on the same file.
+Results come back through shared memory slots owned by the parent instead of
+pickled rows:
+
+    int / float / date / bool columns   raw array bytes
+    string columns                      int32 codes + the distinct values as one UTF-8 blob
+
+The parent rebuilds each shard into a RecordBatch and yields them in record
+order, so the output is identical to DBFReader.iter_batches.
+"""
+
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from dbf_reader import DBFReader
+from record_batch import RecordBatch
+from row_filters import add_filter_counters, filter_counters
+
+# Worker processes for read_dbf / read_dbf_iter: a number, "auto" (one per CPU) or 1 for serial
+DBF_WORKERS = os.getenv("DBF_WORKERS", "1")
+# Files smaller than this are read serially; starting the pool would cost more than it saves
+PARALLEL_MIN_RECORDS = 50000
+# Shared memory slots per worker; bounds how many decoded shards can be in flight
+SLOTS_PER_WORKER = 2
+_ALIGN = 8
+
+_worker_reader = None
+_worker_filter = None
+
+
+def resolve_workers(workers=None):
+    """Worker count from the argument or DBF_WORKERS ("auto" = CPU count), at least 1"""
+    value = DBF_WORKERS if workers is None else workers
+    if str(value).strip().lower() == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        print(f"⚠️  Invalid DBF_WORKERS value {value!r}, reading serially", flush=True)
+        return 1
+
+
+def iter_batches_parallel(reader, workers, batch_size, row_filter=None, start=0, stop=None):
+    """
+    Yield RecordBatches for records [start, stop) of the open DBFReader `reader`, decoded
+    by `workers` processes in shards of `batch_size` records. `row_filter` is applied in
+    the workers; its skip counters are merged back into this process's filter object.
+    """
+    if stop is None or stop > reader.record_count:
+        stop = reader.record_count
+    shards = [(shard_start, min(shard_start + batch_size, stop))
+              for shard_start in range(start, stop, batch_size)]
+    if not shards:
+        return
+
+    slot_size = _slot_size(reader, batch_size)
+    slots = []
+    try:
+        for _ in range(min(len(shards), workers * SLOTS_PER_WORKER)):
+            slots.append(shared_memory.SharedMemory(create=True, size=slot_size))
+        free = collections.deque(slots)
+        pending = collections.deque()
+        next_shard = 0
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(reader.path, reader.encoding, row_filter)) as pool:
+            try:
+                while pending or next_shard < len(shards):
+                    while free and next_shard < len(shards):
+                        slot = free.popleft()
+                        shard_start, shard_stop = shards[next_shard]
+                        pending.append((pool.submit(_decode_shard, shard_start, shard_stop, slot.name, slot.size), slot))
+                        next_shard += 1
+
+                    future, slot = pending.popleft()
+                    result = future.result()
+                    batch = _unpack_batch(reader.fields, result, slot.buf)
+                    free.append(slot)
+                    add_filter_counters(row_filter, result['counters'])
+                    if len(batch):
+                        yield batch
+            finally:
+                for future, _ in pending:
+                    future.cancel()
+    finally:
+        for slot in slots:
+            slot.close()
+            slot.unlink()
+
+
+def _slot_size(reader, batch_size):
+    """Shared memory bytes for one shard; string columns assume mostly single-byte text"""
+    per_row = 0
+    for field in reader.fields:
+        # value (8) or code (4) + text, plus the null mask byte
+        per_row += 9 + (field['size'] if field['type'] not in ('N', 'F', 'D', 'L', 'T', 'I', 'B') else 0)
+    return batch_size * per_row + len(reader.fields) * 4 * _ALIGN
+
+
+def _init_worker(path, encoding, row_filter):
+    global _worker_reader, _worker_filter
+    _worker_reader = DBFReader(path, encoding)
+    _worker_filter = row_filter
+
+
+def _decode_shard(start, stop, slot_name, slot_size):
+    before = filter_counters(_worker_filter)
+    batch = _worker_reader.read_batch(start, stop, _worker_filter)
+    counters = [after - previous for after, previous in zip(filter_counters(_worker_filter), before)]
+
+    slot = shared_memory.SharedMemory(name=slot_name)
+    try:
+        layout, inline = _pack_batch(batch, slot.buf, slot_size)
+    finally:
+        slot.close()
+    return {'length': len(batch), 'layout': layout, 'inline': inline, 'counters': counters}
+
+
+class _SlotWriter:
+    """Appends aligned arrays to a shared memory buffer; callers check fits() before write()"""
+
+    def __init__(self, buffer, size):
+        self.buffer = buffer
+        self.size = size
+        self.offset = 0
+
+    def fits(self, nbytes):
+        return self.offset + nbytes + _ALIGN <= self.size
+
+    def write(self, array):
+        array = np.ascontiguousarray(array)
+        offset = self.offset
+        target = np.ndarray(array.shape, dtype=array.dtype, buffer=self.buffer, offset=offset)
+        target[...] = array
+        self.offset = offset + array.nbytes
+        self.offset += -self.offset % _ALIGN
+        return (array.dtype.str, offset, len(array))
+
+
+def _pack_batch(batch, buffer, size):
+    """
+    Write the batch's columns into `buffer`. Returns (layout, inline): layout describes
+    what is in shared memory, inline holds columns sent back pickled instead (mixed
+    object columns such as binary memos or oversized ints, or anything that did not fit).
+    """
+    writer = _SlotWriter(buffer, size)
+    layout = []
+    inline = {}
+    for name, values in batch.columns.items():
+        mask = batch.nulls[name]
+        if values.dtype != object:
+            if writer.fits(values.nbytes + mask.nbytes):
+                layout.append((name, 'array', writer.write(values), writer.write(mask)))
+                continue
+        else:
+            encoded = _dictionary_encode(values)
+            if encoded is not None:
+                codes, offsets, blob = encoded
+                if writer.fits(codes.nbytes + offsets.nbytes + blob.nbytes + mask.nbytes + 3 * _ALIGN):
+                    layout.append((name, 'dictionary', writer.write(codes), writer.write(offsets),
+                                   writer.write(blob), writer.write(mask)))
+                    continue
+        inline[name] = (values, mask)
+    return layout, inline
+
+
+def _dictionary_encode(values):
+    """Object column of str/None -> (int32 codes, -1 = None; int64 end offsets; uint8 UTF-8 blob)"""
+    index = {}
+    codes = np.fromiter(
+        (-1 if value is None else index.setdefault(value, len(index)) for value in values.tolist()),
+        dtype=np.int32, count=len(values),
+    )
+    if not all(type(value) is str for value in index):
+        return None
+    encoded = [value.encode('utf-8', 'surrogatepass') for value in index]
+    offsets = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return codes, offsets, blob
+
+
+def _read_array(buffer, entry):
+    dtype, offset, count = entry
+    return np.ndarray((count,), dtype=np.dtype(dtype), buffer=buffer, offset=offset).copy()
+
+
+def _unpack_batch(structure, result, buffer):
+    columns = {}
+    nulls = {}
+    for entry in result['layout']:
+        name, kind = entry[0], entry[1]
+        if kind == 'array':
+            columns[name] = _read_array(buffer, entry[2])
+            nulls[name] = _read_array(buffer, entry[3])
+            continue
+        codes = _read_array(buffer, entry[2])
+        offsets = _read_array(buffer, entry[3]).tolist()
+        blob = _read_array(buffer, entry[4]).tobytes()
+        # Last slot is None so code -1 picks it
+        table = np.empty(len(offsets) + 1, dtype=object)
+        table[:-1] = [blob[begin:end].decode('utf-8', 'surrogatepass')
+                      for begin, end in zip([0] + offsets[:-1], offsets)]
+        table[-1] = None
+        columns[name] = table[codes]
+        nulls[name] = _read_array(buffer, entry[5])
+    for name, (values, mask) in result['inline'].items():
+        columns[name] = values
+        nulls[name] = mask
+    # Keep the reader's column order
+    order = [field['name'] for field in structure]
+    return RecordBatch(structure, {name: columns[name] for name in order},
+                       {name: nulls[name] for name in order}, result['length'])
@@ -0,0 +1,289 @@
+"""
+Reader / loader pipeline for sync_all: decode the next DBFs while the current one loads.
+
+One reader thread prepares the tables in order (structure, sync plans) and
+decodes their batches into per-table queues; the loader (the calling thread)
+takes the tables in the same order and loads each from its queue. Reading is
+mostly CPU (NumPy, the decoder processes) and loading mostly waits on the
+database, so the two overlap and a run takes about max(read, load) instead of
+their sum.
+
+    - Tables are still loaded one at a time, in order, and a table's sync
+      state is only saved after its own load; the reader only runs ahead.
+    - Decoded batches waiting in the queues are limited to READ_AHEAD_MB;
+      the reader blocks until the loader has taken enough of them.
+    - What the reader prints for a table is held back until the loader
+      starts that table, so the output reads table by table as before.
+
+PIPELINE=0 prepares and reads each table right before loading it.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+
+PIPELINE = os.getenv("PIPELINE", "1").strip().lower() not in ("0", "false", "no")
+# Decoded batches the reader may hold ahead of the loader
+READ_AHEAD_MB = float(os.getenv("PIPELINE_READ_AHEAD_MB", "256"))
+
+_END = object()
+
+
+class MemoryBudget:
+    """Blocking byte budget; one item larger than the whole budget is let through when nothing is held"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, nbytes, cancelled=lambda: False):
+        with self._condition:
+            while self.used and self.used + nbytes > self.limit and not cancelled():
+                self._condition.wait(0.5)
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+
+    def release(self, nbytes):
+        with self._condition:
+            self.used -= nbytes
+            self._condition.notify_all()
+
+
+def item_nbytes(item):
+    """Approximate memory of a RecordBatch or a (keys, RecordBatch) pair from block_sync"""
+    if isinstance(item, tuple):
+        keys, batch = item
+        return 64 * len(keys) + item_nbytes(batch)
+    return item.approx_nbytes()
+
+
+class PrefetchedStream:
+    """Iterator over the batches the reader decoded for one table; close() drops what was not taken"""
+
+    def __init__(self, budget, stop):
+        self._budget = budget
+        self._stop = stop
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.closed = False
+        # Seconds the loader spent waiting for the reader
+        self.waited = 0.0
+
+    def put(self, item):
+        """Queue an item once the budget allows; False if the stream was closed or the pipeline stopped"""
+        nbytes = item_nbytes(item)
+        self._budget.acquire(nbytes, lambda: self.closed or self._stop.is_set())
+        with self._lock:
+            if not self.closed and not self._stop.is_set():
+                self._queue.put((item, nbytes))
+                return True
+        self._budget.release(nbytes)
+        return False
+
+    def finish(self, error=None):
+        self._queue.put((_END, error))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        start = time.time()
+        item, extra = self._queue.get()
+        self.waited += time.time() - start
+        if item is _END:
+            self.closed = True
+            if extra is not None:
+                raise extra
+            raise StopIteration
+        self._budget.release(extra)
+        return item
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            while True:
+                try:
+                    item, extra = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                if item is not _END:
+                    self._budget.release(extra)
+
+
+class PipelineJob:
+    """
+    A table going through the pipeline: whatever `prepare` returned (or the error it raised),
+    the output the reader printed for it and its batch stream (None if nothing was read ahead).
+    """
+
+    def __init__(self, spec, pipeline=None):
+        self.spec = spec
+        self.table = None
+        self.error = None
+        self.stream = None
+        self.output = []
+        self.live = pipeline is None
+        self._pipeline = pipeline
+
+    def start(self):
+        """Print what the reader held back for this table; call before loading it"""
+        if self._pipeline is not None:
+            self._pipeline._go_live(self)
+
+
+def prepare_job(spec, prepare, read):
+    """A PipelineJob prepared on the calling thread, its stream read as it is iterated"""
+    job = PipelineJob(spec)
+    try:
+        job.table = prepare(spec)
+        source = read(job.table)
+        job.stream = iter(source) if source is not None else None
+    except Exception as e:
+        job.error = e
+    return job
+
+
+class _RoutedOutput:
+    """stdout replacement holding back the reader thread's output for tables the loader has not reached"""
+
+    def __init__(self, target, pipeline):
+        self._target = target
+        self._pipeline = pipeline
+
+    def write(self, text):
+        job = self._pipeline._current_job
+        if threading.current_thread() is self._pipeline._thread and job is not None:
+            with self._pipeline._output_lock:
+                if not job.live:
+                    job.output.append(text)
+                    return len(text)
+        return self._target.write(text)
+
+    def flush(self):
+        self._target.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+
+class TablePipeline:
+    """
+    Runs `prepare(spec)` and then `read(table)` for each spec on a reader thread, ahead of the caller.
+
+    prepare(spec) -> table object (anything), or raises
+    read(table)   -> iterable of batches to decode ahead, or None when nothing is to be read
+
+    Iterating over run(specs) yields PipelineJobs in spec order; call job.start() before loading
+    it and use job.stream as the table's batches. Streams are closed when the caller moves on.
+    """
+
+    def __init__(self, prepare, read, enabled=None, read_ahead_mb=None):
+        self.prepare = prepare
+        self.read = read
+        self.enabled = PIPELINE if enabled is None else enabled
+        self.budget = MemoryBudget(int((READ_AHEAD_MB if read_ahead_mb is None else read_ahead_mb) * 1024 * 1024))
+        self.read_seconds = 0.0
+        self.load_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._jobs = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._current_job = None
+        self._output_lock = threading.Lock()
+        self._stdout = None
+
+    def run(self, specs):
+        if not self.enabled:
+            yield from self._run_serial(specs)
+            return
+        self._stdout = sys.stdout
+        sys.stdout = _RoutedOutput(self._stdout, self)
+        self._thread = threading.Thread(target=self._reader, args=(list(specs),), name="dbf-reader", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is _END:
+                    return
+                load_start = time.time()
+                try:
+                    yield job
+                finally:
+                    if job.stream is not None:
+                        job.stream.close()
+                        self.wait_seconds += job.stream.waited
+                    self.load_seconds += time.time() - load_start
+        finally:
+            self._stop.set()
+            self._thread.join()
+            sys.stdout = self._stdout
+
+    def describe(self):
+        return (f"reading {self.read_seconds:.2f}s, loading {self.load_seconds - self.wait_seconds:.2f}s "
+                f"(+{self.wait_seconds:.2f}s waiting for batches), "
+                f"at most {self.budget.peak / (1024 * 1024):,.1f} MB read ahead")
+
+    def _run_serial(self, specs):
+        for spec in specs:
+            start = time.time()
+            job = prepare_job(spec, self.prepare, self.read)
+            self.read_seconds += time.time() - start
+            yield job
+
+    def _go_live(self, job):
+        with self._output_lock:
+            text = "".join(job.output)
+            job.output = []
+            job.live = True
+        if text:
+            self._stdout.write(text)
+            self._stdout.flush()
+
+    def _reader(self, specs):
+        try:
+            for spec in specs:
+                if self._stop.is_set():
+                    return
+                job = PipelineJob(spec, self)
+                self._current_job = job
+                start = time.time()
+                try:
+                    job.table = self.prepare(spec)
+                    source = self.read(job.table)
+                except Exception as e:
+                    job.error = e
+                    source = None
+                if source is not None:
+                    job.stream = PrefetchedStream(self.budget, self._stop)
+                self.read_seconds += time.time() - start
+                self._jobs.put(job)
+                if source is not None:
+                    self._fill(job.stream, source)
+        finally:
+            self._current_job = None
+            self._jobs.put(_END)
+
+    def _fill(self, stream, source):
+        # Only time spent decoding counts as read time, not waiting for the budget
+        error = None
+        source = iter(source)
+        try:
+            while not self._stop.is_set():
+                start = time.time()
+                item = next(source, _END)
+                self.read_seconds += time.time() - start
+                if item is _END or not stream.put(item):
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+        stream.finish(error)
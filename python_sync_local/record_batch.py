@@ -0,0 +1,287 @@
+"""
+Columnar record batches - the interchange format between the DBF reader,
+filters and loaders.
+
+A RecordBatch holds one NumPy array per DBF field plus a null mask per field:
+
+    N (no decimals)  int64           C / M / other  object (interned str or None)
+    N / F            float64         L              bool
+    D                datetime64[D]   T              datetime64[ms]
+
+Loaders pull whole columns out with column_values() / row_tuples(), which
+return the same Python values read_dbf has always produced (ISO date strings,
+int/float numerics, stripped strings), so the SQL written does not change.
+"""
+
+import datetime
+
+import numpy as np
+
+# Priority order used by the SKIP_BEFORE_DATE filter (same as should_skip_record_by_date)
+DATE_FIELD_PRIORITY = ['DATE', 'SODATE', 'EXPDATE', 'GSTDATE', 'CR_AP_DATE', 'DUEDATE', 'UPDATED_ON', 'CREATED_ON']
+
+
+class RecordBatch:
+    """
+    A batch of DBF records stored column-wise.
+
+    structure: list of {"name", "type", "size", "decs"} field dicts (read_dbf's "structure")
+    columns:   {field name: np.ndarray}
+    nulls:     {field name: bool np.ndarray, True where the value is NULL}
+    """
+
+    __slots__ = ('structure', 'columns', 'nulls', 'length')
+
+    def __init__(self, structure, columns, nulls, length=None):
+        self.structure = structure
+        self.columns = columns
+        self.nulls = nulls
+        if length is None:
+            length = len(next(iter(columns.values()))) if columns else 0
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getstate__(self):
+        return (self.structure, self.columns, self.nulls, self.length)
+
+    def __setstate__(self, state):
+        self.structure, self.columns, self.nulls, self.length = state
+
+    def approx_nbytes(self):
+        """Rough memory use: array bytes, plus the field width for each value of object columns"""
+        widths = {field['name']: field.get('size') or 0 for field in self.structure}
+        total = 0
+        for name, values in self.columns.items():
+            total += values.nbytes + self.nulls[name].nbytes
+            if values.dtype == object:
+                total += self.length * (widths.get(name, 0) + 49)  # str header + text
+        return total
+
+    @property
+    def field_names(self):
+        return [field['name'] for field in self.structure]
+
+    @classmethod
+    def from_rows(cls, structure, rows):
+        """
+        Build a batch from read_dbf-style row dicts. Values are kept as-is in
+        object columns, so the round trip through column_values() is lossless.
+        """
+        columns = {}
+        nulls = {}
+        for field in structure:
+            name = field['name']
+            values = np.empty(len(rows), dtype=object)
+            values[:] = [row.get(name) for row in rows]
+            columns[name] = values
+            nulls[name] = np.equal(values, None)
+        return cls(structure, columns, nulls, len(rows))
+
+    @classmethod
+    def concat(cls, batches):
+        """Concatenate batches that share a structure"""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return None
+        if len(batches) == 1:
+            return batches[0]
+        first = batches[0]
+        columns = {}
+        nulls = {}
+        for name in first.columns:
+            arrays = [batch.columns[name] for batch in batches]
+            if len({array.dtype for array in arrays}) > 1:
+                arrays = [array.astype(object) for array in arrays]
+            columns[name] = np.concatenate(arrays)
+            nulls[name] = np.concatenate([batch.nulls[name] for batch in batches])
+        return cls(first.structure, columns, nulls, sum(len(batch) for batch in batches))
+
+    def filter(self, keep):
+        """Return a new batch with only the rows where `keep` (bool array) is True"""
+        if keep.all():
+            return self
+        return RecordBatch(
+            self.structure,
+            {name: values[keep] for name, values in self.columns.items()},
+            {name: mask[keep] for name, mask in self.nulls.items()},
+            int(np.count_nonzero(keep)),
+        )
+
+    def take(self, indices):
+        """Return a new batch with the rows at `indices` (int array), in that order"""
+        return RecordBatch(
+            self.structure,
+            {name: values[indices] for name, values in self.columns.items()},
+            {name: mask[indices] for name, mask in self.nulls.items()},
+            len(indices),
+        )
+
+    def slice(self, start, stop):
+        """Rows [start, stop) as a new batch (array views, no copy)"""
+        stop = min(stop, self.length)
+        if start == 0 and stop == self.length:
+            return self
+        return RecordBatch(
+            self.structure,
+            {name: values[start:stop] for name, values in self.columns.items()},
+            {name: mask[start:stop] for name, mask in self.nulls.items()},
+            max(0, stop - start),
+        )
+
+    def column_values(self, name):
+        """
+        Python list of the column's values in read_dbf's row format
+        (None for nulls, ISO strings for dates/timestamps).
+        """
+        values = self.columns.get(name)
+        if values is None:
+            return [None] * self.length
+        mask = self.nulls[name]
+        kind = values.dtype.kind
+
+        if kind == 'O':
+            return values.tolist()
+        if kind == 'M':
+            unit = np.datetime_data(values.dtype)[0]
+            if unit == 'D':
+                result = np.datetime_as_string(values, unit='D').tolist()
+            else:
+                result = np.datetime_as_string(values, unit='s').tolist()
+                # datetime.isoformat() only shows fractions when there are some
+                millis = values.astype('datetime64[ms]').astype(np.int64) % 1000
+                for index in np.flatnonzero((millis != 0) & ~mask):
+                    result[index] = values[index].astype('datetime64[us]').tolist().isoformat()
+        else:
+            result = values.tolist()
+
+        if mask.any():
+            for index in np.flatnonzero(mask):
+                result[index] = None
+        return result
+
+    def row_tuples(self, names, transforms=None):
+        """
+        List of value tuples in `names` order, ready for cursor.executemany.
+        `transforms` optionally maps a field name to a function applied to its value list.
+        """
+        columns = []
+        for name in names:
+            values = self.column_values(name)
+            if transforms and name in transforms:
+                values = transforms[name](values)
+            columns.append(values)
+        return list(zip(*columns))
+
+    def to_rows(self):
+        """Row dicts in read_dbf's format"""
+        names = self.field_names
+        columns = [self.column_values(name) for name in names]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def date_keys(self, name):
+        """
+        int64 array of YYYYMMDD for a date-like column, 0 where NULL or unparseable.
+        Works for D/T columns and for string columns holding YYYYMMDD / YYYY-MM-DD.
+        """
+        values = self.columns.get(name)
+        if values is None:
+            return np.zeros(self.length, dtype=np.int64)
+        mask = self.nulls[name]
+        if values.dtype.kind == 'M':
+            return datetime64_to_keys(values, mask)
+        return np.fromiter((date_key(value) for value in values.tolist()), dtype=np.int64, count=self.length)
+
+    def string_values(self, name):
+        """Column as an object array of stripped, upper-cased strings ('' for NULL)"""
+        values = self.columns.get(name)
+        if values is None:
+            return np.full(self.length, '', dtype=object)
+        cache = {}
+        result = np.empty(self.length, dtype=object)
+        for index, value in enumerate(values.tolist()):
+            normalized = cache.get(value)
+            if normalized is None:
+                normalized = '' if value is None else str(value).strip().upper()
+                cache[value] = normalized
+            result[index] = normalized
+        return result
+
+
+def datetime64_to_keys(values, mask=None):
+    """datetime64 array -> int64 YYYYMMDD array (0 for NaT / masked)"""
+    days = values.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    keys = ((years.astype(np.int64) + 1970) * 10000
+            + (months.astype(np.int64) % 12 + 1) * 100
+            + (days - months).astype(np.int64) + 1)
+    invalid = np.isnat(values)
+    if mask is not None:
+        invalid |= mask
+    keys[invalid] = 0
+    return keys
+
+
+def date_key(value):
+    """Scalar version of the date parsing in should_skip_record_by_date: value -> YYYYMMDD int or 0"""
+    if value is None:
+        return 0
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.year * 10000 + value.month * 100 + value.day
+    if isinstance(value, bytes):
+        value = value.decode('ascii', errors='ignore')
+    if isinstance(value, str):
+        text = value.strip()
+        if len(text) >= 8 and text[:8].isdigit():
+            return int(text[:8])
+        if '-' in text and len(text) >= 10:
+            parts = text[:10].split('-')
+            if len(parts) == 3 and ''.join(parts).isdigit():
+                return int(''.join(parts))
+    return 0
+
+
+def skip_mask_by_date(batch, cutoff_date_str, date_field_names=None):
+    """
+    Vectorized should_skip_record_by_date: bool array, True for rows to skip.
+
+    Fields are checked in priority order. A row is skipped as soon as a present
+    date field is before the cutoff; a present DATE field on/after the cutoff
+    keeps the row without looking further.
+    """
+    skip = np.zeros(len(batch), dtype=bool)
+    if not cutoff_date_str or not len(batch):
+        return skip
+    cutoff = int(cutoff_date_str)
+    decided = np.zeros(len(batch), dtype=bool)
+    for name in date_field_names or DATE_FIELD_PRIORITY:
+        if name not in batch.columns:
+            continue
+        keys = batch.date_keys(name)
+        present = keys > 0
+        below = present & (keys < cutoff)
+        skip |= below & ~decided
+        decided |= below
+        if name == 'DATE':
+            decided |= present
+    return skip
+
+
+class DateCutoffFilter:
+    """
+    SKIP_BEFORE_DATE as a row filter DBFReader applies to the raw record matrix:
+    only the date fields are decoded to decide, and skipped rows never get their
+    other columns decoded. Keeps a running count of skipped rows.
+    """
+
+    def __init__(self, cutoff_date_str, date_field_names=None):
+        self.cutoff_date_str = cutoff_date_str
+        self.field_names = list(date_field_names or DATE_FIELD_PRIORITY)
+        self.skipped = 0
+
+    def skip_mask(self, batch):
+        skip = skip_mask_by_date(batch, self.cutoff_date_str, self.field_names)
+        self.skipped += int(np.count_nonzero(skip))
+        return skip
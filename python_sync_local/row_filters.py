@@ -0,0 +1,387 @@
+"""
+Declarative row filters for DBF tables, evaluated inside the reader.
+
+A filter is one or more rules separated by ';' or new lines:
+
+    TYPE == 'INV' and DATE <= $ARTRAN_INV_CUTOFF -> drop
+
+Each rule is `<condition> -> drop|keep`. Conditions compare a field with a
+literal (== != < <= > >= or `in ('A', 'B')`) and combine with and / or / not
+and parentheses. $NAME is replaced by a parameter when the filter is compiled.
+Rules are checked in order and the first matching rule decides; rows that
+match no rule are kept.
+
+Comparisons run over whole RecordBatch columns:
+
+    D / T fields       as YYYYMMDD integers (20251212 or '2025-12-12')
+    N / F / I / B / Y  numerically
+    L fields           as booleans ('T', 'Y', 'TRUE', 1 / 'F', 'N', 'FALSE', 0)
+    anything else      stripped strings, case-insensitive
+
+A NULL value never matches a comparison (including !=), and as in SQL a
+comparison with NULL stays unmatched under `not` too.
+"""
+
+import re
+
+import numpy as np
+
+from record_batch import date_key
+
+DATE_TYPES = frozenset(['D', 'T'])
+NUMERIC_TYPES = frozenset(['N', 'F', 'I', 'B', 'Y'])
+LOGICAL_LITERALS = {'T': True, 'Y': True, 'TRUE': True, '1': True, 'F': False, 'N': False, 'FALSE': False, '0': False}
+ACTIONS = ('drop', 'keep')
+
+_TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<arrow>->)
+      | (?P<op>==|!=|<=|>=|<|>)
+      | (?P<punct>[(),])
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<param>\$[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+_COMPARE = {
+    '==': np.equal,
+    '!=': np.not_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+
+class FilterRule:
+    """One compiled `<condition> -> action` rule"""
+
+    def __init__(self, condition, action, text, field_names):
+        self.condition = condition
+        self.action = action
+        self.text = text
+        self.field_names = field_names
+        self.matched = 0
+
+
+class RowFilter:
+    """
+    Compiled filter for one table. Passed to read_dbf_iter / DBFReader as
+    row_filter: the reader decodes field_names first and calls skip_mask().
+    """
+
+    def __init__(self, rules, name=None, source=None, params=None):
+        self.rules = rules
+        self.name = name
+        self.source = source
+        self.params = params
+        self.field_names = sorted({field for rule in rules for field in rule.field_names})
+        self.skipped = 0
+
+    def __reduce__(self):
+        # Compiled conditions are closures; worker processes recompile from the source text
+        return (parse_filter, (self.source, self.params, self.name))
+
+    def skip_mask(self, batch):
+        skip = np.zeros(len(batch), dtype=bool)
+        decided = np.zeros(len(batch), dtype=bool)
+        for rule in self.rules:
+            matched = rule.condition(batch) & ~decided
+            rule.matched += int(np.count_nonzero(matched))
+            if rule.action == 'drop':
+                skip |= matched
+            decided |= matched
+        self.skipped += int(np.count_nonzero(skip))
+        return skip
+
+    def describe(self):
+        return '; '.join(f"{rule.text} -> {rule.action}" for rule in self.rules)
+
+
+class FilterChain:
+    """Several row filters applied in sequence; later filters only see rows the earlier ones kept"""
+
+    def __init__(self, filters):
+        self.filters = [f for f in filters if f is not None]
+        self.field_names = sorted({field for f in self.filters for field in f.field_names})
+
+    @property
+    def skipped(self):
+        return sum(f.skipped for f in self.filters)
+
+    def skip_mask(self, batch):
+        skip = np.zeros(len(batch), dtype=bool)
+        for row_filter in self.filters:
+            remaining = np.flatnonzero(~skip)
+            if not len(remaining):
+                break
+            subset = batch if len(remaining) == len(batch) else batch.filter(~skip)
+            skip[remaining[row_filter.skip_mask(subset)]] = True
+        return skip
+
+
+def combine_filters(*filters):
+    """None, a single filter, or a FilterChain for the non-None `filters`"""
+    filters = [f for f in filters if f is not None]
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+    return FilterChain(filters)
+
+
+def filter_counters(row_filter):
+    """Flat list of a filter's skip/match counters (see add_filter_counters)"""
+    if row_filter is None:
+        return []
+    if isinstance(row_filter, FilterChain):
+        return [count for f in row_filter.filters for count in filter_counters(f)]
+    return [row_filter.skipped] + [rule.matched for rule in getattr(row_filter, 'rules', [])]
+
+
+def add_filter_counters(row_filter, counters):
+    """Add counters taken from a copy of `row_filter` (e.g. in a worker process) to it"""
+    if row_filter is None:
+        return counters
+    if isinstance(row_filter, FilterChain):
+        for f in row_filter.filters:
+            counters = add_filter_counters(f, counters)
+        return counters
+    row_filter.skipped += counters[0]
+    rules = getattr(row_filter, 'rules', [])
+    for rule, count in zip(rules, counters[1:]):
+        rule.matched += count
+    return counters[1 + len(rules):]
+
+
+def parse_filter(text, params=None, name=None):
+    """
+    Compile filter text into a RowFilter. `params` maps $NAME -> value.
+    Raises ValueError on syntax errors or unknown parameters.
+    """
+    rules = []
+    for rule_text in re.split(r'[;\n]', text or ''):
+        if rule_text.strip():
+            rules.append(_RuleParser(rule_text, params or {}).parse())
+    if not rules:
+        raise ValueError(f"Filter for {name or 'table'} has no rules")
+    return RowFilter(rules, name, text, dict(params or {}))
+
+
+class _RuleParser:
+    """Recursive-descent parser: rule := or_expr '->' action"""
+
+    def __init__(self, text, params):
+        self.source = text.strip()
+        self.params = params
+        self.tokens = self._tokenize(self.source)
+        self.position = 0
+        self.fields = set()
+
+    def parse(self):
+        # Conditions return (true mask, false mask); rows in neither compared a NULL
+        condition, text = self._or()
+        self._expect('arrow')
+        kind, action = self._next()
+        if kind != 'name' or action.lower() not in ACTIONS:
+            raise self._error(f"expected drop or keep after '->', got {action!r}")
+        if self.position != len(self.tokens):
+            raise self._error(f"unexpected {self.tokens[self.position][1]!r} after action")
+        return FilterRule(lambda batch: condition(batch)[0], action.lower(), text, sorted(self.fields))
+
+    def _tokenize(self, text):
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN_PATTERN.match(text, position)
+            if not match or match.end() == position:
+                raise ValueError(f"Invalid filter expression {text!r}: unexpected character at {text[position:]!r}")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == 'param':
+                if value[1:] not in self.params:
+                    raise ValueError(f"Invalid filter expression {text!r}: unknown parameter {value}")
+                kind, value = self._param_token(str(self.params[value[1:]]))
+            tokens.append((kind, value))
+            position = match.end()
+        return tokens
+
+    @staticmethod
+    def _param_token(value):
+        if re.fullmatch(r'-?\d+(?:\.\d+)?', value.strip()):
+            return 'number', value.strip()
+        return 'string', repr(value)
+
+    def _error(self, message):
+        return ValueError(f"Invalid filter expression {self.source!r}: {message}")
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        if token[0] is None:
+            raise self._error("unexpected end of expression")
+        self.position += 1
+        return token
+
+    def _expect(self, kind, value=None):
+        token = self._next()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise self._error(f"expected {value or kind}, got {token[1]!r}")
+        return token
+
+    def _keyword(self, word):
+        kind, value = self._peek()
+        if kind == 'name' and value.lower() == word:
+            self.position += 1
+            return True
+        return False
+
+    def _or(self):
+        condition, text = self._and()
+        while self._keyword('or'):
+            right, right_text = self._and()
+            condition = (lambda a, b: lambda batch: _or_masks(a(batch), b(batch)))(condition, right)
+            text = f"{text} or {right_text}"
+        return condition, text
+
+    def _and(self):
+        condition, text = self._not()
+        while self._keyword('and'):
+            right, right_text = self._not()
+            condition = (lambda a, b: lambda batch: _and_masks(a(batch), b(batch)))(condition, right)
+            text = f"{text} and {right_text}"
+        return condition, text
+
+    def _not(self):
+        if self._keyword('not'):
+            inner, text = self._not()
+            return (lambda batch: inner(batch)[::-1]), f"not {text}"
+        if self._peek() == ('punct', '('):
+            self.position += 1
+            inner, text = self._or()
+            self._expect('punct', ')')
+            return inner, f"({text})"
+        return self._comparison()
+
+    def _comparison(self):
+        kind, field = self._next()
+        if kind != 'name':
+            raise self._error(f"expected a field name, got {field!r}")
+        field = field.upper()
+        self.fields.add(field)
+
+        if self._keyword('in'):
+            self._expect('punct', '(')
+            literals = [self._literal()]
+            while self._peek() == ('punct', ','):
+                self.position += 1
+                literals.append(self._literal())
+            self._expect('punct', ')')
+            text = f"{field} in ({', '.join(_show(value) for value in literals)})"
+            return _in_condition(field, literals), text
+
+        kind, op = self._next()
+        if kind != 'op':
+            raise self._error(f"expected a comparison after {field}, got {op!r}")
+        literal = self._literal()
+        return _compare_condition(field, op, literal), f"{field} {op} {_show(literal)}"
+
+    def _literal(self):
+        kind, value = self._next()
+        if kind == 'string':
+            return value[1:-1]
+        if kind == 'number':
+            return float(value) if '.' in value else int(value)
+        raise self._error(f"expected a literal, got {value!r}")
+
+
+def _show(value):
+    return f"'{value}'" if isinstance(value, str) else str(value)
+
+
+def _field_type(batch, field):
+    for entry in batch.structure:
+        if entry['name'] == field:
+            return entry['type']
+    return None
+
+
+def _operand(batch, field, literal):
+    """(column values, literal, present mask) in the representation the field type compares in"""
+    field_type = _field_type(batch, field)
+    if field not in batch.columns:
+        return None, None, np.zeros(len(batch), dtype=bool)
+
+    if field_type in DATE_TYPES:
+        keys = batch.date_keys(field)
+        return keys, _date_literal(literal), keys > 0
+
+    if field_type in NUMERIC_TYPES:
+        values = batch.columns[field]
+        present = ~batch.nulls[field]
+        if values.dtype.kind not in 'iufb':
+            values = np.array([_to_float(value) for value in values.tolist()], dtype=np.float64)
+            present &= ~np.isnan(values)
+        number = _to_float(literal)
+        return values, number, present & (not np.isnan(number))
+
+    if field_type == 'L':
+        logical = LOGICAL_LITERALS.get(str(literal).strip().upper())
+        present = ~batch.nulls[field] & (logical is not None)
+        return batch.columns[field].astype(bool), bool(logical), present
+
+    values = batch.string_values(field)
+    return values, str(literal).strip().upper(), ~batch.nulls[field]
+
+
+def _and_masks(left, right):
+    return left[0] & right[0], left[1] | right[1]
+
+
+def _or_masks(left, right):
+    return left[0] | right[0], left[1] & right[1]
+
+
+def _compare_condition(field, op, literal):
+    compare = _COMPARE[op]
+
+    def condition(batch):
+        values, value, present = _operand(batch, field, literal)
+        if values is None:
+            return present, present
+        hit = compare(values, value).astype(bool)
+        return present & hit, present & ~hit
+    return condition
+
+
+def _in_condition(field, literals):
+    def condition(batch):
+        # Each literal converts on its own, so its present mask only applies to its own hits
+        matched = np.zeros(len(batch), dtype=bool)
+        unmatched = np.ones(len(batch), dtype=bool)
+        for literal in literals:
+            values, value, present = _operand(batch, field, literal)
+            if values is None:
+                return present, present
+            hit = np.equal(values, value).astype(bool)
+            matched |= present & hit
+            unmatched &= present & ~hit
+        return matched, unmatched
+    return condition
+
+
+def _date_literal(literal):
+    if isinstance(literal, (int, float)):
+        return int(literal)
+    return date_key(literal)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
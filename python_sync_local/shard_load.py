@@ -0,0 +1,177 @@
+"""
+Sharded full loads of one big MySQL table over several connections.
+
+A single connection loads only as fast as one server thread can parse and
+insert rows, so even with tables synced in parallel the biggest table (ictran)
+sets the length of the run. For tables with "shards" in tables.json a full load
+into the staging table is split into K shards by ranges of the first key field, and
+every shard streams into the staging table on its own connection at once:
+
+    - the ranges come from a sample of the keys in the live table (the last
+      load), so the shards get about the same number of rows; without a live
+      table the batches are dealt out in turn instead
+    - each shard loads through ultra_fast_mysql_import_stream (LOAD DATA
+      LOCAL, or chunked inserts) from a short queue filled by the thread
+      reading the DBF
+    - afterwards COUNT(*) of the staging table must equal the rows handed to
+      the shards; if not, or if any shard fails, the load fails and the live
+      table is left as it was
+
+`python benchmark.py shards` times K = 1..8 against a MySQL server to show
+where InnoDB contention stops adding speed.
+"""
+
+import bisect
+import queue
+import threading
+import time
+
+import numpy as np
+from mysql.connector import Error
+
+import mysql_pool
+
+
+# Batches queued per shard ahead of its connection
+SHARD_QUEUE_BATCHES = 4
+# Keys sampled from the live table to place the range boundaries
+BOUNDARY_SAMPLE_KEYS = 20000
+
+
+def _sort_key(value):
+    return "" if value is None else str(value)
+
+
+def shard_boundaries(keys, shards):
+    """shards - 1 keys splitting `keys` into ranges with about the same number of rows (None if too few keys)"""
+    ordered = sorted(map(_sort_key, keys))
+    if shards < 2 or len(ordered) < shards:
+        return None
+    return [ordered[len(ordered) * index // shards] for index in range(1, shards)]
+
+
+def read_shard_boundaries(cursor, table_name, key_field, shards):
+    """Boundaries from a sample of `key_field` in an existing table, or None if it is missing or too small"""
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+        total = cursor.fetchone()[0]
+        if total < shards * 100:
+            return None
+        fraction = min(1.0, BOUNDARY_SAMPLE_KEYS / total)
+        cursor.execute(f"SELECT `{key_field}` FROM `{table_name}` WHERE RAND() < {fraction:.6f}")
+        keys = [row[0] for row in cursor.fetchall()]
+    except Error as e:
+        print(f"⚠️  Could not sample {key_field} in {table_name} for shard ranges: {e}", flush=True)
+        return None
+    return shard_boundaries(keys, shards)
+
+
+def route_batch(batch, key_field, boundaries):
+    """int array with the shard of every row of a batch"""
+    values = batch.column_values(key_field)
+    distinct = {value: bisect.bisect_right(boundaries, _sort_key(value)) for value in dict.fromkeys(values)}
+    return np.fromiter(map(distinct.__getitem__, values), dtype=np.int64, count=len(values))
+
+
+def sharded_import(table_name, structures, batches, key_field, shards, boundaries=None, relax_checks=False):
+    """
+    Load `batches` into `table_name` over `shards` connections at once; the rows of each
+    shard are those whose `key_field` falls in one range of `boundaries` (or every
+    shards-th batch without boundaries). `relax_checks` as for ultra_fast_mysql_import_stream.
+    Returns the number of rows loaded.
+    """
+    from ultra_fast_import import connect_streaming_mysql, generate_mysql_create_table, ultra_fast_mysql_import_stream
+
+    connection = connect_streaming_mysql()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(generate_mysql_create_table(table_name, structures))
+    finally:
+        cursor.close()
+        connection.close()
+
+    queues = [queue.Queue(maxsize=SHARD_QUEUE_BATCHES) for _ in range(shards)]
+    failed = threading.Event()
+    results = [None] * shards
+    seconds = [0.0] * shards
+
+    def shard_batches(index):
+        while True:
+            batch = queues[index].get()
+            if batch is None:
+                return
+            yield batch
+
+    def load_shard(index):
+        start = time.time()
+        try:
+            results[index] = ultra_fast_mysql_import_stream(table_name, structures, shard_batches(index),
+                                                            append=True, verbose=False, relax_checks=relax_checks)
+        except Exception as e:
+            results[index] = e
+            failed.set()
+        seconds[index] = time.time() - start
+
+    def hand_out(index, batch):
+        # A shard that failed stops taking batches; give up on the load instead of waiting for it
+        while not failed.is_set():
+            try:
+                queues[index].put(batch, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+    start = time.time()
+    threads = [threading.Thread(target=load_shard, args=(index,), name=f"shard-{index + 1}") for index in range(shards)]
+    for thread in threads:
+        thread.start()
+    routed = [0] * shards
+    try:
+        for number, batch in enumerate(batches):
+            if failed.is_set():
+                break
+            if boundaries is None:
+                index = number % shards
+                routed[index] += len(batch)
+                hand_out(index, batch)
+                continue
+            shard_of_row = route_batch(batch, key_field, boundaries)
+            for index in np.unique(shard_of_row).tolist():
+                part = batch.filter(shard_of_row == index)
+                routed[index] += len(part)
+                hand_out(index, part)
+    finally:
+        for index, thread in enumerate(threads):
+            # End of rows for every shard still loading
+            while thread.is_alive():
+                try:
+                    queues[index].put(None, timeout=0.5)
+                    break
+                except queue.Full:
+                    pass
+        for thread in threads:
+            thread.join()
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        raise errors[0]
+    elapsed = time.time() - start
+    for index in range(shards):
+        print(f"🧩 Shard {index + 1}/{shards}: {results[index]:,} rows in {seconds[index]:.2f}s", flush=True)
+
+    connection = mysql_pool.connect()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+        counted = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        connection.close()
+    expected = sum(routed)
+    if counted != expected or sum(results) != expected:
+        raise ValueError(f"Sharded load of {table_name} has {counted:,} rows but {expected:,} were read "
+                         f"({sum(results):,} reported loaded by the shards)")
+    rate = counted / elapsed if elapsed > 0 else 0
+    print(f"✅ Loaded {counted:,} rows over {shards} connections in {elapsed:.2f}s ({rate:,.0f} rows/sec), "
+          f"row count checked", flush=True)
+    return counted
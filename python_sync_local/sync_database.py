@@ -3,6 +3,26 @@ import sqlite3
 import mysql.connector
 from mysql.connector import Error
 import pymysql
+import mysql_pool
+from key_sort import sort_batches
+from mysql_batches import InsertBatcher
+from record_batch import RecordBatch
+from shard_load import read_shard_boundaries, sharded_import
+from table_indexes import build_indexes, ensure_table_indexes, index_columns, missing_indexes
+from table_schema import create_table_sql, migrate_mysql_table
+
+# Field types whose values can be arbitrarily long (memo / binary)
+MEMO_TYPES = frozenset(['M', 'G', 'P', 'W'])
+# Bytes a MySQL TEXT column holds; memo values are cut to this (see column_width_transforms)
+TEXT_MAX_BYTES = 65535
+# Key values per DELETE statement when replacing rows by key
+KEY_DELETE_CHUNK = 500
+# MySQL full loads of "swap" tables (tables.json) go into <table>__staging and are swapped in with
+# one RENAME TABLE (the replaced table is kept as <table>__previous)
+STAGING_SUFFIX = "__staging"
+PREVIOUS_SUFFIX = "__previous"
+# Seconds the RENAME may wait for queries holding the live table (MySQL's default is a year)
+SWAP_LOCK_WAIT_TIMEOUT = int(os.getenv("SWAP_LOCK_WAIT_TIMEOUT", "30"))
 
 def safe_execute(cursor, query, params=None):
     """Safely execute a query and consume all results to avoid 'Unread result found' errors"""
@@ -10,6 +30,13 @@ def safe_execute(cursor, query, params=None):
     # For queries that don't return results, just execute them
     # For queries that do return results, fetchone() or fetchall() will be called separately
 
+def get_table_name(filename, directory):
+    """ubs_<directory>_<dbf name>, e.g. ubs_ubsstk2015_ictran"""
+    filename_base = filename.split('.')[0]
+    prefix = "ubs"
+    directory_name = directory.lower()
+    return f"{prefix}_{directory_name}_{filename_base}"
+
 def sync_to_database(filename, data, directory):
     """
     Create table and insert data directly to database - OPTIMIZED for large datasets
@@ -22,10 +49,7 @@ def sync_to_database(filename, data, directory):
         rows = data['rows']
         
         # Generate table name
-        filename_base = filename.split('.')[0]
-        prefix = "ubs"
-        directory_name = directory.lower()
-        table_name = f"{prefix}_{directory_name}_{filename_base}"
+        table_name = get_table_name(filename, directory)
         
         # Performance monitoring
         sync_start = time.time()
@@ -65,49 +89,432 @@ def sync_to_database(filename, data, directory):
         traceback.print_exc()
         raise
 
+def sync_to_database_stream(filename, structures, batches, directory, record_count_hint=0, append=False,
+                            key_fields=None, load="swap", shards=1, sort=False):
+    """
+    Streaming version of sync_to_database.
+    
+    `batches` is an iterable of RecordBatch objects (e.g. utils.read_dbf_iter), consumed
+    once, so only one batch is held in memory at a time. `record_count_hint` (usually the
+    DBF header record count) picks the loader since the real count is not known up front.
+    With `append=True` the rows are added to the existing table instead of replacing it.
+    `load` is the table's manifest strategy: "swap" loads MySQL tables through a staging
+    table, "truncate" (and every other database) reloads the table in place. With
+    `key_fields`, a swap splits into `shards` connections by key range (shard_load.py) and
+    `sort` loads the rows in key order (key_sort.py).
+    Returns the number of rows loaded.
+    """
+    import time
+    
+    try:
+        table_name = get_table_name(filename, directory)
+        sync_start = time.time()
+        db_type = os.getenv("DB_TYPE", "mysql")  # mysql, sqlite, postgresql
+        
+        if not append and key_fields and sort:
+            batches = sort_batches(batches, key_fields)
+        
+        staging = db_type == "mysql" and not append and load != "truncate"
+        if staging:
+            record_count = load_mysql_via_staging(table_name, structures, batches, record_count_hint,
+                                                  shards=shards, key_fields=key_fields)
+        elif db_type == "mysql" and record_count_hint > 10000:
+            print(f"🚀 Large dataset detected (~{record_count_hint:,} records) - using ultra-fast import", flush=True)
+            from ultra_fast_import import ultra_fast_mysql_import_stream
+            record_count = ultra_fast_mysql_import_stream(table_name, structures, batches, append=append)
+        elif db_type == "mysql":
+            record_count = sync_to_mysql_stream(table_name, structures, batches, append=append)
+        elif db_type == "sqlite":
+            record_count = sync_to_sqlite_stream(table_name, structures, batches, append=append)
+        elif db_type == "postgresql":
+            record_count = sync_to_postgresql_stream(table_name, structures, batches, append=append)
+        else:
+            raise ValueError(f"Unsupported DB_TYPE '{db_type}'")
+        
+        if db_type == "mysql" and not staging:
+            # Loaded in place with its indexes; add any the table does not have yet
+            connection, _, _ = connect_database("mysql")
+            cursor = connection.cursor()
+            try:
+                ensure_table_indexes(cursor, table_name)
+            finally:
+                cursor.close()
+                connection.close()
+        
+        sync_time = time.time() - sync_start
+        if record_count > 0:
+            records_per_second = record_count / sync_time if sync_time > 0 else 0
+            print(f"📊 Performance: {records_per_second:.0f} records/sec ({sync_time:.2f}s for {record_count:,} records)", flush=True)
+        return record_count
+            
+    except mysql.connector.Error as e:
+        print(f"❌ MySQL Error syncing data: {e}", flush=True)
+        print(f"   Error Code: {e.errno}", flush=True)
+        print(f"   SQL State: {e.sqlstate}", flush=True)
+        import traceback
+        traceback.print_exc()
+        raise
+    except Exception as e:
+        print(f"❌ Error syncing data: {e}", flush=True)
+        import traceback
+        traceback.print_exc()
+        raise
+
+def load_mysql_via_staging(table_name, structures, batches, record_count_hint=0, shards=1, key_fields=None):
+    """
+    Full MySQL load that never leaves the live table empty or half-filled.
+
+    The rows go into <table>__staging (a copy of the live table's definition with its
+    secondary indexes dropped while loading, unique_checks / foreign_key_checks off), then
+    those indexes plus the missing manifest "indexes" (table_indexes.py) are built in one
+    ALTER, and `RENAME TABLE live TO live__previous, staging TO live` swaps it in atomically.
+    Readers see the old rows until the swap. The previous generation stays until the next
+    swap (see rollback_table_swap). If loading fails the live table is left untouched.
+    With `shards` > 1 and `key_fields`, large loads go in over that many connections at once
+    (shard_load.py). Each phase is timed. Returns the number of rows loaded.
+    """
+    import time
+    
+    staging = table_name + STAGING_SUFFIX
+    previous = table_name + PREVIOUS_SUFFIX
+    phases = {}
+    phase_start = time.time()
+    connection, _, _ = connect_database("mysql")
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS `{staging}`")
+        live_exists = _mysql_table_exists(cursor, table_name)
+        deferred = []
+        existing = {}
+        if live_exists:
+            cursor.execute(f"CREATE TABLE `{staging}` LIKE `{table_name}`")
+            # Column types that differ from table_schema.py change while staging is still empty
+            migrate_mysql_table(cursor, staging, structures)
+            existing = index_columns(cursor, staging)
+            deferred = _mysql_secondary_indexes(cursor, staging)
+            if deferred:
+                cursor.execute(f"ALTER TABLE `{staging}` " + ", ".join(f"DROP INDEX `{name}`" for name, _ in deferred))
+        sharded = shards > 1 and key_fields and record_count_hint > 10000
+        boundaries = None
+        if sharded and live_exists:
+            boundaries = read_shard_boundaries(cursor, table_name, key_fields[0], shards)
+    finally:
+        cursor.close()
+        connection.close()
+    phases["prepare"] = time.time() - phase_start
+    
+    print(f"🗂️  Loading into staging table {staging} ({len(deferred)} indexes deferred)", flush=True)
+    try:
+        phase_start = time.time()
+        if sharded:
+            split = f"ranges of {key_fields[0]}" if boundaries else "batches dealt out in turn"
+            print(f"🚀 Large dataset detected (~{record_count_hint:,} records) - loading {shards} shards at once "
+                  f"({split})", flush=True)
+            record_count = sharded_import(staging, structures, batches, key_fields[0], shards, boundaries,
+                                          relax_checks=True)
+        elif record_count_hint > 10000:
+            print(f"🚀 Large dataset detected (~{record_count_hint:,} records) - using ultra-fast import", flush=True)
+            from ultra_fast_import import ultra_fast_mysql_import_stream
+            record_count = ultra_fast_mysql_import_stream(staging, structures, batches, relax_checks=True)
+        else:
+            record_count = sync_to_mysql_stream(staging, structures, batches, relax_checks=True)
+        phases["load"] = time.time() - phase_start
+        
+        connection, _, _ = connect_database("mysql")
+        cursor = connection.cursor()
+        try:
+            clauses = [definition for _, definition in deferred] + missing_indexes(cursor, staging, table_name,
+                                                                                   existing)
+            phases["indexes"] = build_indexes(cursor, staging, clauses)
+            if clauses:
+                print(f"🗂️  Built {len(clauses)} indexes in one ALTER TABLE in {phases['indexes']:.2f}s", flush=True)
+            
+            swap_start = time.time()
+            cursor.execute(f"SET SESSION lock_wait_timeout = {SWAP_LOCK_WAIT_TIMEOUT}")
+            if live_exists:
+                cursor.execute(f"DROP TABLE IF EXISTS `{previous}`")
+                cursor.execute(f"RENAME TABLE `{table_name}` TO `{previous}`, `{staging}` TO `{table_name}`")
+                print(f"🔁 Swapped {staging} in as {table_name} in {time.time() - swap_start:.2f}s "
+                      f"(previous rows kept in {previous})", flush=True)
+            else:
+                cursor.execute(f"RENAME TABLE `{staging}` TO `{table_name}`")
+            phases["swap"] = time.time() - swap_start
+        finally:
+            cursor.close()
+            connection.close()
+    except Exception:
+        _drop_mysql_table(staging)
+        raise
+    print("⏱️  Staging phases: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in phases.items()), flush=True)
+    return record_count
+
+def rollback_table_swap(table_name):
+    """Swap <table>__previous back in; the generation it replaces becomes <table>__previous"""
+    previous = table_name + PREVIOUS_SUFFIX
+    parked = table_name + "__rollback"
+    connection, _, _ = connect_database("mysql")
+    cursor = connection.cursor()
+    try:
+        if not _mysql_table_exists(cursor, previous):
+            raise ValueError(f"No previous generation {previous} to roll back to")
+        cursor.execute(f"SET SESSION lock_wait_timeout = {SWAP_LOCK_WAIT_TIMEOUT}")
+        cursor.execute(f"RENAME TABLE `{table_name}` TO `{parked}`, `{previous}` TO `{table_name}`, "
+                       f"`{parked}` TO `{previous}`")
+        print(f"↩️  Rolled {table_name} back to the previous generation", flush=True)
+    finally:
+        cursor.close()
+        connection.close()
+
+def _mysql_table_exists(cursor, table_name):
+    cursor.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                   (table_name,))
+    return cursor.fetchone()[0] > 0
+
+def _mysql_secondary_indexes(cursor, table_name):
+    """[(index name, ALTER TABLE clause re-creating it)] for every index except the primary key"""
+    cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+    indexes = {}
+    for row in cursor.fetchall():
+        # Non_unique, Key_name, Seq_in_index, Column_name, ..., Sub_part, ..., Index_type
+        non_unique, name, position, column, sub_part, index_type = row[1], row[2], row[3], row[4], row[7], row[10]
+        if name == 'PRIMARY':
+            continue
+        entry = indexes.setdefault(name, {'unique': not int(non_unique), 'type': index_type, 'columns': {}})
+        if column is None:
+            # Functional index (MySQL 8): the Expression column holds the indexed expression
+            entry['columns'][position] = f"({row[14]})"
+        else:
+            entry['columns'][position] = f"`{column}`" + (f"({sub_part})" if sub_part else "")
+    definitions = []
+    for name, entry in indexes.items():
+        kind = "FULLTEXT INDEX" if entry['type'] == 'FULLTEXT' else ("UNIQUE INDEX" if entry['unique'] else "INDEX")
+        columns = ", ".join(entry['columns'][position] for position in sorted(entry['columns']))
+        definitions.append((name, f"ADD {kind} `{name}` ({columns})"))
+    return definitions
+
+def _drop_mysql_table(table_name):
+    try:
+        connection, _, _ = connect_database("mysql")
+        cursor = connection.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
+        cursor.close()
+        connection.close()
+    except Exception as e:
+        print(f"⚠️  Could not drop {table_name}: {e}", flush=True)
+
+def count_table_rows(table_name):
+    """COUNT(*) of a synced table in the configured database, or None if it does not exist / cannot be read"""
+    db_type = os.getenv("DB_TYPE", "mysql")
+    connection = None
+    try:
+        if db_type == "mysql":
+            connection = mysql_pool.connect()
+            sql = f"SELECT COUNT(*) FROM `{table_name}`"
+        elif db_type == "sqlite":
+            connection = sqlite3.connect(os.getenv("SQLITE_DB_PATH", "database.db"))
+            sql = f"SELECT COUNT(*) FROM [{table_name}]"
+        elif db_type == "postgresql":
+            import psycopg2
+            connection = psycopg2.connect(
+                host=os.getenv("DB_HOST", "localhost"),
+                user=os.getenv("DB_USER", "postgres"),
+                password=os.getenv("DB_PASSWORD", ""),
+                database=os.getenv("DB_NAME", "your_database"),
+                port=os.getenv("DB_PORT", "5432")
+            )
+            sql = f'SELECT COUNT(*) FROM "{table_name}"'
+        else:
+            return None
+        cursor = connection.cursor()
+        try:
+            cursor.execute(sql)
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+    except Exception:
+        return None
+    finally:
+        if connection is not None:
+            connection.close()
+
+def replace_rows_by_key(filename, structures, directory, key_fields, changes, expected_deleted=None):
+    """
+    Apply block changes (block_sync.iter_block_changes) to an existing table in one transaction.
+
+    `changes` yields (delete_keys, batch): rows whose key is in delete_keys are deleted,
+    then the batch's rows are inserted. Returns (rows deleted, rows inserted), or None if
+    `expected_deleted` is given and a different number of rows was deleted; the transaction
+    is then rolled back, so the table is left as it was.
+    """
+    table_name = get_table_name(filename, directory)
+    db_type = os.getenv("DB_TYPE", "mysql")
+    connection, quote, placeholder = connect_database(db_type)
+    cursor = connection.cursor()
+    transforms = None
+    if db_type == "mysql":
+        structures = existing_mysql_columns(cursor, table_name, structures)
+        transforms = column_width_transforms(structures)
+    ensure_key_index(cursor, db_type, table_name, key_fields)
+
+    names = [struct['name'] for struct in structures]
+    insert_sql = (f"INSERT INTO {quote(table_name)} ({', '.join(quote(name) for name in names)}) "
+                  f"VALUES ({', '.join([placeholder] * len(names))})")
+    deleted = 0
+    inserted = 0
+    try:
+        # Keep the parameter count per statement at KEY_DELETE_CHUNK (old SQLite allows 999)
+        chunk_size = max(1, KEY_DELETE_CHUNK // len(key_fields))
+        for delete_keys, batch in changes:
+            for i in range(0, len(delete_keys), chunk_size):
+                chunk = [key for key in delete_keys[i:i + chunk_size] if None not in key]
+                if chunk:
+                    cursor.execute(key_delete_sql(table_name, key_fields, len(chunk), quote, placeholder,
+                                                   values_list=db_type == "sqlite"),
+                                   [value for key in chunk for value in key])
+                    deleted += cursor.rowcount
+            if len(batch):
+                cursor.executemany(insert_sql, batch.row_tuples(names, transforms))
+                inserted += len(batch)
+        if expected_deleted is not None and deleted != expected_deleted:
+            connection.rollback()
+            print(f"⚠️  Expected to replace {expected_deleted:,} rows but {deleted:,} matched "
+                  f"(duplicate or edited keys), changes rolled back", flush=True)
+            return None
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+    return deleted, inserted
+
+def connect_database(db_type=None):
+    """
+    (connection, quote, placeholder) for the configured database: a connection with
+    autocommit off, a function quoting identifiers and the DB-API parameter marker.
+    """
+    db_type = db_type or os.getenv("DB_TYPE", "mysql")
+    if db_type == "mysql":
+        return mysql_pool.connect(), identifier_quote(db_type), "%s"
+    if db_type == "sqlite":
+        connection = sqlite3.connect(os.getenv("SQLITE_DB_PATH", "database.db"))
+        return connection, identifier_quote(db_type), "?"
+    if db_type == "postgresql":
+        import psycopg2
+        connection = psycopg2.connect(
+            host=os.getenv("DB_HOST", "localhost"),
+            user=os.getenv("DB_USER", "postgres"),
+            password=os.getenv("DB_PASSWORD", ""),
+            database=os.getenv("DB_NAME", "your_database"),
+            port=os.getenv("DB_PORT", "5432")
+        )
+        return connection, identifier_quote(db_type), "%s"
+    raise ValueError(f"Unsupported DB_TYPE '{db_type}'")
+
+def identifier_quote(db_type):
+    """Function quoting a table/column name for `db_type`"""
+    if db_type == "mysql":
+        return lambda name: f"`{name}`"
+    if db_type == "sqlite":
+        return lambda name: f"[{name}]"
+    return lambda name: f'"{name}"'
+
+def existing_mysql_columns(cursor, table_name, structures):
+    """`structures` narrowed to the columns the MySQL table has (missing ones are reported)"""
+    cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+    existing_columns = {row[0].lower() for row in cursor.fetchall()}
+    excluded = [struct['name'] for struct in structures if struct['name'].lower() not in existing_columns]
+    if excluded:
+        print(f"⚠️  Excluding columns from sync because they are missing in MySQL: {', '.join(excluded)}", flush=True)
+    structures = [struct for struct in structures if struct['name'].lower() in existing_columns]
+    if not structures:
+        raise ValueError(f"No matching columns found between DBF and MySQL table '{table_name}'!")
+    return structures
+
+def ensure_key_index(cursor, db_type, table_name, key_fields):
+    """
+    Create a (non-unique) index on the key columns if the table has none, so deletes and
+    updates by key do not scan the whole table. In MySQL the table's manifest "indexes"
+    are added first. Failures (e.g. a TEXT key column in MySQL) are reported and ignored.
+    """
+    index_name = f"idx_{table_name}_key"
+    quote = identifier_quote(db_type)
+    columns = ", ".join(quote(field) for field in key_fields)
+    try:
+        if db_type == "mysql":
+            ensure_table_indexes(cursor, table_name)
+            cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+            indexes = {}
+            for row in cursor.fetchall():
+                # Key_name, Seq_in_index, Column_name
+                indexes.setdefault(row[2], {})[row[3]] = row[4].upper()
+            wanted = [field.upper() for field in key_fields]
+            for indexed in indexes.values():
+                if [indexed.get(position) for position in range(1, len(wanted) + 1)] == wanted:
+                    return
+            cursor.execute(f"CREATE INDEX {quote(index_name)} ON {quote(table_name)} ({columns})")
+        else:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(table_name)} ({columns})")
+    except Exception as e:
+        print(f"⚠️  Could not index {table_name} on {', '.join(key_fields)}: {e}", flush=True)
+
+def key_delete_sql(table_name, key_fields, count, quote, placeholder, values_list=False):
+    """
+    DELETE for `count` keys: `k IN (...)`, or a row-value IN for composite keys.
+    SQLite only accepts a row-value IN over a subquery, hence `values_list` -> IN (VALUES ...).
+    """
+    if len(key_fields) == 1:
+        return f"DELETE FROM {quote(table_name)} WHERE {quote(key_fields[0])} IN ({', '.join([placeholder] * count)})"
+    columns = "(" + ", ".join(quote(field) for field in key_fields) + ")"
+    group = "(" + ", ".join([placeholder] * len(key_fields)) + ")"
+    rows = ", ".join([group] * count)
+    if values_list:
+        rows = f"VALUES {rows}"
+    return f"DELETE FROM {quote(table_name)} WHERE {columns} IN ({rows})"
+
 def sync_to_mysql(table_name, structures, rows):
     """
     Create table and insert data in MySQL - OPTIMIZED VERSION with batch operations and retry logic
     """
+    return sync_to_mysql_stream(table_name, structures, [RecordBatch.from_rows(structures, rows)])
+
+def sync_to_mysql_stream(table_name, structures, batches, append=False, relax_checks=False):
+    """
+    Create table and insert data in MySQL from an iterable of RecordBatch objects.
+    The table is truncated first unless `append` is set. `relax_checks` inserts with
+    unique_checks / foreign_key_checks off (for staging tables).
+    
+    A list of batches can be replayed, so lost connections are retried at any point;
+    a one-shot iterator (generator) is only retried if it has not been consumed yet.
+    Returns the number of rows inserted.
+    """
     import time
     
     max_retries = 3
     retry_count = 0
+    replayable = isinstance(batches, (list, tuple))
+    batches_started = False
     
     while retry_count < max_retries:
         try:
             # Get connection parameters
             db_host = os.getenv("DB_HOST", "localhost")
             db_user = os.getenv("DB_USER", "root")
-            db_password = os.getenv("DB_PASSWORD", "")
             db_name = os.getenv("DB_NAME", "your_database")
             
             print(f"🔌 Connecting to MySQL: {db_name} @ {db_host} (user: {db_user})", flush=True)
             
-            # Optimize connection settings for bulk operations
-            connection = mysql.connector.connect(
-                host=db_host,
-                user=db_user,
-                password=db_password,
-                database=db_name,
-                autocommit=False,  # Disable autocommit for better performance
-                use_unicode=True,
-                charset='utf8mb4',
-                # Add timeout settings to prevent connection drops
-                connection_timeout=60
-            )
+            # Pooled connection; its session timeouts were set when it was opened
+            connection = mysql_pool.connect(autocommit=False)  # Disable autocommit for better performance
+            if relax_checks:
+                connection.relax_checks()
             
             print(f"✅ MySQL connection established", flush=True)
             
             cursor = connection.cursor(buffered=True)
 
             try:
-                # Set additional timeout settings to prevent connection drops
-                cursor.execute("SET SESSION wait_timeout = 28800")  # 8 hours
-                cursor.execute("SET SESSION interactive_timeout = 28800")  # 8 hours
-                cursor.execute("SET SESSION net_read_timeout = 600")  # 10 minutes
-                cursor.execute("SET SESSION net_write_timeout = 600")  # 10 minutes
-                
                 # Truncate table to remove old data
                 cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
                 result = cursor.fetchone()
@@ -122,76 +529,34 @@ def sync_to_mysql(table_name, structures, rows):
                     if not structures:
                         raise ValueError(f"No matching columns found between DBF and MySQL table '{table_name}'!")
                     
-                    cursor.execute(f"TRUNCATE TABLE `{table_name}`")
+                    if not append:
+                        cursor.execute(f"TRUNCATE TABLE `{table_name}`")
                 
                 # Create table if not exists
                 create_table_sql = generate_mysql_create_table(table_name, structures)
                 cursor.execute(create_table_sql)
                 
-                # Insert data - OPTIMIZED CHUNKED METHOD for large datasets
-                if rows:
-                    insert_sql = generate_mysql_insert_sql(table_name, structures)
-                    
-                    # Process in smaller chunks to avoid memory issues and timeouts
-                    chunk_size = 1000  # Process 1000 records at a time
-                    total_rows = len(rows)
-                    processed_rows = 0
-                    
-                    print(f"📊 Processing {total_rows:,} records in chunks of {chunk_size:,}...", flush=True)
-                    
-                    for i in range(0, total_rows, chunk_size):
-                        chunk_rows = rows[i:i + chunk_size]
-                        batch_data = []
-                        
-                        # Prepare chunk data
-                        for row in chunk_rows:
-                            row_values = []
-                            for struct in structures:
-                                value = row.get(struct['name'])
-                                # Fix packet size issue - truncate very long strings
-                                if isinstance(value, str) and len(value) > 10000:
-                                    value = value[:10000]  # Truncate to 10KB
-                                row_values.append(value)
-                            batch_data.append(row_values)
-                        
-                        # Insert chunk
-                        try:
-                            cursor.executemany(insert_sql, batch_data)
-                            connection.commit()  # Commit each chunk
-                            processed_rows += len(chunk_rows)
-                            
-                            # Progress feedback
-                            progress = (processed_rows / total_rows) * 100
-                            print(f"📈 Progress: {processed_rows:,}/{total_rows:,} ({progress:.1f}%)", flush=True)
-                            
-                        except mysql.connector.Error as e:
-                            if "packet" in str(e).lower() or "1153" in str(e):
-                                # If packet error, truncate more aggressively and retry
-                                batch_data = []
-                                for row in chunk_rows:
-                                    row_values = []
-                                    for struct in structures:
-                                        value = row.get(struct['name'])
-                                        if isinstance(value, str) and len(value) > 1000:
-                                            value = value[:1000]  # Truncate to 1KB
-                                        row_values.append(value)
-                                    batch_data.append(row_values)
-                                cursor.executemany(insert_sql, batch_data)
-                                connection.commit()
-                                processed_rows += len(chunk_rows)
-                                progress = (processed_rows / total_rows) * 100
-                                print(f"📈 Progress: {processed_rows:,}/{total_rows:,} ({progress:.1f}%) - Retried with smaller chunks", flush=True)
-                            else:
-                                raise e
-                    
+                # Insert data - multi-row INSERTs sized to max_allowed_packet, one batch in memory at a time
+                insert_sql = generate_mysql_insert_sql(table_name, structures)
+                names = [struct['name'] for struct in structures]
+                batcher = InsertBatcher(cursor, connection, insert_sql, names, column_width_transforms(structures),
+                                        on_flush=lambda rows: print(f"📈 Progress: {rows:,} records inserted", flush=True))
+                
+                for batch in batches:
+                    batches_started = True
+                    batcher.add(batch)
+                processed_rows = batcher.finish()
+                
+                if processed_rows:
                     print(f"✅ Successfully processed {processed_rows:,} records", flush=True)
+                    print(f"📦 {batcher.describe()}", flush=True)
                 
             finally:
                 cursor.close()
                 connection.close()
             
             # If we get here, the operation was successful
-            break
+            return processed_rows
             
         except mysql.connector.Error as e:
             retry_count += 1
@@ -199,7 +564,8 @@ def sync_to_mysql(table_name, structures, rows):
             print(f"   Error Code: {e.errno}", flush=True)
             print(f"   SQL State: {e.sqlstate}", flush=True)
             
-            if "Lost connection" in str(e) and retry_count < max_retries:
+            can_replay = replayable or not batches_started
+            if "Lost connection" in str(e) and retry_count < max_retries and can_replay:
                 print(f"⚠️  Connection lost, retrying ({retry_count}/{max_retries})...", flush=True)
                 time.sleep(2)  # Wait before retry
                 continue
@@ -214,116 +580,76 @@ def sync_to_mysql(table_name, structures, rows):
             traceback.print_exc()
             raise e
 
+def column_width_transforms(structures):
+    """
+    RecordBatch.row_tuples transforms that cut strings to what their column can hold. Character
+    fields never exceed their DBF width, so only memo fields are cut, at TEXT's 65,535 bytes.
+    """
+    def truncate(values):
+        return [_truncate_utf8(value, TEXT_MAX_BYTES) if isinstance(value, str) and len(value) > TEXT_MAX_BYTES // 4
+                else value for value in values]
+    
+    return {struct['name']: truncate for struct in structures if struct.get('type') in MEMO_TYPES}
+
+def _truncate_utf8(value, limit):
+    encoded = value.encode('utf-8', 'surrogatepass')
+    if len(encoded) <= limit:
+        return value
+    return encoded[:limit].decode('utf-8', 'ignore')
+
 def sync_to_sqlite(table_name, structures, rows):
     """
     Create table and insert data in SQLite - OPTIMIZED VERSION
     """
+    return sync_to_sqlite_stream(table_name, structures, [RecordBatch.from_rows(structures, rows)])
+
+def sync_to_sqlite_stream(table_name, structures, batches, append=False):
+    """
+    Create table and insert data in SQLite from an iterable of RecordBatch objects.
+    Existing rows are deleted first (same as the MySQL TRUNCATE) unless `append` is set.
+    Returns the number of rows inserted.
+    """
     db_path = os.getenv("SQLITE_DB_PATH", "database.db")
     connection = sqlite3.connect(db_path)
     cursor = connection.cursor()
+    processed_rows = 0
     
     try:
         # Create table if not exists
         create_table_sql = generate_sqlite_create_table(table_name, structures)
         cursor.execute(create_table_sql)
+        if not append:
+            cursor.execute(f"DELETE FROM [{table_name}]")
         
         # Insert data - OPTIMIZED BATCH METHOD
-        if rows:
-            insert_sql = generate_sqlite_insert_sql(table_name, structures)
-            
-            # Prepare all rows data in batch
-            batch_data = []
-            for row in rows:
-                row_values = [row.get(struct['name']) for struct in structures]
-                batch_data.append(row_values)
+        insert_sql = generate_sqlite_insert_sql(table_name, structures)
+        names = [struct['name'] for struct in structures]
+        for batch in batches:
+            batch_data = batch.row_tuples(names)
             
             # Use executemany for batch insert - MUCH FASTER!
             cursor.executemany(insert_sql, batch_data)
+            processed_rows += len(batch_data)
         
         connection.commit()
         
     finally:
         cursor.close()
         connection.close()
+    
+    return processed_rows
 
 def generate_mysql_create_table(table_name, structures):
     """
-    Generate MySQL CREATE TABLE SQL
-    """
-    columns = []
-    
-    for structure in structures:
-        name = structure['name']
-        type_code = structure['type']
-        size = structure.get('size')
-        decs = structure.get('decs')
-        
-        if type_code == 'D':  # Date
-            column_def = f"`{name}` VARCHAR(255)"
-        elif type_code == 'T':  # DateTime/Timestamp
-            column_def = f"`{name}` VARCHAR(255)"
-        elif type_code == 'C':  # Character/String
-            if size and size > 255:
-                column_def = f"`{name}` TEXT"
-            else:
-                column_def = f"`{name}` VARCHAR({size or 255})"
-        elif type_code == 'N':  # Numeric
-            if decs and decs > 0:
-                column_def = f"`{name}` DECIMAL({size or 10}, {decs})"
-            else:
-                column_def = f"`{name}` INT"
-        elif type_code == 'F':  # Float
-            column_def = f"`{name}` FLOAT"
-        elif type_code == 'L':  # Logical/Boolean
-            column_def = f"`{name}` BOOLEAN"
-        else:
-            column_def = f"`{name}` TEXT"  # fallback
-            
-        columns.append(column_def)
-    
-    return f"""
-    CREATE TABLE IF NOT EXISTS `{table_name}` (
-        {', '.join(columns)}
-    )
+    Generate MySQL CREATE TABLE SQL (column types from table_schema.py)
     """
+    return create_table_sql(table_name, structures, "mysql")
 
 def generate_sqlite_create_table(table_name, structures):
     """
-    Generate SQLite CREATE TABLE SQL
-    """
-    columns = []
-    
-    for structure in structures:
-        name = structure['name']
-        type_code = structure['type']
-        size = structure.get('size')
-        decs = structure.get('decs')
-        
-        if type_code == 'D':  # Date
-            column_def = f"[{name}] TEXT"
-        elif type_code == 'T':  # DateTime/Timestamp
-            column_def = f"[{name}] TEXT"
-        elif type_code == 'C':  # Character/String
-            column_def = f"[{name}] TEXT"
-        elif type_code == 'N':  # Numeric
-            if decs and decs > 0:
-                column_def = f"[{name}] REAL"
-            else:
-                column_def = f"[{name}] INTEGER"
-        elif type_code == 'F':  # Float
-            column_def = f"[{name}] REAL"
-        elif type_code == 'L':  # Logical/Boolean
-            column_def = f"[{name}] INTEGER"  # SQLite doesn't have native boolean
-        else:
-            column_def = f"[{name}] TEXT"  # fallback
-            
-        columns.append(column_def)
-    
-    return f"""
-    CREATE TABLE IF NOT EXISTS [{table_name}] (
-        {', '.join(columns)}
-    )
+    Generate SQLite CREATE TABLE SQL (column types from table_schema.py)
     """
+    return create_table_sql(table_name, structures, "sqlite")
 
 def generate_mysql_insert_sql(table_name, structures):
     """
@@ -353,6 +679,14 @@ def sync_to_postgresql(table_name, structures, rows):
     """
     Create table and insert data in PostgreSQL - OPTIMIZED VERSION
     """
+    return sync_to_postgresql_stream(table_name, structures, [RecordBatch.from_rows(structures, rows)])
+
+def sync_to_postgresql_stream(table_name, structures, batches, append=False):
+    """
+    Create table and insert data in PostgreSQL from an iterable of RecordBatch objects.
+    The table is truncated first (same as MySQL) unless `append` is set.
+    Returns the number of rows inserted.
+    """
     try:
         import psycopg2
     except ImportError:
@@ -368,71 +702,38 @@ def sync_to_postgresql(table_name, structures, rows):
     )
     
     cursor = connection.cursor()
+    processed_rows = 0
     
     try:
         # Create table if not exists
         create_table_sql = generate_postgresql_create_table(table_name, structures)
         cursor.execute(create_table_sql)
+        if not append:
+            cursor.execute(f'TRUNCATE TABLE "{table_name}"')
         
         # Insert data - OPTIMIZED BATCH METHOD
-        if rows:
-            insert_sql = generate_postgresql_insert_sql(table_name, structures)
-            
-            # Prepare all rows data in batch
-            batch_data = []
-            for row in rows:
-                row_values = [row.get(struct['name']) for struct in structures]
-                batch_data.append(row_values)
+        insert_sql = generate_postgresql_insert_sql(table_name, structures)
+        names = [struct['name'] for struct in structures]
+        for batch in batches:
+            batch_data = batch.row_tuples(names)
             
             # Use executemany for batch insert - MUCH FASTER!
             cursor.executemany(insert_sql, batch_data)
+            processed_rows += len(batch_data)
         
         connection.commit()
         
     finally:
         cursor.close()
         connection.close()
+    
+    return processed_rows
 
 def generate_postgresql_create_table(table_name, structures):
     """
-    Generate PostgreSQL CREATE TABLE SQL
+    Generate PostgreSQL CREATE TABLE SQL (column types from table_schema.py)
     """
-    columns = []
-    
-    for structure in structures:
-        name = structure['name']
-        type_code = structure['type']
-        size = structure.get('size')
-        decs = structure.get('decs')
-        
-        if type_code == 'D':  # Date
-            column_def = f'"{name}" VARCHAR(255)'
-        elif type_code == 'T':  # DateTime/Timestamp
-            column_def = f'"{name}" VARCHAR(255)'
-        elif type_code == 'C':  # Character/String
-            if size and size > 255:
-                column_def = f'"{name}" TEXT'
-            else:
-                column_def = f'"{name}" VARCHAR({size or 255})'
-        elif type_code == 'N':  # Numeric
-            if decs and decs > 0:
-                column_def = f'"{name}" DECIMAL({size or 10}, {decs})'
-            else:
-                column_def = f'"{name}" INTEGER'
-        elif type_code == 'F':  # Float
-            column_def = f'"{name}" REAL'
-        elif type_code == 'L':  # Logical/Boolean
-            column_def = f'"{name}" BOOLEAN'
-        else:
-            column_def = f'"{name}" TEXT'  # fallback
-            
-        columns.append(column_def)
-    
-    return f'''
-    CREATE TABLE IF NOT EXISTS "{table_name}" (
-        {', '.join(columns)}
-    )
-    '''
+    return create_table_sql(table_name, structures, "postgresql")
 
 def generate_postgresql_insert_sql(table_name, structures):
     """
@@ -447,13 +748,9 @@ def generate_postgresql_insert_sql(table_name, structures):
     '''
 
 def create_sync_logs_table():
+    connection = None
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "your_database"),
-        )
+        connection = mysql_pool.connect()
 
         cursor = connection.cursor()
 
@@ -466,13 +763,13 @@ def create_sync_logs_table():
 
         cursor.execute(create_table_sql)
         connection.commit()
+        cursor.close()
         print("Table 'sync_logs' created or already exists.", flush=True)
 
     except Error as e:
         print(f"Error creating table: {e}", flush=True)
     finally:
-        if connection.is_connected():
-            cursor.close()
+        if connection is not None:
             connection.close()
 
 # Example usage:
@@ -0,0 +1,96 @@
+"""
+Secondary indexes of the synced MySQL tables, built after bulk loads instead of during them.
+
+The "indexes" of each table in tables.json match the lookups the PHP sync runs:
+
+    syncEntity / main.php    rows by Converter::primaryKey (key IN (...)),
+                             changed rows (UPDATED_ON > ... ORDER BY UPDATED_ON)
+    syncArtranAndIctran      artran by DATE >= ... AND TYPE != 'DO' ORDER BY DATE,
+                             ictran joined to artran on REFNO
+
+Full loads into a staging table (sync_database.load_mysql_via_staging) drop every
+secondary index, load with unique_checks / foreign_key_checks off and then build all
+indexes in one ALTER TABLE. Tables loaded in place only get the indexes they lack.
+Indexes on missing or TEXT columns are skipped with a note.
+"""
+
+import time
+
+from mysql.connector import Error
+
+from table_manifest import table_by_name
+
+# Column types MySQL cannot index without a prefix length
+_UNINDEXABLE_TYPES = ("text", "blob")
+
+
+def table_indexes(table_name):
+    """Column lists of the secondary indexes tables.json gives a table (none if it is not listed)"""
+    spec = table_by_name(table_name)
+    return spec.indexes if spec is not None else []
+
+
+def index_name(columns):
+    return "idx_" + "_".join(column.lower() for column in columns)
+
+
+def index_columns(cursor, table_name):
+    """{index name: [column names, upper case, in index order]} for the secondary indexes of a table"""
+    cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+    positions = {}
+    for row in cursor.fetchall():
+        # Key_name, Seq_in_index, Column_name
+        if row[2] != 'PRIMARY':
+            positions.setdefault(row[2], {})[row[3]] = (row[4] or "").upper()
+    return {name: [columns[position] for position in sorted(columns)] for name, columns in positions.items()}
+
+
+def missing_indexes(cursor, table_name, spec_table=None, existing=None):
+    """
+    "ADD INDEX" clauses for the manifest indexes of `spec_table` (default `table_name`)
+    that no index of `existing` ({name: columns}, default: the indexes of `table_name`)
+    already starts with.
+    """
+    spec = table_indexes(spec_table or table_name)
+    if not spec:
+        return []
+    if existing is None:
+        existing = index_columns(cursor, table_name)
+    cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+    column_types = {row[0].upper(): str(row[1]).lower() for row in cursor.fetchall()}
+    clauses = []
+    for columns in spec:
+        wanted = [column.upper() for column in columns]
+        if any(indexed[:len(wanted)] == wanted for indexed in existing.values()):
+            continue
+        unusable = [column for column in columns
+                    if column.upper() not in column_types
+                    or any(kind in column_types[column.upper()] for kind in _UNINDEXABLE_TYPES)]
+        if unusable:
+            print(f"⚠️  Not indexing {table_name} on {', '.join(columns)}: "
+                  f"{', '.join(unusable)} missing or not indexable", flush=True)
+            continue
+        column_list = ", ".join(f"`{column}`" for column in columns)
+        clauses.append(f"ADD INDEX `{index_name(columns)}` ({column_list})")
+    return clauses
+
+
+def build_indexes(cursor, table_name, clauses):
+    """All `clauses` in one ALTER TABLE (a single rebuild); returns the seconds it took"""
+    if not clauses:
+        return 0.0
+    start = time.time()
+    cursor.execute(f"ALTER TABLE `{table_name}` " + ", ".join(clauses))
+    return time.time() - start
+
+
+def ensure_table_indexes(cursor, table_name):
+    """Add the manifest indexes a live table lacks; failures are reported and ignored"""
+    try:
+        clauses = missing_indexes(cursor, table_name)
+        if clauses:
+            seconds = build_indexes(cursor, table_name, clauses)
+            print(f"🗂️  Added {len(clauses)} indexes to {table_name} in {seconds:.2f}s", flush=True)
+    except Error as e:
+        print(f"⚠️  Could not add indexes to {table_name}: {e}", flush=True)
+
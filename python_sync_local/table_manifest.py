@@ -0,0 +1,154 @@
+"""
+The synced tables, declared in tables.json (or the file TABLE_MANIFEST names).
+
+    {
+      "source": {"root": "C:/", "subpath": "Sample"},
+      "params": {"SKIP_BEFORE_DATE": "20251201", ...},
+      "tables": {"ictran": {"directory": "UBSSTK2015", "keys": ["REFNO", "ITEMCOUNT"], ...}, ...}
+    }
+
+Tables are synced in the order they are listed. Per table:
+
+    directory          UBS directory of the DBF; the table is ubs_<directory>_<name>
+    path               DBF path, default {root}/{directory}/{subpath}/{name}.dbf
+    keys               row key columns, the same as Converter::primaryKey on the PHP side
+    filter             row filter in row_filters.py syntax ($NAME = a param)
+    skip_before_date   drop records dated before this YYYYMMDD (a param allowed)
+    load               how a full load replaces the table:
+                         swap      MySQL staging table + RENAME (sync_database.load_mysql_via_staging)
+                         truncate  empty and reload the table in place
+                         delta     apply only the inserts / updates / deletes (delta_load.py, needs
+                                   keys); a first or failed delta load is a swap
+                         auto      pick from the table's history each run (load_strategy.py)
+    strategies         full loads "auto" may pick, default ["delta", "swap"]
+    incremental        what is read between full loads: "append" (new records only,
+                       watermark.py), "blocks" (changed blocks, block_sync.py, needs keys) or null
+    shards             MySQL connections a staging load uses at once (shard_load.py)
+    sort               full loads go in key order (key_sort.py)
+    read_workers       decoder processes reading the DBF (parallel_reader.py, default DBF_WORKERS)
+    depends_on         tables that must finish first when tables sync in parallel
+    every, priority    interval ("90s", "2m", "1h") and priority (1 first) in scheduled mode
+    indexes            secondary MySQL indexes, lists of columns (table_indexes.py)
+    note               free text
+
+The environment overrides the manifest: DBF_ROOT and DBF_SUBPATH the source, a
+variable named like a param that param, FILTER_<NAME> a table's filter and
+LOAD_<NAME> its load. Pointing
+DBF_ROOT (or TABLE_MANIFEST) at sample DBFs runs the whole pipeline anywhere.
+"""
+
+import json
+import os
+
+from table_scheduler import parse_interval
+
+MANIFEST_FILE = os.getenv("TABLE_MANIFEST", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables.json"))
+LOAD_STRATEGIES = ("swap", "truncate", "delta", "auto")
+FULL_STRATEGIES = ("swap", "truncate", "delta")
+INCREMENTAL_STRATEGIES = ("append", "blocks")
+_TABLE_FIELDS = frozenset(["directory", "path", "keys", "filter", "skip_before_date", "load", "strategies",
+                           "incremental", "shards", "sort", "read_workers", "depends_on", "every", "priority",
+                           "indexes", "note"])
+# Interval and priority of tables without "every" / "priority"
+DEFAULT_EVERY = "15m"
+DEFAULT_PRIORITY = 2
+
+_tables = None
+
+
+class TableSpec:
+    """One table of the manifest, with params substituted and defaults filled in"""
+
+    def __init__(self, name, entry, source, params):
+        unknown = set(entry) - _TABLE_FIELDS
+        if unknown:
+            raise ValueError(f"unknown settings {', '.join(sorted(unknown))}")
+        if not entry.get("directory"):
+            raise ValueError("no directory")
+        self.name = name.lower()
+        self.directory = entry["directory"]
+        self.file_name = self.name + ".dbf"
+        self.path = str(entry.get("path") or "{root}/{directory}/{subpath}/{name}.dbf").format(
+            root=source["root"].rstrip("/\\"), directory=self.directory, subpath=source["subpath"], name=self.name)
+        self.table_name = f"ubs_{self.directory.lower()}_{self.name}"
+        self.keys = list(entry.get("keys") or []) or None
+        self.filter = os.getenv(f"FILTER_{self.name.upper()}", entry.get("filter"))
+        self.params = params
+        self.skip_before_date = _substitute(entry.get("skip_before_date"), params)
+        self.load = os.getenv(f"LOAD_{self.name.upper()}", entry.get("load", "swap")).strip().lower()
+        self.load_overridden = f"LOAD_{self.name.upper()}" in os.environ
+        self.strategies = list(entry.get("strategies", ["delta", "swap"]))
+        self.incremental = entry.get("incremental")
+        self.shards = max(1, int(entry.get("shards", 1)))
+        self.sort = bool(entry.get("sort", False))
+        self.read_workers = entry.get("read_workers")
+        self.depends_on = [dependency.lower() for dependency in entry.get("depends_on", [])]
+        self.every = parse_interval(entry.get("every", DEFAULT_EVERY))
+        self.priority = int(entry.get("priority", DEFAULT_PRIORITY))
+        self.indexes = [list(columns) for columns in entry.get("indexes", [])]
+
+        if self.load not in LOAD_STRATEGIES:
+            raise ValueError(f"load must be one of {', '.join(LOAD_STRATEGIES)}, not {self.load!r}")
+        unknown = [strategy for strategy in self.strategies if strategy not in FULL_STRATEGIES]
+        if unknown:
+            raise ValueError(f"strategies must be among {', '.join(FULL_STRATEGIES)}, not {', '.join(unknown)}")
+        if self.incremental is not None and self.incremental not in INCREMENTAL_STRATEGIES:
+            raise ValueError(f"incremental must be one of {', '.join(INCREMENTAL_STRATEGIES)} or null, "
+                             f"not {self.incremental!r}")
+        needs_keys = [setting for setting, used in (("load delta", self.load == "delta"),
+                                                    ("incremental blocks", self.incremental == "blocks"),
+                                                    ("sort", self.sort)) if used]
+        if needs_keys and not self.keys:
+            raise ValueError(f"{', '.join(needs_keys)} needs keys")
+
+    def __repr__(self):
+        return f"TableSpec({self.name!r}, {self.path!r})"
+
+
+def _substitute(value, params):
+    # "$NAME" -> the param's value
+    if isinstance(value, str) and value.startswith("$"):
+        if value[1:] not in params:
+            raise ValueError(f"unknown param {value}")
+        return params[value[1:]]
+    return value
+
+
+def load_manifest(path=None):
+    """{dbf name: TableSpec} from a manifest file, in the order listed; ValueError if it is invalid"""
+    path = path or MANIFEST_FILE
+    with open(path, encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    source = dict(manifest.get("source", {}))
+    source["root"] = os.getenv("DBF_ROOT", source.get("root", "C:/"))
+    source["subpath"] = os.getenv("DBF_SUBPATH", source.get("subpath", "Sample"))
+    params = {name: os.getenv(name, str(default)) for name, default in manifest.get("params", {}).items()}
+
+    tables = {}
+    for name, entry in manifest.get("tables", {}).items():
+        try:
+            spec = TableSpec(name, entry, source, params)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}: table {name}: {e}") from None
+        tables[spec.name] = spec
+    for spec in tables.values():
+        missing = [dependency for dependency in spec.depends_on if dependency not in tables]
+        if missing:
+            raise ValueError(f"{path}: table {spec.name}: depends_on unknown tables {', '.join(missing)}")
+    return tables
+
+
+def get_tables():
+    """The tables of MANIFEST_FILE, loaded once"""
+    global _tables
+    if _tables is None:
+        _tables = load_manifest()
+    return _tables
+
+
+def table_by_name(table_name):
+    """TableSpec of a database table name (or DBF name), or None"""
+    tables = get_tables()
+    if table_name in tables:
+        return tables[table_name]
+    return next((spec for spec in tables.values() if spec.table_name == table_name), None)
@@ -0,0 +1,363 @@
+"""
+Parallel table syncing for sync_all: a fixed pool of worker threads, biggest tables first.
+
+Every worker syncs one table at a time from start to finish (read, load, save
+its sync state) on its own database connections, so independent tables load
+side by side instead of one after another:
+
+    - Ready tables are handed out by weight (the record count in the DBF
+      header) plus the weight of every table waiting on them, so a big table
+      and whatever depends on it start early instead of being the tail of
+      the run.
+    - A table only starts once the tables it depends on are finished. A
+      dependency is an ordering only: a failed table still lets its
+      dependents run, as in a serial sync.
+    - Output of worker threads is written a whole line at a time with the
+      table name in front, so lines of different tables never mix.
+
+describe_workers() reports how busy each worker was for the run summary.
+
+RecurringScheduler keeps syncing instead (python main.py --schedule): every
+table has an interval and a priority, e.g. ictran every 2 minutes and apvend
+hourly, and the same fixed pool of workers is the budget shared by all tables.
+
+    - A table is queued when it comes due, with its next due time as the
+      deadline. Free workers take the queued table with the best priority,
+      then the earliest deadline; tables wait for their dependencies as above.
+    - A table is never queued twice: one that comes due (or is triggered)
+      while it is queued or running runs once more afterwards, however many
+      intervals it missed.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Tables synced at once (each worker has its own database connections); 1 = one table at a time, in order
+SYNC_WORKERS = os.getenv("SYNC_WORKERS", "4")
+
+
+def resolve_sync_workers(db_type=None, workers=None):
+    """Worker count from the argument or SYNC_WORKERS; SQLite takes one writer at a time, so always 1"""
+    db_type = db_type or os.getenv("DB_TYPE", "mysql")
+    if db_type == "sqlite":
+        return 1
+    value = SYNC_WORKERS if workers is None else workers
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        print(f"⚠️  Invalid SYNC_WORKERS value {value!r}, syncing one table at a time", flush=True)
+        return 1
+
+
+class WorkerStats:
+    def __init__(self, number):
+        self.number = number
+        self.busy = 0.0
+        self.tables = []
+
+
+class TableScheduler:
+    """
+    Runs `run_table(spec)` for each spec on `workers` threads.
+
+    name(spec)    -> table name, used for dependencies and the output prefix
+    weight(spec)  -> estimated size (e.g. the DBF record count)
+    dependencies  -> {name: [names that must finish first]}; names not being synced are ignored
+
+    run(specs) returns {name: what run_table returned}, or the exception it raised.
+    """
+
+    def __init__(self, run_table, workers, name, weight, dependencies=None):
+        self.run_table = run_table
+        self.workers = workers
+        self.name = name
+        self.weight = weight
+        self.dependencies = dependencies or {}
+        self.wall_seconds = 0.0
+        self.worker_stats = []
+        self._condition = threading.Condition()
+
+    def run(self, specs):
+        by_name = {self.name(spec): spec for spec in specs}
+        waiting_on = {name: {dependency for dependency in self.dependencies.get(name, ()) if dependency in by_name}
+                      for name in by_name}
+        priority = self.priorities(by_name, waiting_on)
+        self._pending = dict(by_name)
+        self._waiting_on = waiting_on
+        self._priority = priority
+        self._results = {}
+
+        start = time.time()
+        output = _LineOutput(sys.stdout)
+        sys.stdout = output
+        try:
+            self.worker_stats = [WorkerStats(number + 1) for number in range(self.workers)]
+            threads = [threading.Thread(target=self._worker, args=(stats, output), name=f"sync-worker-{stats.number}")
+                       for stats in self.worker_stats]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.stdout = output.target
+        self.wall_seconds = time.time() - start
+        return self._results
+
+    def priorities(self, by_name, waiting_on):
+        """Weight of each table plus the heaviest chain of tables waiting on it"""
+        dependents = {name: [other for other, needs in waiting_on.items() if name in needs] for name in by_name}
+        weights = {name: self.weight(spec) for name, spec in by_name.items()}
+        priority = {}
+        visiting = set()
+
+        def chain(name):
+            if name not in priority:
+                if name in visiting:
+                    raise ValueError(f"Table dependencies form a cycle through {name}")
+                visiting.add(name)
+                priority[name] = weights[name] + max((chain(other) for other in dependents[name]), default=0)
+                visiting.discard(name)
+            return priority[name]
+
+        for name in by_name:
+            chain(name)
+        return priority
+
+    def describe_workers(self):
+        """One line per worker: busy time, share of the run and the tables it synced"""
+        lines = []
+        for stats in self.worker_stats:
+            share = stats.busy / self.wall_seconds if self.wall_seconds else 0.0
+            lines.append(f"Worker {stats.number}: {stats.busy:.2f}s busy ({share:.0%}), "
+                         f"{len(stats.tables)} tables: {', '.join(stats.tables) or '-'}")
+        return lines
+
+    def _next_table(self):
+        # Highest priority table whose dependencies are finished; None when nothing is left
+        with self._condition:
+            while self._pending:
+                ready = [name for name in self._pending if not self._waiting_on[name]]
+                if ready:
+                    name = max(ready, key=lambda candidate: self._priority[candidate])
+                    return name, self._pending.pop(name)
+                self._condition.wait()
+            return None
+
+    def _finished(self, name, result):
+        with self._condition:
+            self._results[name] = result
+            for needs in self._waiting_on.values():
+                needs.discard(name)
+            self._condition.notify_all()
+
+    def _worker(self, stats, output):
+        while True:
+            task = self._next_table()
+            if task is None:
+                return
+            name, spec = task
+            output.set_prefix(f"[{name}] ")
+            start = time.time()
+            try:
+                result = self.run_table(spec)
+            except Exception as e:
+                print(f"❌ Error processing {name}: {e}", flush=True)
+                result = e
+            finally:
+                stats.busy += time.time() - start
+                stats.tables.append(name)
+                output.end_table()
+            self._finished(name, result)
+
+
+def parse_interval(text):
+    """Seconds from "90", "90s", "2m" or "1h" """
+    text = str(text).strip().lower()
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class _Recurring:
+    def __init__(self, spec, interval, priority, due):
+        self.spec = spec
+        self.interval = interval
+        self.priority = priority
+        self.due = due
+        self.started = None
+        self.running = False
+        self.requested = False
+        self.runs = 0
+        self.busy = 0.0
+        self.last = None
+
+
+class RecurringScheduler:
+    """
+    Runs `run_table(spec)` for each spec again and again on `workers` threads, until stopped.
+
+    name(spec)      -> table name, used for dependencies, trigger() and the output prefix
+    schedule(spec)  -> (interval in seconds, priority); lower priority numbers go first
+    dependencies    -> {name: [names that must not be queued or running]}; no cycles
+
+    run(specs, stop) blocks until the `stop` event is set (or Ctrl+C); every table is due at the start.
+    """
+
+    def __init__(self, run_table, workers, name, schedule, dependencies=None):
+        self.run_table = run_table
+        self.workers = workers
+        self.name = name
+        self.schedule = schedule
+        self.dependencies = dependencies or {}
+        self.started_at = None
+        self.worker_stats = []
+        self._tables = {}
+        self._stop = threading.Event()
+        self._condition = threading.Condition()
+
+    def run(self, specs, stop=None):
+        self._stop = stop or threading.Event()
+        now = time.monotonic()
+        self._tables = {}
+        for spec in specs:
+            interval, priority = self.schedule(spec)
+            self._tables[self.name(spec)] = _Recurring(spec, interval, priority, now)
+        self.started_at = now
+
+        output = _LineOutput(sys.stdout)
+        sys.stdout = output
+        self.worker_stats = [WorkerStats(number + 1) for number in range(self.workers)]
+        threads = [threading.Thread(target=self._worker, args=(stats, output), name=f"sync-worker-{stats.number}")
+                   for stats in self.worker_stats]
+        try:
+            for thread in threads:
+                thread.start()
+            while not self._stop.wait(0.5):
+                pass
+        finally:
+            self._stop.set()
+            with self._condition:
+                self._condition.notify_all()
+            for thread in threads:
+                thread.join()
+            sys.stdout = output.target
+
+    def trigger(self, name):
+        """Make a table due now (it still runs only once if it is already queued or running)"""
+        with self._condition:
+            table = self._tables.get(name)
+            if table is None:
+                return
+            if table.running:
+                table.requested = True
+            else:
+                table.due = min(table.due, time.monotonic())
+            self._condition.notify_all()
+
+    def describe(self):
+        """One line per table: interval, priority, runs, busy time and what its last run returned"""
+        with self._condition:
+            return [f"{name} every {table.interval:g}s (priority {table.priority}): {table.runs} runs, "
+                    f"{table.busy:.2f}s busy, last: {table.last if table.runs else '-'}"
+                    for name, table in sorted(self._tables.items(), key=lambda item: (item[1].priority, item[0]))]
+
+    def busy_share(self):
+        """Share of the worker time since the start spent syncing"""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        with self._condition:
+            busy = sum(table.busy for table in self._tables.values())
+        return busy / (elapsed * self.workers) if elapsed else 0.0
+
+    def _blocked(self, name, now):
+        # A dependency that is running or queued goes first
+        for dependency in self.dependencies.get(name, ()):
+            other = self._tables.get(dependency)
+            if other is not None and (other.running or other.due <= now):
+                return True
+        return False
+
+    def _next_table(self):
+        with self._condition:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                ready = [(name, table) for name, table in self._tables.items()
+                         if table.due <= now and not table.running and not self._blocked(name, now)]
+                if ready:
+                    name, table = min(ready, key=lambda item: (item[1].priority, item[1].due + item[1].interval))
+                    table.running = True
+                    table.requested = False
+                    table.started = now
+                    return name, table
+                upcoming = [table.due for table in self._tables.values() if not table.running and table.due > now]
+                self._condition.wait(timeout=min(upcoming) - now if upcoming else None)
+            return None
+
+    def _finished(self, table, result, seconds):
+        with self._condition:
+            table.running = False
+            table.runs += 1
+            table.busy += seconds
+            table.last = result
+            # Missed intervals collapse into one run, right away
+            table.due = time.monotonic() if table.requested else table.started + table.interval
+            self._condition.notify_all()
+
+    def _worker(self, stats, output):
+        while True:
+            task = self._next_table()
+            if task is None:
+                return
+            name, table = task
+            output.set_prefix(f"[{name}] ")
+            start = time.time()
+            try:
+                result = self.run_table(table.spec)
+            except Exception as e:
+                print(f"❌ Error processing {name}: {e}", flush=True)
+                result = e
+            finally:
+                seconds = time.time() - start
+                stats.busy += seconds
+                output.end_table()
+            self._finished(table, result, seconds)
+
+
+class _LineOutput:
+    """stdout replacement writing each thread's output a whole line at a time, behind that thread's prefix"""
+
+    def __init__(self, target):
+        self.target = target
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def set_prefix(self, prefix):
+        self._local.prefix = prefix
+        self._local.pending = ""
+
+    def end_table(self):
+        pending = getattr(self._local, "pending", "")
+        if pending:
+            self.write("\n")
+        self._local.prefix = ""
+
+    def write(self, text):
+        prefix = getattr(self._local, "prefix", "")
+        if not prefix:
+            with self._lock:
+                return self.target.write(text)
+        text_so_far = self._local.pending + text
+        lines = text_so_far.split("\n")
+        self._local.pending = lines.pop()
+        if lines:
+            with self._lock:
+                self.target.write("".join(f"{prefix}{line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        self.target.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
@@ -0,0 +1,138 @@
+"""
+DBF field -> SQL column types, the one mapping every loader creates tables with.
+
+    DBF field                 MySQL              PostgreSQL          SQLite
+    C (up to 255)             VARCHAR(size)      VARCHAR(size)       TEXT
+    C (wider), M/G/P/W, ?     TEXT               TEXT                TEXT
+    D                         DATE               DATE                TEXT (ISO)
+    T / @                     DATETIME(3)        TIMESTAMP           TEXT (ISO)
+    N with decimals, Y        DECIMAL(size, d)   NUMERIC(size, d)    REAL
+    N without decimals        TINYINT .. BIGINT by width             INTEGER
+    I                         INT                INTEGER             INTEGER
+    F                         FLOAT              REAL                REAL
+    B                         DOUBLE             DOUBLE PRECISION    REAL
+    L                         TINYINT(1)         BOOLEAN             INTEGER
+
+Dates used to be VARCHAR(255) in MySQL: a DATE column takes 3 bytes and date
+ranges (artran DATE >= ...) can use an index. Timestamps keep the milliseconds
+a DBF T field stores. Integers get the smallest type that holds every value of
+the field's width.
+
+Existing tables keep their column types until they are migrated:
+    - a full load into a staging table creates the staging table with these
+      types whenever the live one differs, so the swap migrates the table
+    - `python main.py --migrate-schema [table ...]` alters existing MySQL
+      tables in place (compact YYYYMMDD text is rewritten as YYYY-MM-DD, date
+      text that is not a valid date becomes NULL)
+"""
+
+import time
+
+# Widest integer (in digits, sign included) each MySQL integer type holds
+_MYSQL_INTEGERS = [(2, "TINYINT"), (4, "SMALLINT"), (6, "MEDIUMINT"), (9, "INT"), (18, "BIGINT")]
+_POSTGRESQL_INTEGERS = [(4, "SMALLINT"), (9, "INTEGER"), (18, "BIGINT")]
+# Text that can be converted when a column becomes DATE / DATETIME; anything else becomes NULL
+_DATE_TEXT = "^[1-9][0-9]{3}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])([ T][0-9]{2}:[0-9]{2}:[0-9]{2}([.][0-9]+)?)?$"
+# YYYYMMDD, as the dbflib reader wrote D fields; rewritten as YYYY-MM-DD before the conversion
+_COMPACT_DATE_TEXT = "^[1-9][0-9]{3}(0[1-9]|1[0-2])(0[1-9]|[12][0-9]|3[01])$"
+
+
+def column_type(field, dialect):
+    """SQL type of a DBF field ({"name", "type", "size", "decs"}) in `dialect`"""
+    type_code = field.get('type')
+    size = field.get('size') or 0
+    decs = field.get('decs') or 0
+    if dialect == "sqlite":
+        if type_code in ('N', 'Y'):
+            return "REAL" if decs or type_code == 'Y' else "INTEGER"
+        return {'I': "INTEGER", 'L': "INTEGER", 'F': "REAL", 'B': "REAL"}.get(type_code, "TEXT")
+    mysql = dialect == "mysql"
+    if type_code == 'C' and 0 < size <= 255:
+        return f"VARCHAR({size})"
+    if type_code == 'D':
+        return "DATE"
+    if type_code in ('T', '@'):
+        return "DATETIME(3)" if mysql else "TIMESTAMP"
+    if type_code == 'Y':
+        return "DECIMAL(19,4)" if mysql else "NUMERIC(19,4)"
+    if type_code == 'N' and decs:
+        return f"DECIMAL({max(size, decs + 1)},{decs})" if mysql else f"NUMERIC({max(size, decs + 1)},{decs})"
+    if type_code == 'N':
+        for digits, name in (_MYSQL_INTEGERS if mysql else _POSTGRESQL_INTEGERS):
+            if (size or 10) <= digits:
+                return name
+        return f"DECIMAL({size},0)" if mysql else f"NUMERIC({size},0)"
+    if type_code == 'I':
+        return "INT" if mysql else "INTEGER"
+    if type_code == 'F':
+        return "FLOAT" if mysql else "REAL"
+    if type_code == 'B':
+        return "DOUBLE" if mysql else "DOUBLE PRECISION"
+    if type_code == 'L':
+        return "TINYINT(1)" if mysql else "BOOLEAN"
+    return "TEXT"
+
+
+def quote_identifier(name, dialect):
+    if dialect == "mysql":
+        return f"`{name}`"
+    if dialect == "sqlite":
+        return f"[{name}]"
+    return f'"{name}"'
+
+
+def create_table_sql(table_name, structures, dialect):
+    """CREATE TABLE IF NOT EXISTS for the DBF fields in `structures`"""
+    columns = ", ".join(f"{quote_identifier(field['name'], dialect)} {column_type(field, dialect)}"
+                        for field in structures)
+    return f"CREATE TABLE IF NOT EXISTS {quote_identifier(table_name, dialect)} ({columns})"
+
+
+def _normalize_mysql_type(column_type_text):
+    # information_schema COLUMN_TYPE -> the form column_type() writes (display widths dropped)
+    text = str(column_type_text).upper().replace(" ", "")
+    if text.startswith(("TINYINT(1)", "BOOL")):
+        return "TINYINT(1)"
+    for name in ("TINYINT", "SMALLINT", "MEDIUMINT", "BIGINT", "INT"):
+        if text.startswith(name):
+            return name
+    return text.replace("UNSIGNED", "")
+
+
+def mysql_schema_changes(cursor, table_name, structures):
+    """[(column, current type, wanted type)] for the columns of an existing MySQL table that differ"""
+    cursor.execute("SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.columns "
+                   "WHERE table_schema = DATABASE() AND table_name = %s", (table_name,))
+    current = {name.upper(): (name, column) for name, column in cursor.fetchall()}
+    changes = []
+    for field in structures:
+        if field['name'].upper() not in current:
+            continue
+        name, existing = current[field['name'].upper()]
+        wanted = column_type(field, "mysql")
+        if _normalize_mysql_type(existing) != _normalize_mysql_type(wanted):
+            changes.append((name, str(existing), wanted))
+    return changes
+
+
+def migrate_mysql_table(cursor, table_name, structures):
+    """
+    ALTER an existing MySQL table's columns to the types of column_type() in one statement.
+    Text in columns becoming DATE / DATETIME is prepared first: YYYYMMDD becomes YYYY-MM-DD,
+    anything else that is not a valid date becomes NULL.
+    Returns the changes applied.
+    """
+    changes = mysql_schema_changes(cursor, table_name, structures)
+    if not changes:
+        return []
+    for name, existing, wanted in changes:
+        if wanted.startswith("DATE") and not existing.upper().startswith(("DATE", "TIMESTAMP")):
+            cursor.execute(f"UPDATE `{table_name}` SET `{name}` = CONCAT(LEFT(`{name}`, 4), '-', "
+                           f"SUBSTRING(`{name}`, 5, 2), '-', RIGHT(`{name}`, 2)) WHERE `{name}` REGEXP %s",
+                           (_COMPACT_DATE_TEXT,))
+            cursor.execute(f"UPDATE `{table_name}` SET `{name}` = NULL WHERE `{name}` NOT REGEXP %s", (_DATE_TEXT,))
+    start = time.time()
+    cursor.execute(f"ALTER TABLE `{table_name}` " + ", ".join(f"MODIFY `{name}` {wanted}" for name, _, wanted in changes))
+    print(f"🧬 Migrated {len(changes)} columns of {table_name} in {time.time() - start:.2f}s: "
+          + ", ".join(f"{name} {existing} -> {wanted}" for name, existing, wanted in changes), flush=True)
+    return changes
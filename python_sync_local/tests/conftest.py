@@ -0,0 +1,40 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+# The sync modules are flat scripts in python_sync_local/, imported the way main.py imports them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# artran-like sample table for the incremental read tests
+STRUCTURE = [
+    {'name': 'REFNO', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'DATE', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'AMOUNT', 'type': 'N', 'size': 10, 'decs': 2},
+]
+CONTEXT = {"filter": None}
+
+
+def make_rows(count, edited=None):
+    """`count` rows of STRUCTURE; `edited` maps a row index to a different AMOUNT"""
+    rows = [{'REFNO': f"IV{index:04d}", 'DATE': datetime.date(2025, 12, 1) + datetime.timedelta(days=index % 20),
+             'AMOUNT': float(index)} for index in range(count)]
+    for index, amount in (edited or {}).items():
+        rows[index]['AMOUNT'] = amount
+    return rows
+
+
+@pytest.fixture
+def sync_state(tmp_path, monkeypatch):
+    """Sync state files and the target database in tmp_path, with small tail and block sizes"""
+    import block_sync
+    import watermark
+
+    monkeypatch.setenv("DB_TYPE", "sqlite")
+    monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(watermark, "WATERMARK_FILE", str(tmp_path / "watermarks.json"))
+    monkeypatch.setattr(watermark, "WATERMARK_RECORDS", 4)
+    monkeypatch.setattr(block_sync, "BLOCK_STATE_FILE", str(tmp_path / "blocks.json"))
+    monkeypatch.setattr(block_sync, "BLOCK_RECORDS", 8)
+    return tmp_path
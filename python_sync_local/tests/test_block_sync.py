@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from block_sync import iter_block_changes, plan_block_sync, save_block_state
+from conftest import CONTEXT, STRUCTURE, make_rows
+from dbf_writer import write_sample_dbf
+from record_batch import RecordBatch
+from sync_database import replace_rows_by_key
+from table_schema import create_table_sql
+
+
+def load_blocks(path, plan):
+    return [(keys, batch.column_values('REFNO')) for keys, batch in iter_block_changes(path, plan, ['REFNO'])]
+
+
+def test_block_plan_reads_only_changed_and_new_blocks(sync_state):
+    path = str(sync_state / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, make_rows(20))
+    plan = plan_block_sync(path, "t", CONTEXT, None, ['REFNO'])
+    assert not plan.incremental and plan.changed == [0, 1, 2]
+    load_blocks(path, plan)
+    assert plan.block_rows == [8, 8, 4]
+    save_block_state("t", plan, CONTEXT, 20)
+
+    # Record 9 edited and deleted in block 1, block 2 grows, block 3 is new
+    write_sample_dbf(path, STRUCTURE, make_rows(26, {9: -1.0}), deleted={10})
+    plan = plan_block_sync(path, "t", CONTEXT, 20, ['REFNO'])
+    assert plan.incremental and plan.changed == [1, 2, 3]
+    assert plan.expected_deleted == 12
+    assert plan.changed_fraction == 0.75
+    changes = load_blocks(path, plan)
+    assert [len(keys) for keys, _ in changes] == [8, 8, 2]
+    assert ('IV0010',) in changes[0][0] and 'IV0010' not in changes[0][1]
+    assert plan.block_rows == [8, 7, 8, 2]
+
+
+@pytest.mark.parametrize('key_fields, table_rows, reason', [
+    (['MISSING'], 20, "key fields missing from DBF: MISSING"),
+    (['REFNO'], 19, "table has 19 rows, expected 20"),
+])
+def test_block_plan_full_reload(sync_state, key_fields, table_rows, reason):
+    path = str(sync_state / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, make_rows(20))
+    plan = plan_block_sync(path, "t", CONTEXT, None, ['REFNO'])
+    load_blocks(path, plan)
+    save_block_state("t", plan, CONTEXT, 20)
+    plan = plan_block_sync(path, "t", CONTEXT, table_rows, key_fields)
+    assert (plan.incremental, plan.reason, plan.changed, plan.detected) == (False, reason, [0, 1, 2], 0)
+
+
+def artran_table(sync_state, rows):
+    connection = sqlite3.connect(str(sync_state / "test.db"))
+    connection.execute(create_table_sql("ubs_ubsstk2015_artran", STRUCTURE, "sqlite"))
+    connection.executemany("INSERT INTO ubs_ubsstk2015_artran VALUES (?, ?, ?)",
+                           [(row['REFNO'], row['DATE'].isoformat(), row['AMOUNT']) for row in rows])
+    connection.commit()
+    return connection
+
+
+def test_replace_by_key_commits_only_the_expected_deletes(sync_state, capsys):
+    connection = artran_table(sync_state, make_rows(4))
+    edited = make_rows(4, {1: -1.0})[1]
+    changes = [([('IV0001',)], RecordBatch.from_rows(STRUCTURE, [edited]))]
+
+    # IV0001 holds one row, not two: the replace is rolled back
+    assert replace_rows_by_key("artran.dbf", STRUCTURE, "UBSSTK2015", ["REFNO"], changes, expected_deleted=2) is None
+    assert connection.execute("SELECT AMOUNT FROM ubs_ubsstk2015_artran WHERE REFNO = 'IV0001'").fetchall() == [(1.0,)]
+    assert "Expected to replace 2 rows but 1 matched" in capsys.readouterr().out
+
+    assert replace_rows_by_key("artran.dbf", STRUCTURE, "UBSSTK2015", ["REFNO"], changes, expected_deleted=1) == (1, 1)
+    assert connection.execute("SELECT AMOUNT FROM ubs_ubsstk2015_artran WHERE REFNO = 'IV0001'").fetchall() == [(-1.0,)]
+    assert connection.execute("SELECT COUNT(*) FROM ubs_ubsstk2015_artran").fetchone() == (4,)
@@ -0,0 +1,38 @@
+import datetime
+
+from dbf_writer import write_sample_dbf
+from utils import read_dbf_dbflib, read_dbf_native
+
+STRUCTURE = [
+    {'name': 'REFNO', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'QTY', 'type': 'N', 'size': 6, 'decs': 0},
+    {'name': 'AMOUNT', 'type': 'N', 'size': 12, 'decs': 2},
+    {'name': 'DATE', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'POSTED', 'type': 'L', 'size': 1, 'decs': 0},
+    {'name': 'CREATED', 'type': 'T', 'size': 8, 'decs': 0},
+    {'name': 'NOTE', 'type': 'M', 'size': 4, 'decs': 0},
+]
+
+ROWS = [
+    {'REFNO': 'INV001', 'QTY': 3, 'AMOUNT': 1250.5, 'DATE': datetime.date(2024, 1, 31),
+     'POSTED': True, 'CREATED': datetime.datetime(2024, 1, 31, 9, 15, 30), 'NOTE': 'First invoice'},
+    {'REFNO': 'INV002', 'QTY': -2, 'AMOUNT': -99.99, 'DATE': None,
+     'POSTED': False, 'CREATED': datetime.datetime(2024, 2, 1, 23, 59, 59, 123000), 'NOTE': 'Café\r\nline two'},
+    {'REFNO': 'DEL003', 'QTY': 1, 'AMOUNT': 1.0, 'DATE': datetime.date(2024, 2, 2),
+     'POSTED': True, 'CREATED': None, 'NOTE': 'deleted'},
+    {'REFNO': 'INV004', 'QTY': None, 'AMOUNT': None, 'DATE': None,
+     'POSTED': None, 'CREATED': None, 'NOTE': 'x' * 200},
+    {'REFNO': '', 'QTY': 0, 'AMOUNT': 0.0, 'DATE': datetime.date(1999, 12, 31),
+     'POSTED': False, 'CREATED': datetime.datetime(1999, 12, 31, 0, 0), 'NOTE': None},
+]
+
+
+def test_native_reader_matches_dbflib(tmp_path):
+    path = str(tmp_path / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, ROWS, deleted={2})
+
+    native = read_dbf_native(path)
+    assert native == read_dbf_dbflib(path)
+    assert [row['REFNO'] for row in native['rows']] == ['INV001', 'INV002', 'INV004', None]
+    assert native['rows'][1]['DATE'] is None
+    assert native['rows'][2]['NOTE'] == 'x' * 200
@@ -0,0 +1,55 @@
+import struct
+
+import numpy as np
+import pytest
+
+from dbf_reader import _date_decoder, _decode_timestamp, _numeric_decoder
+from decode_kernels import decode_date, decode_logical, decode_numeric, decode_timestamp
+
+
+def block(cells, size):
+    return np.frombuffer(b''.join(cell.ljust(size)[:size] for cell in cells), dtype=np.uint8).reshape(len(cells), size)
+
+
+def python_values(values, nulls):
+    return [None if null else value for value, null in zip(values.tolist(), nulls.tolist())]
+
+
+NUMERIC_CELLS = [b'     12.50', b'    -0.125', b'         0', b'          ', b'  1.5e3   ', b'**********',
+                 b'     -.5  ', b'  12 34   ', b'+7', b'0.30000000000000004', b'\x00\x00\x00\x00\x0042.1',
+                 b'123456789012.345678']
+
+
+@pytest.mark.parametrize('as_int, cells', [
+    (False, NUMERIC_CELLS),
+    (True, [b'    42', b'   -17', b'      ', b'  0042', b'99999999999999999999', b'1.0', b'  *   ']),
+])
+def test_numeric_kernel_matches_scalar_decoder(as_int, cells):
+    size = max(len(cell) for cell in cells)
+    scalar = _numeric_decoder(as_int)
+    values, nulls = decode_numeric(block(cells, size), as_int, scalar)
+    assert python_values(values, nulls) == [scalar(cell.ljust(size)) for cell in cells]
+
+
+def test_date_kernel_matches_scalar_decoder():
+    cells = [b'20251201', b'20240229', b'20250229', b'00000000', b'        ', b'2025 201', b'19991331', b'00010101',
+             b'99991231']
+    values, nulls = decode_date(block(cells, 8))
+    decoded = [None if null else str(value) for value, null in zip(values, nulls)]
+    scalar = _date_decoder()
+    assert decoded == [scalar(cell) for cell in cells]
+
+
+def test_logical_kernel():
+    values, nulls = decode_logical(block([b'T', b'y', b'F', b'n', b'?', b' '], 1))
+    assert python_values(values, nulls) == [True, True, False, False, None, None]
+
+
+def test_timestamp_kernel_matches_scalar_decoder():
+    cells = [struct.pack('<ii', 2461011, 36930123), struct.pack('<ii', 2461011, 0), struct.pack('<ii', 0, 0),
+             struct.pack('<ii', 2461011, -1), struct.pack('<ii', 2461011, 86400000), struct.pack('<ii', 1, 5)]
+    values, nulls = decode_timestamp(block(cells, 8))
+    decoded = [None if null else value.astype('datetime64[us]').tolist().isoformat()
+               for value, null in zip(values, nulls)]
+    assert decoded == [_decode_timestamp(cell) for cell in cells]
+    assert decoded[0] == '2025-12-01T10:15:30.123000'
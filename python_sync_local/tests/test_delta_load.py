@@ -0,0 +1,101 @@
+import datetime
+import decimal
+
+import numpy as np
+
+from delta_load import _with_stored_fractions, row_fingerprints
+from record_batch import RecordBatch
+
+STRUCTURE = [
+    {'name': 'REFNO', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'QTY', 'type': 'N', 'size': 12, 'decs': 2},
+    {'name': 'RATE', 'type': 'F', 'size': 12, 'decs': 3},
+    {'name': 'POSTED', 'type': 'L', 'size': 1, 'decs': 0},
+    {'name': 'DATE', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'UPDATED', 'type': 'T', 'size': 8, 'decs': 0},
+]
+
+
+def dbf_batch(updated):
+    """One-row batch in the column form DBFReader decodes to"""
+    columns = {
+        'REFNO': np.array(['INV001'], dtype=object),
+        'QTY': np.array([12.5]),
+        'RATE': np.array([0.1]),
+        'POSTED': np.array([True]),
+        'DATE': np.array(['2025-12-01'], dtype='datetime64[D]'),
+        'UPDATED': np.array([updated], dtype='datetime64[ms]'),
+    }
+    return RecordBatch(STRUCTURE, columns, {name: np.zeros(1, dtype=bool) for name in columns})
+
+
+def dbf_fingerprint(updated, structures=STRUCTURE):
+    names = [struct['name'] for struct in structures]
+    return row_fingerprints(dbf_batch(updated).row_tuples(names), structures)[0]
+
+
+def with_fraction_digits(digits):
+    return [dict(struct, fraction_digits=digits) if struct['type'] == 'T' else struct for struct in STRUCTURE]
+
+
+def test_millisecond_timestamp_matches_datetime3_row():
+    # MySQL DATETIME(3) returns the milliseconds the DBF stored
+    stored = ('INV001', decimal.Decimal('12.50'), 0.10000000149011612, 1, datetime.date(2025, 12, 1),
+              datetime.datetime(2025, 12, 1, 10, 15, 30, 123000))
+    assert row_fingerprints([stored], STRUCTURE)[0] == dbf_fingerprint('2025-12-01T10:15:30.123')
+
+
+def test_millisecond_timestamp_matches_sqlite_text_row():
+    stored = ('INV001', 12.5, 0.1, 1, '2025-12-01', '2025-12-01T10:15:30.123000')
+    assert row_fingerprints([stored], STRUCTURE)[0] == dbf_fingerprint('2025-12-01T10:15:30.123')
+
+
+def test_millisecond_timestamp_matches_whole_second_datetime_row():
+    # A DATETIME column from before DATETIME(3) rounds to the second (half up)
+    structures = with_fraction_digits(0)
+    for updated, stored_second in (('2025-12-01T10:15:30.123', 30), ('2025-12-01T10:15:30.500', 31)):
+        stored = ('INV001', decimal.Decimal('12.50'), 0.1, 1, datetime.date(2025, 12, 1),
+                  datetime.datetime(2025, 12, 1, 10, 15, stored_second))
+        assert row_fingerprints([stored], structures)[0] == dbf_fingerprint(updated, structures)
+
+
+def test_changed_value_changes_fingerprint():
+    assert dbf_fingerprint('2025-12-01T10:15:30.123') != dbf_fingerprint('2025-12-01T10:15:30.124')
+    structures = with_fraction_digits(0)
+    assert dbf_fingerprint('2025-12-01T10:15:30.123', structures) != dbf_fingerprint('2025-12-01T10:15:31.123',
+                                                                                     structures)
+
+
+def test_nulls_and_column_order():
+    structures = STRUCTURE[:2]
+    rows = [('A', None), (None, 'A'), ('A', 0)]
+    fingerprints = row_fingerprints(rows, [dict(structures[0]), dict(structures[0], name='OTHER')])
+    assert len(set(fingerprints.tolist())) == 3
+    assert row_fingerprints([('A', None)], structures)[0] == row_fingerprints([('A', None)], structures)[0]
+    assert row_fingerprints([], structures).tolist() == []
+
+
+def test_numeric_values_compare_at_field_precision():
+    structures = [STRUCTURE[1]]
+    assert row_fingerprints([(12.5,)], structures)[0] == row_fingerprints([(decimal.Decimal('12.50'),)], structures)[0]
+    assert row_fingerprints([(12.5,)], structures)[0] != row_fingerprints([(12.51,)], structures)[0]
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_stored_fractions_read_from_mysql_columns():
+    cursor = FakeCursor([('refno', None), ('updated', 0), ('DATE', None)])
+    structures = _with_stored_fractions(cursor, 'ubs_ubsacc2015_artran', STRUCTURE)
+    assert cursor.executed[0][1] == ('ubs_ubsacc2015_artran',)
+    assert [struct.get('fraction_digits') for struct in structures] == [None, None, None, None, None, 0]
+    assert 'fraction_digits' not in STRUCTURE[5]
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from key_sort import sort_batches
+from record_batch import RecordBatch
+
+STRUCTURE = [
+    {'name': 'REFNO', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'ITEMCOUNT', 'type': 'N', 'size': 4, 'decs': 0},
+    {'name': 'QTY', 'type': 'N', 'size': 8, 'decs': 2},
+]
+
+
+def make_batches(rows, batch_rows=37):
+    return [RecordBatch.from_rows(STRUCTURE, rows[start:start + batch_rows]) for start in range(0, len(rows), batch_rows)]
+
+
+def sort_key(row):
+    # How MySQL orders the key: strings stripped and case-insensitive, NULL first
+    count = row['ITEMCOUNT']
+    return (row['REFNO'] or '').strip().upper(), (0, 0) if count is None else (1, count)
+
+
+@pytest.fixture
+def rows():
+    generator = random.Random(7)
+    refnos = [f"iv{number:03d}" for number in range(40)] + ['IV005 ', None]
+    return [{'REFNO': generator.choice(refnos), 'ITEMCOUNT': generator.choice([None, *range(1, 12)]),
+             'QTY': float(index)} for index in range(500)]
+
+
+@pytest.mark.parametrize('memory_mb', [None, 0.001])
+def test_rows_come_out_in_key_order(rows, memory_mb, capsys):
+    batches = list(sort_batches(make_batches(rows), ['REFNO', 'ITEMCOUNT'], memory_mb=memory_mb, batch_rows=64))
+    assert all(len(batch) == 64 for batch in batches[:-1])
+    result = [row for batch in batches for row in batch.to_rows()]
+    # Rows with equal keys may come in any order
+    assert [sort_key(row) for row in result] == sorted(map(sort_key, rows))
+    assert sorted(row['QTY'] for row in result) == [float(index) for index in range(500)]
+    output = capsys.readouterr().out
+    assert ("runs spilled" in output) == (memory_mb is not None)
+
+
+def test_no_rows():
+    assert list(sort_batches(iter([]), ['REFNO'])) == []
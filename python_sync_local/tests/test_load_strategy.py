@@ -0,0 +1,68 @@
+import pytest
+
+import load_strategy
+from load_strategy import choose_strategy, record_delta_failure, record_load
+from table_manifest import TableSpec
+
+SOURCE = {"root": "C:/", "subpath": "Sample"}
+
+
+def spec(**entry):
+    return TableSpec("ictran", dict({"directory": "UBSSTK2015", "keys": ["REFNO", "ITEMCOUNT"], "load": "auto"},
+                                    **entry), SOURCE, {})
+
+
+@pytest.fixture(autouse=True)
+def history(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_TYPE", "mysql")
+    monkeypatch.delenv("LOAD_ICTRAN", raising=False)
+    monkeypatch.setattr(load_strategy, "LOAD_HISTORY_FILE", str(tmp_path / "load_history.json"))
+
+
+def test_first_load_of_a_new_table_is_a_swap():
+    decision = choose_strategy(spec(), "t", 100.0, None)
+    assert decision.strategy == "swap" and decision.full == "swap"
+    assert "table does not exist yet" in decision.reason and "delta" not in decision.costs
+
+
+def test_untimed_delta_is_tried_when_its_default_is_cheaper():
+    decision = choose_strategy(spec(), "t", 100.0, 1000)
+    assert decision.strategy == "delta"
+    assert decision.costs["delta"] == pytest.approx(100 * (0.15 + 0.05 * 0.5))
+
+
+def test_history_decides_between_delta_and_swap():
+    # Most rows change on every run: writing them makes the delta slower than a swap
+    record_load("t", "swap", 20.0, 100.0, 1000, 1000, 1000)
+    record_load("t", "delta", 30.0, 100.0, 1000, 1000, 1000, changed_fraction=0.8, scan_seconds=10.0)
+    decision = choose_strategy(spec(), "t", 100.0, 1000)
+    assert decision.costs == pytest.approx({"delta": 100 * (0.1 + 0.8 * 0.2), "swap": 20.0})
+    assert decision.strategy == "swap" and decision.full == "swap"
+    assert "1 timed runs" in decision.reason
+
+
+def test_incremental_read_wins_and_keeps_the_cheapest_full_load():
+    decision = choose_strategy(spec(incremental="append"), "t", 100.0, 1000, incremental=("append", 0.01))
+    assert decision.strategy == "append" and decision.incremental
+    assert decision.full == "delta"
+
+
+def test_failed_delta_is_not_retried_for_a_while(monkeypatch):
+    record_delta_failure("t", "Key REFNO = ('IV1',) occurs more than once")
+    decision = choose_strategy(spec(), "t", 100.0, 1000)
+    assert decision.strategy == "swap" and "delta failed 0.0h ago" in decision.reason
+    monkeypatch.setattr(load_strategy, "LOAD_DELTA_RETRY_HOURS", 0)
+    assert choose_strategy(spec(), "t", 100.0, 1000).strategy == "delta"
+
+
+def test_fixed_load_and_environment_override(monkeypatch):
+    assert choose_strategy(spec(load="truncate"), "t", 100.0, 1000).reason == "load truncate set in tables.json"
+    assert choose_strategy(spec(load="delta"), "t", 100.0, None).describe() == "swap: first load of the table"
+    monkeypatch.setenv("LOAD_ICTRAN", "swap")
+    assert choose_strategy(spec(), "t", 100.0, 1000).reason == "load swap set in LOAD_ICTRAN"
+
+
+def test_swap_outside_mysql_reloads_in_place(monkeypatch):
+    monkeypatch.setenv("DB_TYPE", "sqlite")
+    decision = choose_strategy(spec(strategies=["swap"]), "t", 100.0, 1000)
+    assert decision.strategy == "truncate"
@@ -0,0 +1,97 @@
+import pytest
+
+import mysql_batches
+from mysql_batches import InsertBatcher, encoded_rows
+from record_batch import RecordBatch
+
+STRUCTURE = [
+    {'name': 'REFNO', 'type': 'C', 'size': 200, 'decs': 0},
+    {'name': 'QTY', 'type': 'N', 'size': 6, 'decs': 0},
+]
+INSERT_SQL = "INSERT INTO `artran` (`REFNO`, `QTY`) VALUES (%s, %s)"
+
+
+class FakeCursor:
+    """Records executemany calls; answers the max_allowed_packet query"""
+
+    def __init__(self, max_packet=64 * 1024):
+        self.max_packet = max_packet
+        self.statements = []
+
+    def execute(self, sql):
+        assert sql == "SELECT @@SESSION.max_allowed_packet"
+
+    def fetchone(self):
+        return (self.max_packet,)
+
+    def executemany(self, sql, rows):
+        self.statements.append(list(rows))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def sql_text(row):
+    """The row as the connector would write it into a multi-row INSERT"""
+    refno = "NULL" if row[0] is None else "'" + row[0].replace("\\", "\\\\").replace("'", "\\'") + "'"
+    return f"({refno},{row[1]})"
+
+
+def make_batch(count, width=100):
+    rows = [{'REFNO': f"IV{index:05d}'\\é".ljust(width, 'x'), 'QTY': index} for index in range(count)]
+    return RecordBatch.from_rows(STRUCTURE, rows)
+
+
+def test_statements_fit_max_allowed_packet():
+    cursor, connection = FakeCursor(), FakeConnection()
+    batcher = InsertBatcher(cursor, connection, INSERT_SQL, ['REFNO', 'QTY'])
+    assert batcher.max_packet == 64 * 1024
+    for _ in range(3):
+        batcher.add(make_batch(700))
+    assert batcher.finish() == 2100
+
+    sent = [row for statement in cursor.statements for row in statement]
+    assert [row[1] for row in sent] == list(range(700)) * 3
+    assert len(cursor.statements) == connection.commits > 1
+    for statement in cursor.statements:
+        text = INSERT_SQL + ",".join(sql_text(row) for row in statement)
+        assert len(text.encode('utf-8')) <= batcher.max_packet * mysql_batches.PACKET_FILL
+    # The estimate never undercounts a row's encoded text
+    rows, sizes = encoded_rows(make_batch(10), ['REFNO', 'QTY'])
+    assert all(size >= len(sql_text(row).encode('utf-8')) for row, size in zip(rows, sizes))
+
+
+def test_rows_per_statement_grow_when_fast(monkeypatch):
+    monkeypatch.setattr(mysql_batches, "COMMIT_TARGET_SECONDS", 3600.0)
+    cursor = FakeCursor(max_packet=1 << 30)
+    batcher = InsertBatcher(cursor, FakeConnection(), INSERT_SQL, ['REFNO', 'QTY'])
+    batcher.add(make_batch(200000, width=1))
+    batcher.finish()
+    sizes = [len(statement) for statement in cursor.statements]
+    assert sizes[:7] == [1000, 2000, 4000, 8000, 16000, 32000, 50000]
+    assert batcher.target_rows == mysql_batches.MAX_ROWS
+
+
+def test_rows_per_statement_shrink_when_slow(monkeypatch):
+    monkeypatch.setattr(mysql_batches, "COMMIT_TARGET_SECONDS", -1.0)
+    cursor = FakeCursor(max_packet=1 << 30)
+    batcher = InsertBatcher(cursor, FakeConnection(), INSERT_SQL, ['REFNO', 'QTY'])
+    batcher.add(make_batch(3000, width=1))
+    batcher.finish()
+    sizes = [len(statement) for statement in cursor.statements]
+    assert sizes[:5] == [1000, 500, 250, 125, 100]
+    assert set(sizes[5:-1]) == {100}
+    assert batcher.target_rows == mysql_batches.MIN_ROWS
+
+
+def test_single_row_larger_than_packet_is_an_error():
+    cursor = FakeCursor(max_packet=1024)
+    batcher = InsertBatcher(cursor, FakeConnection(), INSERT_SQL, ['REFNO', 'QTY'])
+    with pytest.raises(ValueError, match="max_allowed_packet"):
+        batcher.add(make_batch(1, width=2000))
+    assert not cursor.statements
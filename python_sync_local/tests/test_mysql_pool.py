@@ -0,0 +1,83 @@
+import threading
+
+from mysql_pool import MySQLConnectionPool
+
+
+class FakeConnection:
+    """Stands in for a mysql.connector connection; counts autocommit round trips"""
+
+    unread_result = False
+    in_transaction = False
+
+    def __init__(self):
+        self._autocommit = False
+        self.autocommit_sets = 0
+        self.closed = False
+
+    @property
+    def autocommit(self):
+        return self._autocommit
+
+    @autocommit.setter
+    def autocommit(self, value):
+        self._autocommit = value
+        self.autocommit_sets += 1
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool(MySQLConnectionPool):
+    def __init__(self, size=2):
+        super().__init__(size)
+        self.connections = []
+
+    def _open(self, bulk):
+        raw = FakeConnection()
+        self.connections.append(raw)
+        with self._lock:
+            self._autocommit[id(raw)] = False
+        return raw
+
+
+def test_autocommit_is_only_set_when_it_changes():
+    pool = FakePool()
+    connection = pool.connect()
+    connection.close()
+    raw = pool.connections[0]
+    assert raw.autocommit_sets == 0
+
+    connection = pool.connect(autocommit=True)
+    assert raw.autocommit is True and raw.autocommit_sets == 1
+    connection.autocommit = False  # set through the pooled connection, the pool sees it
+    connection.close()
+    pool.connect(autocommit=False).close()
+    assert raw.autocommit_sets == 2
+    assert pool.stats()["opened"] == 1 and pool.stats()["in_use"] == 0
+
+
+def test_connections_from_many_threads_get_the_mode_they_asked_for():
+    pool = FakePool(size=3)
+    errors = []
+
+    def worker(index):
+        for round_number in range(200):
+            wanted = (index + round_number) % 2 == 0
+            connection = pool.connect(autocommit=wanted)
+            if connection.autocommit is not wanted:
+                errors.append((index, round_number))
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert pool.stats()["in_use"] == 0
+    for raw in pool.connections:
+        if not raw.closed:
+            assert pool._autocommit[id(raw)] is raw.autocommit
@@ -0,0 +1,94 @@
+import datetime
+
+import numpy as np
+
+from dbf_reader import DBFReader
+from dbf_writer import write_sample_dbf
+from parallel_reader import _dictionary_encode, _pack_batch, _unpack_batch, iter_batches_parallel
+from record_batch import RecordBatch
+from row_filters import parse_filter
+
+STRUCTURE = [
+    {'name': 'REFNO', 'type': 'C', 'size': 10, 'decs': 0},
+    {'name': 'QTY', 'type': 'N', 'size': 6, 'decs': 0},
+    {'name': 'AMOUNT', 'type': 'N', 'size': 12, 'decs': 2},
+    {'name': 'DATE', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'POSTED', 'type': 'L', 'size': 1, 'decs': 0},
+    {'name': 'CREATED', 'type': 'T', 'size': 8, 'decs': 0},
+]
+
+
+def make_rows(count):
+    return [{'REFNO': None if index % 7 == 0 else f"IV{index % 5:02d}é",
+             'QTY': None if index % 11 == 0 else index - 20,
+             'AMOUNT': index * 1.25,
+             'DATE': None if index % 3 == 0 else datetime.date(2025, 1, 1) + datetime.timedelta(days=index),
+             'POSTED': [True, False, None][index % 3],
+             'CREATED': datetime.datetime(2025, 1, 1, 8, 30) + datetime.timedelta(minutes=index)}
+            for index in range(count)]
+
+
+def assert_same_batches(actual, expected):
+    expected = [batch for batch in expected if len(batch)]
+    assert [len(batch) for batch in actual] == [len(batch) for batch in expected]
+    for got, want in zip(actual, expected):
+        assert list(got.columns) == list(want.columns)
+        for name in want.columns:
+            np.testing.assert_array_equal(got.columns[name], want.columns[name])
+            np.testing.assert_array_equal(got.nulls[name], want.nulls[name])
+
+
+def round_trip(batch, size=1 << 16):
+    buffer = bytearray(size)
+    layout, inline = _pack_batch(batch, memoryview(buffer), size)
+    result = {'length': len(batch), 'layout': layout, 'inline': inline, 'counters': []}
+    return _unpack_batch(batch.structure, result, memoryview(buffer)), layout, inline
+
+
+def test_two_workers_match_the_serial_reader(tmp_path):
+    path = str(tmp_path / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, make_rows(100), deleted={4, 50, 51})
+    with DBFReader(path) as reader:
+        serial_filter = parse_filter("QTY < 0 and REFNO == 'IV01é' -> drop")
+        expected = list(reader.iter_batches(16, row_filter=serial_filter))
+        parallel_filter = parse_filter("QTY < 0 and REFNO == 'IV01é' -> drop")
+        actual = list(iter_batches_parallel(reader, 2, 16, row_filter=parallel_filter))
+    assert_same_batches(actual, expected)
+    assert parallel_filter.skipped == serial_filter.skipped > 0
+
+
+def test_pack_round_trip_dictionary_encodes_strings(tmp_path):
+    path = str(tmp_path / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, make_rows(30))
+    with DBFReader(path) as reader:
+        batch = reader.read_batch()
+    unpacked, layout, inline = round_trip(batch)
+    assert {entry[0]: entry[1] for entry in layout}['REFNO'] == 'dictionary'
+    assert not inline
+    assert_same_batches([unpacked], [batch])
+
+
+def test_dictionary_encode():
+    codes, offsets, blob = _dictionary_encode(np.array(['a', None, 'ß', 'a'], dtype=object))
+    assert codes.tolist() == [0, -1, 1, 0]
+    assert offsets.tolist() == [1, 3]
+    assert blob.tobytes() == 'aß'.encode('utf-8')
+    assert _dictionary_encode(np.array(['a', b'raw'], dtype=object)) is None
+
+
+def test_mixed_and_oversized_columns_go_inline():
+    structure = [{'name': 'NOTE', 'type': 'M', 'size': 4, 'decs': 0},
+                 {'name': 'QTY', 'type': 'N', 'size': 6, 'decs': 0}]
+    columns = {'NOTE': np.array(['text', b'\x00binary', None], dtype=object),
+               'QTY': np.arange(3, dtype=np.int64)}
+    nulls = {'NOTE': np.array([False, False, True]), 'QTY': np.zeros(3, dtype=bool)}
+    batch = RecordBatch(structure, columns, nulls)
+
+    unpacked, layout, inline = round_trip(batch)
+    assert list(inline) == ['NOTE'] and [entry[0] for entry in layout] == ['QTY']
+    assert_same_batches([unpacked], [batch])
+
+    # A slot too small for any column sends everything back pickled
+    unpacked, layout, inline = round_trip(batch, size=16)
+    assert not layout and list(inline) == ['NOTE', 'QTY']
+    assert_same_batches([unpacked], [batch])
@@ -0,0 +1,90 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from record_batch import RecordBatch
+from row_filters import add_filter_counters, combine_filters, filter_counters, parse_filter
+
+STRUCTURE = [
+    {'name': 'TYPE', 'type': 'C', 'size': 3, 'decs': 0},
+    {'name': 'DATE', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'AMOUNT', 'type': 'N', 'size': 12, 'decs': 2},
+    {'name': 'POSTED', 'type': 'L', 'size': 1, 'decs': 0},
+]
+ROWS = [
+    {'TYPE': 'INV', 'DATE': '2025-12-01', 'AMOUNT': 100.0, 'POSTED': True},
+    {'TYPE': 'inv ', 'DATE': '2025-12-20', 'AMOUNT': 5.5, 'POSTED': False},
+    {'TYPE': 'DO', 'DATE': '2025-11-30', 'AMOUNT': None, 'POSTED': True},
+    {'TYPE': None, 'DATE': None, 'AMOUNT': 0.0, 'POSTED': None},
+]
+
+
+def kept(text, params=None, rows=ROWS):
+    row_filter = parse_filter(text, params)
+    skip = row_filter.skip_mask(RecordBatch.from_rows(STRUCTURE, rows))
+    return [index for index in range(len(rows)) if not skip[index]]
+
+
+def test_drop_rule_with_param_and_date_comparison():
+    assert kept("TYPE == 'INV' and DATE <= $CUTOFF -> drop", {'CUTOFF': '20251212'}) == [1, 2, 3]
+    assert kept("TYPE == 'INV' and DATE <= '2025-12-31' -> drop") == [2, 3]
+
+
+def test_first_matching_rule_decides():
+    assert kept("TYPE == 'DO' -> keep; AMOUNT < 10 -> drop") == [0, 2]
+    assert kept("TYPE in ('DO', 'INV') -> keep\nTYPE != 'XX' -> drop") == [0, 1, 2, 3]
+
+
+def test_null_never_matches_a_comparison():
+    assert kept("TYPE != 'INV' -> drop") == [0, 1, 3]
+    assert kept("not (TYPE == 'INV') -> drop") == [0, 1, 3]
+    assert kept("not (TYPE == 'DO' or AMOUNT > 50) -> drop") == [0, 2, 3]
+    assert kept("not not TYPE == 'DO' -> drop") == [0, 1, 3]
+    assert kept("AMOUNT >= 0 -> drop") == [2]
+
+
+def test_in_applies_each_literals_null_mask():
+    assert kept("AMOUNT in (100, 'abc') -> drop") == [1, 2, 3]
+    assert kept("AMOUNT in (0, 5.5) -> drop") == [0, 2]
+    # 'abc' is not a number, so rows other than 100 are unknown rather than unmatched
+    assert kept("not AMOUNT in (100, 'abc') -> drop") == [0, 1, 2, 3]
+
+
+def test_logical_and_or_precedence():
+    assert kept("POSTED == 'T' -> drop") == [1, 3]
+    assert kept("TYPE == 'DO' or TYPE == 'INV' and AMOUNT > 50 -> drop") == [1, 3]
+    assert kept("(TYPE == 'DO' or TYPE == 'INV') and AMOUNT > 50 -> drop") == [1, 2, 3]
+
+
+@pytest.mark.parametrize('text, message', [
+    ("TYPE == 'INV'", "unexpected end of expression"),
+    ("TYPE == 'INV' -> delete", "expected drop or keep"),
+    ("TYPE = 'INV' -> drop", "unexpected character"),
+    ("TYPE == $MISSING -> drop", "unknown parameter $MISSING"),
+    ("TYPE == 'INV' -> drop extra", "unexpected 'extra'"),
+    (" ; ", "has no rules"),
+])
+def test_parse_errors(text, message):
+    with pytest.raises(ValueError, match=message.replace('$', r'\$')):
+        parse_filter(text)
+
+
+def test_counters_and_describe():
+    row_filter = parse_filter("TYPE == 'DO' -> keep; AMOUNT < 10 -> drop")
+    row_filter.skip_mask(RecordBatch.from_rows(STRUCTURE, ROWS))
+    assert filter_counters(row_filter) == [2, 1, 2]
+    assert row_filter.describe() == "TYPE == 'DO' -> keep; AMOUNT < 10 -> drop"
+
+
+def test_counters_from_worker_copies_add_up():
+    # Worker processes get pickled copies and send their counters back
+    row_filter = parse_filter("AMOUNT < 10 -> drop")
+    other = parse_filter("TYPE == 'DO' -> drop")
+    chain = combine_filters(row_filter, other)
+    copy = pickle.loads(pickle.dumps(chain))
+    skip = copy.skip_mask(RecordBatch.from_rows(STRUCTURE, ROWS))
+    assert np.flatnonzero(~skip).tolist() == [0]
+    assert add_filter_counters(chain, filter_counters(copy)) == []
+    assert filter_counters(chain) == [2, 2, 1, 1]
+    assert chain.skipped == 3
@@ -0,0 +1,53 @@
+from mysql.connector import Error
+
+from record_batch import RecordBatch
+from shard_load import read_shard_boundaries, route_batch, shard_boundaries
+
+STRUCTURE = [{'name': 'REFNO', 'type': 'C', 'size': 10, 'decs': 0}]
+
+
+def test_boundaries_split_keys_evenly():
+    keys = [f"IV{number:05d}" for number in range(1000)]
+    assert shard_boundaries(keys, 4) == ['IV00250', 'IV00500', 'IV00750']
+    assert shard_boundaries(keys[:3], 4) is None
+    assert shard_boundaries(keys, 1) is None
+
+
+def test_every_row_goes_to_the_shard_of_its_range():
+    keys = [f"IV{number:05d}" for number in range(1000)]
+    boundaries = shard_boundaries(list(reversed(keys)), 4)
+    rows = [{'REFNO': key} for key in ['IV00000', 'IV00249', 'IV00250', 'IV00999', 'ZZ', None, 'IV00500']]
+    shards = route_batch(RecordBatch.from_rows(STRUCTURE, rows), 'REFNO', boundaries)
+    assert shards.tolist() == [0, 0, 1, 3, 3, 0, 2]
+
+
+def test_same_key_always_in_one_shard():
+    boundaries = shard_boundaries([str(number) for number in range(100)], 3)
+    rows = [{'REFNO': str(number % 10)} for number in range(50)]
+    shards = route_batch(RecordBatch.from_rows(STRUCTURE, rows), 'REFNO', boundaries).tolist()
+    for key in range(10):
+        assert len({shard for row, shard in zip(rows, shards) if row['REFNO'] == str(key)}) == 1
+
+
+class SampleCursor:
+    def __init__(self, total, keys=None, error=None):
+        self.total = total
+        self.keys = keys or []
+        self.error = error
+
+    def execute(self, sql):
+        if self.error:
+            raise self.error
+
+    def fetchone(self):
+        return (self.total,)
+
+    def fetchall(self):
+        return [(key,) for key in self.keys]
+
+
+def test_boundaries_read_from_live_table_sample():
+    keys = [f"K{number:04d}" for number in range(800)]
+    assert read_shard_boundaries(SampleCursor(800, keys), 't', 'REFNO', 2) == ['K0400']
+    assert read_shard_boundaries(SampleCursor(150, keys), 't', 'REFNO', 2) is None
+    assert read_shard_boundaries(SampleCursor(0, error=Error("no such table")), 't', 'REFNO', 2) is None
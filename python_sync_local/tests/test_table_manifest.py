@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from table_manifest import load_manifest
+
+MANIFEST = {
+    "source": {"root": "C:/", "subpath": "Sample"},
+    "params": {"SKIP_BEFORE_DATE": "20251201", "CUTOFF": 20251212},
+    "tables": {
+        "artran": {"directory": "UBSSTK2015", "keys": ["REFNO"], "filter": "DATE <= $CUTOFF -> drop",
+                   "load": "auto", "incremental": "blocks", "every": "2m", "priority": 1},
+        "ICTRAN": {"directory": "UBSSTK2015", "keys": ["REFNO", "ITEMCOUNT"], "skip_before_date": "$SKIP_BEFORE_DATE",
+                   "depends_on": ["ARTRAN"], "shards": 4},
+        "apvend": {"directory": "UBSACC2015", "path": "D:/data/{name}.dbf"},
+    },
+}
+
+
+@pytest.fixture
+def write(tmp_path, monkeypatch):
+    for name in ("DBF_ROOT", "DBF_SUBPATH", "SKIP_BEFORE_DATE", "CUTOFF", "LOAD_ARTRAN", "FILTER_ARTRAN"):
+        monkeypatch.delenv(name, raising=False)
+
+    def write(manifest):
+        path = tmp_path / "tables.json"
+        path.write_text(json.dumps(manifest), encoding="utf-8")
+        return str(path)
+    return write
+
+
+def test_tables_with_defaults_params_and_paths(write):
+    tables = load_manifest(write(MANIFEST))
+    assert list(tables) == ["artran", "ictran", "apvend"]
+    ictran = tables["ictran"]
+    assert ictran.table_name == "ubs_ubsstk2015_ictran"
+    assert ictran.path == "C:/UBSSTK2015/Sample/ictran.dbf"
+    assert (ictran.skip_before_date, ictran.depends_on, ictran.shards, ictran.load) == \
+        ("20251201", ["artran"], 4, "swap")
+    assert (ictran.every, ictran.priority, ictran.strategies) == (900, 2, ["delta", "swap"])
+    assert tables["artran"].every == 120 and tables["artran"].params["CUTOFF"] == "20251212"
+    assert tables["apvend"].path == "D:/data/apvend.dbf" and tables["apvend"].keys is None
+
+
+def test_environment_overrides(write, monkeypatch):
+    monkeypatch.setenv("DBF_ROOT", "/srv/ubs/")
+    monkeypatch.setenv("SKIP_BEFORE_DATE", "20260101")
+    monkeypatch.setenv("LOAD_ARTRAN", "Delta")
+    monkeypatch.setenv("FILTER_ARTRAN", "TYPE == 'DO' -> drop")
+    tables = load_manifest(write(MANIFEST))
+    assert tables["ictran"].path == "/srv/ubs/UBSSTK2015/Sample/ictran.dbf"
+    assert tables["ictran"].skip_before_date == "20260101"
+    assert (tables["artran"].load, tables["artran"].load_overridden) == ("delta", True)
+    assert tables["artran"].filter == "TYPE == 'DO' -> drop"
+
+
+@pytest.mark.parametrize('entry, message', [
+    ({"directory": "UBSACC2015", "lod": "swap"}, "unknown settings lod"),
+    ({"keys": ["CODE"]}, "no directory"),
+    ({"directory": "UBSACC2015", "load": "merge"}, "load must be one of swap, truncate, delta, auto, not 'merge'"),
+    ({"directory": "UBSACC2015", "strategies": ["swap", "blocks"]}, "strategies must be among"),
+    ({"directory": "UBSACC2015", "incremental": "tail"}, "incremental must be one of append, blocks or null"),
+    ({"directory": "UBSACC2015", "load": "delta", "sort": True}, "load delta, sort needs keys"),
+    ({"directory": "UBSACC2015", "skip_before_date": "$NOPE"}, r"unknown param \$NOPE"),
+    ({"directory": "UBSACC2015", "depends_on": ["glpost"]}, "depends_on unknown tables glpost"),
+])
+def test_invalid_tables_are_reported_with_their_name(write, entry, message):
+    manifest = dict(MANIFEST, tables={"apvend": entry})
+    with pytest.raises(ValueError, match=f"table apvend: {message}"):
+        load_manifest(write(manifest))
+
+
+def test_shipped_manifest_is_valid(monkeypatch):
+    monkeypatch.delenv("TABLE_MANIFEST", raising=False)
+    tables = load_manifest()
+    assert "ictran" in tables and all(spec.directory for spec in tables.values())
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from table_scheduler import RecurringScheduler, TableScheduler, parse_interval
+
+WEIGHTS = {"icitem": 10, "ictran": 100, "artran": 30, "apvend": 1}
+
+
+def scheduler(run_table, workers, dependencies):
+    return TableScheduler(run_table, workers, name=lambda spec: spec, weight=WEIGHTS.get, dependencies=dependencies)
+
+
+def test_one_worker_takes_the_heaviest_chain_first(capsys):
+    order = []
+    results = scheduler(order.append, 1, {"ictran": ["artran"]}).run(["apvend", "icitem", "ictran", "artran"])
+    # artran carries ictran's weight, so it goes before icitem although it is smaller
+    assert order == ["artran", "ictran", "icitem", "apvend"]
+    assert results == {name: None for name in order}
+
+
+def test_dependents_wait_for_their_dependencies_on_many_workers(capsys):
+    events = []
+    lock = threading.Lock()
+
+    def run_table(name):
+        with lock:
+            events.append(("start", name))
+        if name == "artran":
+            raise RuntimeError("file locked")
+        with lock:
+            events.append(("end", name))
+        return name
+
+    results = scheduler(run_table, 3, {"ictran": ["artran", "not synced"], "icitem": ["ictran"]}).run(
+        ["icitem", "ictran", "artran", "apvend"])
+    # A failed dependency still lets its dependents run
+    assert isinstance(results["artran"], RuntimeError)
+    assert results["ictran"] == "ictran" and results["icitem"] == "icitem"
+    assert events.index(("start", "ictran")) > events.index(("start", "artran"))
+    assert events.index(("start", "icitem")) > events.index(("end", "ictran"))
+    assert "[artran] ❌ Error processing artran: file locked" in capsys.readouterr().out
+
+
+def test_dependency_cycle_is_an_error():
+    with pytest.raises(ValueError, match="cycle"):
+        scheduler(lambda name: None, 2, {"ictran": ["artran"], "artran": ["ictran"]}).run(["ictran", "artran"])
+
+
+@pytest.mark.parametrize('text, seconds', [("90", 90), ("90s", 90), ("2m", 120), ("1.5h", 5400), (" 15M ", 900)])
+def test_parse_interval(text, seconds):
+    assert parse_interval(text) == seconds
+
+
+SCHEDULE = {"ictran": (3600, 1), "artran": (3600, 1), "apvend": (3600, 3), "icitem": (3600, 2)}
+
+
+def test_recurring_runs_due_tables_by_priority_then_dependencies(capsys):
+    order = []
+    stop = threading.Event()
+
+    def run_table(name):
+        order.append(name)
+        if len(order) == len(SCHEDULE):
+            stop.set()
+
+    recurring = RecurringScheduler(run_table, 1, name=lambda spec: spec, schedule=SCHEDULE.get,
+                                   dependencies={"ictran": ["artran"]})
+    recurring.run(["apvend", "icitem", "ictran", "artran"], stop)
+    assert order == ["artran", "ictran", "icitem", "apvend"]
+    assert recurring.describe()[0] == "artran every 3600s (priority 1): 1 runs, 0.00s busy, last: None"
+
+
+def test_trigger_while_running_runs_once_more(capsys):
+    runs = []
+    stop = threading.Event()
+    recurring = RecurringScheduler(None, 1, name=lambda spec: spec, schedule=lambda spec: (3600, 1))
+
+    def run_table(name):
+        runs.append(name)
+        if len(runs) == 1:
+            # Triggered twice while running: one more run, not two
+            recurring.trigger(name)
+            recurring.trigger(name)
+        elif len(runs) == 2:
+            # Long enough for a third run to start if the trigger had been queued twice
+            threading.Timer(0.3, stop.set).start()
+
+    recurring.run_table = run_table
+    thread = threading.Thread(target=recurring.run, args=(["ictran"], stop))
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert runs == ["ictran", "ictran"]
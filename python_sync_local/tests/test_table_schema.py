@@ -0,0 +1,104 @@
+import re
+
+import pytest
+
+from table_schema import (_COMPACT_DATE_TEXT, _DATE_TEXT, column_type, create_table_sql, migrate_mysql_table,
+                          mysql_schema_changes)
+
+
+def field(type_code, size=0, decs=0, name='F'):
+    return {'name': name, 'type': type_code, 'size': size, 'decs': decs}
+
+
+@pytest.mark.parametrize('dbf_field, mysql, postgresql, sqlite', [
+    (field('C', 30), "VARCHAR(30)", "VARCHAR(30)", "TEXT"),
+    (field('C', 300), "TEXT", "TEXT", "TEXT"),
+    (field('M', 10), "TEXT", "TEXT", "TEXT"),
+    (field('D', 8), "DATE", "DATE", "TEXT"),
+    (field('T', 8), "DATETIME(3)", "TIMESTAMP", "TEXT"),
+    (field('N', 12, 2), "DECIMAL(12,2)", "NUMERIC(12,2)", "REAL"),
+    (field('N', 2, 2), "DECIMAL(3,2)", "NUMERIC(3,2)", "REAL"),
+    (field('Y', 8, 4), "DECIMAL(19,4)", "NUMERIC(19,4)", "REAL"),
+    (field('N', 2), "TINYINT", "SMALLINT", "INTEGER"),
+    (field('N', 5), "MEDIUMINT", "INTEGER", "INTEGER"),
+    (field('N', 10), "BIGINT", "BIGINT", "INTEGER"),
+    (field('N', 20), "DECIMAL(20,0)", "NUMERIC(20,0)", "INTEGER"),
+    (field('I', 4), "INT", "INTEGER", "INTEGER"),
+    (field('F', 12, 3), "FLOAT", "REAL", "REAL"),
+    (field('B', 8), "DOUBLE", "DOUBLE PRECISION", "REAL"),
+    (field('L', 1), "TINYINT(1)", "BOOLEAN", "INTEGER"),
+])
+def test_column_type(dbf_field, mysql, postgresql, sqlite):
+    assert column_type(dbf_field, "mysql") == mysql
+    assert column_type(dbf_field, "postgresql") == postgresql
+    assert column_type(dbf_field, "sqlite") == sqlite
+
+
+def test_create_table_sql_quotes_per_dialect():
+    structures = [field('C', 10, name='REFNO'), field('D', 8, name='DATE')]
+    assert create_table_sql('t', structures, "mysql") == \
+        "CREATE TABLE IF NOT EXISTS `t` (`REFNO` VARCHAR(10), `DATE` DATE)"
+    assert create_table_sql('t', structures, "sqlite") == \
+        "CREATE TABLE IF NOT EXISTS [t] ([REFNO] TEXT, [DATE] TEXT)"
+
+
+@pytest.mark.parametrize('text, iso, compact', [
+    ('2025-12-01', True, False),
+    ('2025-12-01 10:15:30', True, False),
+    ('2025-12-01T10:15:30.123', True, False),
+    ('20251201', False, True),
+    ('20251301', False, False),
+    ('2025120', False, False),
+    ('00000000', False, False),
+    ('', False, False),
+    ('01/12/2025', False, False),
+])
+def test_date_text_patterns(text, iso, compact):
+    assert bool(re.search(_DATE_TEXT, text)) == iso
+    assert bool(re.search(_COMPACT_DATE_TEXT, text)) == compact
+
+
+class FakeCursor:
+    """Records executed SQL; information_schema queries return the given (COLUMN_NAME, COLUMN_TYPE) rows"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.columns
+
+
+STRUCTURES = [field('C', 10, name='REFNO'), field('D', 8, name='DATE'), field('N', 12, 2, name='AMOUNT'),
+              field('N', 4, name='ITEMCOUNT'), field('T', 8, name='UPDATED'), field('L', 1, name='POSTED')]
+
+
+def test_schema_changes_ignore_display_widths_and_missing_columns():
+    cursor = FakeCursor([('REFNO', 'varchar(10)'), ('date', 'varchar(255)'), ('AMOUNT', 'decimal(12,2)'),
+                         ('ITEMCOUNT', 'smallint(6)'), ('UPDATED', 'datetime'), ('POSTED', 'tinyint(1)')])
+    changes = mysql_schema_changes(cursor, 'ubs_ubsstk2015_artran', STRUCTURES + [field('C', 5, name='NEW')])
+    assert changes == [('date', 'varchar(255)', 'DATE'), ('UPDATED', 'datetime', 'DATETIME(3)')]
+    assert cursor.executed[0][1] == ('ubs_ubsstk2015_artran',)
+
+
+def test_migration_keeps_compact_dates_before_nulling_invalid_text():
+    cursor = FakeCursor([('REFNO', 'varchar(10)'), ('DATE', 'varchar(255)'), ('AMOUNT', 'decimal(12,2)'),
+                         ('ITEMCOUNT', 'smallint'), ('UPDATED', 'datetime'), ('POSTED', 'tinyint(1)')])
+    changes = migrate_mysql_table(cursor, 'ubs_ubsstk2015_artran', STRUCTURES)
+    assert changes == [('DATE', 'varchar(255)', 'DATE'), ('UPDATED', 'datetime', 'DATETIME(3)')]
+    compact, nulls, alter = cursor.executed[1:]
+    assert compact == ("UPDATE `ubs_ubsstk2015_artran` SET `DATE` = CONCAT(LEFT(`DATE`, 4), '-', "
+                       "SUBSTRING(`DATE`, 5, 2), '-', RIGHT(`DATE`, 2)) WHERE `DATE` REGEXP %s",
+                       (_COMPACT_DATE_TEXT,))
+    assert nulls == ("UPDATE `ubs_ubsstk2015_artran` SET `DATE` = NULL WHERE `DATE` NOT REGEXP %s", (_DATE_TEXT,))
+    # A DATETIME column only gains fractional digits, its values need no preparing
+    assert alter == ("ALTER TABLE `ubs_ubsstk2015_artran` MODIFY `DATE` DATE, MODIFY `UPDATED` DATETIME(3)", None)
+
+
+def test_migration_of_up_to_date_table_does_nothing():
+    cursor = FakeCursor([('REFNO', 'varchar(10)'), ('DATE', 'date')])
+    assert migrate_mysql_table(cursor, 't', STRUCTURES[:2]) == []
+    assert len(cursor.executed) == 1
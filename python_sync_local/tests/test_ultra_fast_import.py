@@ -0,0 +1,124 @@
+import numpy as np
+from mysql.connector.connection import MySQLConnection
+
+import ultra_fast_import
+from record_batch import RecordBatch
+from ultra_fast_import import (STREAM_INFILE_NAME, StreamingInfileConnection, TsvStream, encode_tsv_batch,
+                               local_infile_unavailable, tsv_cells)
+
+
+def streaming_connection(sent):
+    connection = object.__new__(StreamingInfileConnection)
+    connection._send_data = lambda *args: sent.append(args) or b'ok'
+    connection._handle_ok = lambda packet: packet
+    return connection
+
+
+def test_streamed_load_passes_the_timeouts_on():
+    sent = []
+    connection = streaming_connection(sent)
+    stream = object()
+    connection.infile_stream = stream
+    assert connection._handle_load_data_infile(STREAM_INFILE_NAME, 30, 60) == b'ok'
+    assert sent == [(stream, True, 30, 60)]
+    assert connection.infile_stream is None
+
+
+def test_other_files_go_through_the_connector(monkeypatch):
+    calls = []
+    monkeypatch.setattr(MySQLConnection, "_handle_load_data_infile",
+                        lambda self, *args: calls.append(args) or b'connector')
+    connection = streaming_connection([])
+    assert connection._handle_load_data_infile("/etc/passwd", 30, 60) == b'connector'
+    connection.infile_stream = object()
+    assert connection._handle_load_data_infile("other.tsv", None, None) == b'connector'
+    assert calls == [("/etc/passwd", 30, 60), ("other.tsv", None, None)]
+
+
+def test_installed_connector_has_the_hook():
+    assert ultra_fast_import.STREAMING_HOOK
+
+
+def test_missing_hook_falls_back_to_chunked_inserts(monkeypatch):
+    class Cursor:
+        def execute(self, sql):
+            raise AssertionError("the server is not asked")
+
+    monkeypatch.setattr(ultra_fast_import, "MYSQL_LOCAL_INFILE", True)
+    monkeypatch.setattr(ultra_fast_import, "STREAMING_HOOK", False)
+    assert "has no LOAD DATA LOCAL hook" in local_infile_unavailable(Cursor())
+
+
+STRUCTURE = [
+    {'name': 'NAME', 'type': 'C', 'size': 20, 'decs': 0},
+    {'name': 'QTY', 'type': 'N', 'size': 5, 'decs': 0},
+    {'name': 'PRICE', 'type': 'N', 'size': 10, 'decs': 2},
+    {'name': 'POSTED', 'type': 'L', 'size': 1, 'decs': 0},
+    {'name': 'DATE', 'type': 'D', 'size': 8, 'decs': 0},
+    {'name': 'UPDATED', 'type': 'T', 'size': 8, 'decs': 0},
+]
+
+
+def typed_batch():
+    """Two rows in the column types DBFReader decodes to; the second one all NULL"""
+    columns = {
+        'NAME': np.array(['a\tb\nc\rd\\e\0f', None], dtype=object),
+        'QTY': np.array([42, 0], dtype=np.int64),
+        'PRICE': np.array([0.1, 0.0]),
+        'POSTED': np.array([True, False]),
+        'DATE': np.array(['2025-12-01', 'NaT'], dtype='datetime64[D]'),
+        'UPDATED': np.array(['2025-12-01T10:15:30.123', 'NaT'], dtype='datetime64[ms]'),
+    }
+    nulls = {name: np.array([False, True]) for name in columns}
+    return RecordBatch(STRUCTURE, columns, nulls)
+
+
+def test_batch_encodes_as_load_data_text():
+    assert encode_tsv_batch(typed_batch(), STRUCTURE) == (
+        b'a\\tb\\nc\\rd\\\\e\\0f\t42\t0.1\t1\t2025-12-01\t2025-12-01T10:15:30.123000\n'
+        b'\\N\t\\N\t\\N\t\\N\t\\N\t\\N\n')
+
+
+def test_whole_second_timestamps_have_no_fraction():
+    batch = typed_batch()
+    batch.columns['UPDATED'] = np.array(['2025-12-01T10:15:30', 'NaT'], dtype='datetime64[ms]')
+    assert encode_tsv_batch(batch, STRUCTURE).split(b'\n')[0].endswith(b'\t2025-12-01T10:15:30')
+
+
+def test_cells_of_object_columns():
+    # Rows built from Python values (RecordBatch.from_rows) keep their types in object columns
+    assert tsv_cells([True, False, None], 'O') == ['1', '0', '\\N']
+    assert tsv_cells([1, 2.5, None, b'x\ty'], 'O') == ['1', '2.5', '\\N', 'x\\ty']
+    assert tsv_cells(['', ' ', 'plain'], 'O') == ['', ' ', 'plain']
+    assert tsv_cells([1.0, 2.0], 'f', np.array([False, True])) == ['1.0', '\\N']
+
+
+def test_utf8_and_empty_batch():
+    batch = RecordBatch.from_rows(STRUCTURE[:1], [{'NAME': 'Café 中文'}])
+    assert encode_tsv_batch(batch, STRUCTURE[:1]) == 'Café 中文\n'.encode('utf-8')
+    assert encode_tsv_batch(RecordBatch.from_rows(STRUCTURE[:1], []), STRUCTURE[:1]) == b''
+
+
+def test_stream_reads_across_batches_in_short_reads():
+    structures = STRUCTURE[:2]
+    batches = [RecordBatch.from_rows(structures, [{'NAME': f'row{index}', 'QTY': index} for index in range(start, stop)])
+               for start, stop in ((0, 3), (3, 3), (3, 5))]
+    stream = TsvStream(structures, batches)
+    assert not stream.started
+    chunks = []
+    while True:
+        chunk = stream.read(7)
+        if not chunk:
+            break
+        assert len(chunk) <= 7
+        chunks.append(chunk)
+    assert b''.join(chunks) == b''.join(f'row{index}\t{index}\n'.encode() for index in range(5))
+    assert stream.started and stream.rows == 5
+    assert stream.read(7) == b''
+
+
+def test_stream_read_without_size_returns_the_current_batch():
+    structures = STRUCTURE[:1]
+    stream = TsvStream(structures, [RecordBatch.from_rows(structures, [{'NAME': 'x'}]),
+                                    RecordBatch.from_rows(structures, [{'NAME': 'y'}])])
+    assert [stream.read(), stream.read(-1), stream.read()] == [b'x\n', b'y\n', b'']
@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import CONTEXT, STRUCTURE, make_rows
+from dbf_writer import write_sample_dbf
+from watermark import plan_tail_read, save_watermark
+
+
+def test_tail_read_after_appends_only(sync_state):
+    path = str(sync_state / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, make_rows(20))
+    plan = plan_tail_read(path, "t", CONTEXT, None)
+    assert (plan.append, plan.reason) == (False, "nothing stored from a previous sync")
+    save_watermark("t", plan, CONTEXT, 20)
+
+    write_sample_dbf(path, STRUCTURE, make_rows(25))
+    plan = plan_tail_read(path, "t", CONTEXT, 20)
+    assert (plan.start, plan.stop, plan.new_records) == (20, 25, 5)
+    save_watermark("t", plan, CONTEXT, 25)
+    assert plan_tail_read(path, "t", CONTEXT, 25).new_records == 0
+
+
+@pytest.mark.parametrize('rows, context, table_rows, reason', [
+    (make_rows(20, {18: -1.0}), CONTEXT, 20, "records before the watermark changed"),
+    (make_rows(19), CONTEXT, 20, "file has fewer records than last sync (19 < 20)"),
+    (make_rows(20), {"filter": "TYPE == 'DO' -> drop"}, 20, "filter settings changed since last sync"),
+    (make_rows(20), CONTEXT, 17, "table has 17 rows, expected 20"),
+    (make_rows(20), CONTEXT, None, "table does not exist"),
+])
+def test_tail_read_falls_back_to_full_reload(sync_state, rows, context, table_rows, reason):
+    path = str(sync_state / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, make_rows(20))
+    save_watermark("t", plan_tail_read(path, "t", CONTEXT, None), CONTEXT, 20)
+    write_sample_dbf(path, STRUCTURE, rows)
+    plan = plan_tail_read(path, "t", context, table_rows)
+    assert (plan.append, plan.reason) == (False, reason)
+
+
+def test_tail_edits_before_the_hashed_records_are_not_seen(sync_state):
+    path = str(sync_state / "artran.dbf")
+    write_sample_dbf(path, STRUCTURE, make_rows(20))
+    save_watermark("t", plan_tail_read(path, "t", CONTEXT, None), CONTEXT, 20)
+    write_sample_dbf(path, STRUCTURE, make_rows(20, {3: -1.0}))
+    assert plan_tail_read(path, "t", CONTEXT, 20).reason == "20 records unchanged since last sync"
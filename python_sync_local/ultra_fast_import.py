@@ -4,45 +4,66 @@ ULTRA-FAST MySQL Import for Large Datasets (50k+ records)
 Optimized for maximum speed with minimal memory usage
 """
 
+import inspect
 import os
+import re
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.connection import MySQLConnection
 import time
 from dotenv import load_dotenv
+import numpy as np
+from record_batch import RecordBatch
+import mysql_pool
+from mysql_batches import InsertBatcher
+from sync_database import column_width_transforms, generate_mysql_create_table
 
 # Load environment variables
 load_dotenv()
 
+# Use LOAD DATA LOCAL INFILE when the server allows it (MYSQL_LOCAL_INFILE=0 always inserts in chunks)
+MYSQL_LOCAL_INFILE = os.getenv("MYSQL_LOCAL_INFILE", "1").strip().lower() not in ("0", "false", "no")
+# Name the LOAD DATA statement asks for; the connection streams the rows instead of opening it
+STREAM_INFILE_NAME = "dbf-sync-stream.tsv"
+
 def ultra_fast_mysql_import(table_name, structures, rows):
     """
     Ultra-fast MySQL import optimized for large datasets (50k+ records)
     Uses LOAD DATA INFILE for maximum speed
     """
+    return ultra_fast_mysql_import_stream(table_name, structures, [RecordBatch.from_rows(structures, rows)])
+
+def ultra_fast_mysql_import_stream(table_name, structures, batches, append=False, verbose=True, relax_checks=False):
+    """
+    Ultra-fast MySQL import from an iterable of RecordBatch objects (e.g. utils.read_dbf_iter).
+    The table is truncated first unless `append` is set. Returns the number of rows imported.
+    `verbose=False` leaves out the progress and summary lines (warnings are still printed).
+    `relax_checks` loads with unique_checks / foreign_key_checks off (for staging tables).
+    
+    Which method loads the rows:
+    
+        server local_infile=ON                      LOAD DATA LOCAL INFILE, streamed as TSV
+        server local_infile=OFF, MYSQL_LOCAL_INFILE=0,
+        a connector without the streaming hook,
+        or the LOAD is refused before any row is sent   chunked executemany
+        LOAD fails after rows were sent             error for one-shot iterators (InnoDB rolls the
+                                                    statement back); lists are replayed chunked
+    
+    Nothing is written to disk: the TSV is encoded one batch at a time while the
+    connector sends it.
+    """
+    connection = None
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "your_database"),
-            autocommit=True,  # Enable autocommit for LOAD DATA
-            use_unicode=True,
-            charset='utf8mb4',
-            connection_timeout=60,
-            sql_mode='NO_AUTO_VALUE_ON_ZERO'
-        )
-        
+        connection = connect_streaming_mysql()
+        if relax_checks:
+            connection.relax_checks()
         cursor = connection.cursor()
         
-        # Set timeout settings
-        cursor.execute("SET SESSION wait_timeout = 28800")
-        cursor.execute("SET SESSION interactive_timeout = 28800")
-        cursor.execute("SET SESSION net_read_timeout = 600")
-        cursor.execute("SET SESSION net_write_timeout = 600")
-        
         # Precheck MySQL columns and filter structures if the table already exists
         cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
         result = cursor.fetchone()
-        if result and result[0].lower() == table_name.lower():
+        table_exists = bool(result and result[0].lower() == table_name.lower())
+        if table_exists:
             cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
             existing_columns = {row[0].lower() for row in cursor.fetchall()}
             excluded = [struct['name'] for struct in structures if struct['name'].lower() not in existing_columns]
@@ -52,105 +73,246 @@ def ultra_fast_mysql_import(table_name, structures, rows):
             if not structures:
                 raise ValueError(f"No matching columns found between DBF and MySQL table '{table_name}'!")
         
-        print(f"🚀 ULTRA-FAST Import: {len(rows):,} records to {table_name}")
+        if verbose and isinstance(batches, (list, tuple)):
+            print(f"🚀 ULTRA-FAST Import: {count_batch_rows(batches):,} records to {table_name}")
+        elif verbose:
+            print(f"🚀 ULTRA-FAST Import: streaming records to {table_name}")
         start_time = time.time()
         
-        # Method 1: Try LOAD DATA INFILE (fastest method)
-        try:
-            import_csv_method(table_name, structures, rows, cursor)
-            method_used = "CSV Import"
-        except Exception as csv_error:
-            print(f"⚠️  CSV method failed: {csv_error}")
+        if table_exists and not append:
+            cursor.execute(f"TRUNCATE TABLE `{table_name}`")
+        cursor.execute(generate_mysql_create_table(table_name, structures))
+        
+        # Method 1: LOAD DATA LOCAL INFILE (fastest method)
+        stream = None
+        local_infile_error = local_infile_unavailable(cursor)
+        if local_infile_error is None:
+            stream = TsvStream(structures, batches)
+            try:
+                imported_rows = load_data_local_method(table_name, structures, stream, connection, cursor)
+                method_used = "LOAD DATA LOCAL (streamed TSV)"
+            except Exception as load_error:
+                if stream.started and not isinstance(batches, (list, tuple)):
+                    print(f"❌ LOAD DATA LOCAL failed after {stream.rows:,} rows were sent: {load_error}")
+                    raise
+                local_infile_error = f"LOAD DATA LOCAL failed: {load_error}"
+                # The connection may be mid-protocol; the fallback gets a fresh one
+                _close_quietly(cursor)
+                connection.discard()
+                connection = connect_streaming_mysql()
+                if relax_checks:
+                    connection.relax_checks()
+                cursor = connection.cursor()
+        
+        if local_infile_error is not None:
+            print(f"⚠️  {local_infile_error}")
             print("🔄 Falling back to chunked batch insert...")
             
             # Method 2: Chunked batch insert (fallback)
-            chunked_batch_method(table_name, structures, rows, cursor)
+            imported_rows = chunked_batch_method(table_name, structures, batches, connection, cursor, append=True)
             method_used = "Chunked Batch"
         
         elapsed_time = time.time() - start_time
-        records_per_second = len(rows) / elapsed_time if elapsed_time > 0 else 0
+        records_per_second = imported_rows / elapsed_time if elapsed_time > 0 else 0
         
-        print(f"✅ Import completed!")
-        print(f"📊 Method: {method_used}")
-        print(f"⏱️  Time: {elapsed_time:.2f} seconds")
-        print(f"🚀 Speed: {records_per_second:,.0f} records/second")
+        if verbose:
+            print(f"✅ Import completed!")
+            print(f"📊 Method: {method_used}")
+            print(f"⏱️  Time: {elapsed_time:.2f} seconds")
+            print(f"🚀 Speed: {records_per_second:,.0f} records/second")
         
         cursor.close()
         connection.close()
+        return imported_rows
         
     except Exception as e:
         print(f"❌ Ultra-fast import failed: {e}")
+        if connection is not None:
+            connection.close()
         raise e
 
-def import_csv_method(table_name, structures, rows, cursor):
+class StreamingInfileConnection(MySQLConnection):
     """
-    Use CSV file import method - fastest for large datasets
+    Pure-Python connector connection that answers the server's LOAD DATA LOCAL INFILE
+    request for STREAM_INFILE_NAME from `infile_stream` (any object with read(size))
+    instead of opening a file. Requests for other names go through the connector's checks.
     """
-    import csv
-    import tempfile
     
-    # Create temporary CSV file
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        
-        # Write data to CSV
-        for row in rows:
-            csv_row = []
-            for struct in structures:
-                value = row.get(struct['name'])
-                if value is None:
-                    csv_row.append('')
-                elif isinstance(value, str):
-                    # Escape quotes and newlines for CSV
-                    value = value.replace('"', '""').replace('\n', '\\n').replace('\r', '\\r')
-                    csv_row.append(f'"{value}"')
-                else:
-                    csv_row.append(str(value))
-            writer.writerow(csv_row)
-        
-        csv_filename = csvfile.name
+    infile_stream = None
     
+    def _handle_load_data_infile(self, filename, read_timeout=None, write_timeout=None):
+        # Same signature as the connector's hook (requirements.txt pins the versions this was tested with)
+        if filename != STREAM_INFILE_NAME or self.infile_stream is None:
+            return super()._handle_load_data_infile(filename, read_timeout, write_timeout)
+        stream, self.infile_stream = self.infile_stream, None
+        self._local_infile_filenames = None
+        return self._handle_ok(self._send_data(stream, True, read_timeout, write_timeout))
+
+def _has_streaming_hook():
+    """Whether the installed connector has the private methods StreamingInfileConnection builds on"""
+    try:
+        parameters = list(inspect.signature(MySQLConnection._handle_load_data_infile).parameters)
+        send_parameters = list(inspect.signature(MySQLConnection._send_data).parameters)
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return (parameters[1:] == ['filename', 'read_timeout', 'write_timeout']
+            and send_parameters[1:] == ['data_file', 'send_empty_packet', 'read_timeout', 'write_timeout']
+            and callable(getattr(MySQLConnection, '_handle_ok', None)))
+
+STREAMING_HOOK = _has_streaming_hook()
+
+def connect_streaming_mysql():
+    """Pooled autocommit connection (each LOAD DATA is its own transaction) able to stream LOCAL INFILE data"""
+    return mysql_pool.connect(autocommit=True, bulk=True)
+
+def local_infile_unavailable(cursor):
+    """Why LOAD DATA LOCAL cannot be used on this connection, or None if it can"""
+    if not MYSQL_LOCAL_INFILE:
+        return "LOAD DATA LOCAL disabled (MYSQL_LOCAL_INFILE=0)"
+    if not STREAMING_HOOK:
+        return (f"mysql-connector-python {mysql.connector.__version__} has no LOAD DATA LOCAL hook to stream "
+                f"rows through")
+    try:
+        cursor.execute("SELECT @@GLOBAL.local_infile")
+        enabled = cursor.fetchone()[0]
+    except Error as e:
+        return f"Could not check the server's local_infile setting: {e}"
+    if str(enabled) not in ('1', 'ON'):
+        return "Server has local_infile=OFF (SET GLOBAL local_infile = 1 enables the fast path)"
+    return None
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+def count_batch_rows(batches):
+    """Row count of a list of batches"""
+    return sum(len(batch) for batch in batches)
+
+class TsvStream:
+    """
+    File-like read() over the batches encoded as LOAD DATA text (tab separated, \\N for NULL,
+    backslash escapes), one batch at a time. `rows` counts the rows handed out so far.
+    """
+    
+    def __init__(self, structures, batches):
+        self.structures = structures
+        self.rows = 0
+        self.started = False
+        self._batches = iter(batches)
+        self._transforms = column_width_transforms(structures)
+        self._buffer = b''
+        self._offset = 0
+    
+    def read(self, size=-1):
+        # Short reads are fine; b'' means the end of the data
+        while self._offset >= len(self._buffer):
+            batch = next(self._batches, None)
+            if batch is None:
+                return b''
+            self.started = True
+            self._buffer = encode_tsv_batch(batch, self.structures, self._transforms)
+            self._offset = 0
+            self.rows += len(batch)
+        if size is None or size < 0:
+            size = len(self._buffer) - self._offset
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data
+
+def encode_tsv_batch(batch, structures, transforms=None):
+    """
+    One RecordBatch as LOAD DATA text. Values are the ones the executemany path sends
+    (RecordBatch.column_values), written the way MySQL parses them back: integers and
+    floats as repr, booleans as 1/0, dates as ISO strings, NULL as \\N.
+    """
+    if not len(batch):
+        return b''
+    columns = []
+    for struct in structures:
+        name = struct['name']
+        values = batch.column_values(name)
+        if transforms and name in transforms:
+            values = transforms[name](values)
+        kind = batch.columns[name].dtype.kind if name in batch.columns else 'O'
+        columns.append(tsv_cells(values, kind, batch.nulls.get(name)))
+    text = '\n'.join(map('\t'.join, zip(*columns))) + '\n'
+    return text.encode('utf-8', 'surrogateescape')
+
+def tsv_cells(values, kind, nulls=None):
+    """Column values -> TSV cell strings; `kind` is the batch column's dtype kind, `nulls` its null mask"""
+    if kind == 'b':
+        return list(map(_BOOLEAN_CELLS.__getitem__, values))
+    if kind in ('i', 'u', 'f'):
+        cells = list(map(repr, values))
+        if nulls is not None and nulls.any():
+            for index in np.flatnonzero(nulls).tolist():
+                cells[index] = '\\N'
+        return cells
+    # Strings repeat a lot (codes, names, dates), so escape each distinct value once
+    distinct = {value: _tsv_cell(value) for value in dict.fromkeys(values)}
+    return list(map(distinct.__getitem__, values))
+
+def _tsv_cell(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'surrogateescape')
+    elif not isinstance(value, str):
+        return str(value)
+    if _TSV_SPECIAL.search(value):
+        value = value.translate(_TSV_ESCAPES)
+    return value
+
+_BOOLEAN_CELLS = {True: '1', False: '0', None: '\\N'}
+_TSV_SPECIAL = re.compile(r'[\\\t\n\r\x00]')
+_TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+def load_data_local_method(table_name, structures, stream, connection, cursor):
+    """
+    LOAD DATA LOCAL INFILE with the rows read from `stream` (a TsvStream) by the connector.
+    Returns the number of rows the server loaded.
+    """
+    columns = [f"`{struct['name']}`" for struct in structures]
+    load_data_sql = f"""
+    LOAD DATA LOCAL INFILE '{STREAM_INFILE_NAME}'
+    INTO TABLE `{table_name}`
+    CHARACTER SET utf8mb4
+    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+    LINES TERMINATED BY '\\n'
+    ({', '.join(columns)})
+    """
+    
+    connection.infile_stream = stream
     try:
-        # Truncate table
-        cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
-        result = cursor.fetchone()
-        if result:
-            cursor.execute(f"TRUNCATE TABLE `{table_name}`")
-        
-        # Create table if not exists
-        create_table_sql = generate_mysql_create_table(table_name, structures)
-        cursor.execute(create_table_sql)
-        
-        # Use LOAD DATA INFILE with explicit columns for ultra-fast import
-        columns = [f"`{struct['name']}`" for struct in structures]
-        load_data_sql = f"""
-        LOAD DATA INFILE '{csv_filename}'
-        INTO TABLE `{table_name}`
-        FIELDS TERMINATED BY ','
-        ENCLOSED BY '"'
-        LINES TERMINATED BY '\\n'
-        IGNORE 0 ROWS
-        ({', '.join(columns)})
-        """
-        
         cursor.execute(load_data_sql)
-        print(f"📁 CSV import completed: {len(rows):,} records")
-        
     finally:
-        # Clean up temporary file
-        try:
-            os.unlink(csv_filename)
-        except:
-            pass
+        connection.infile_stream = None
+    loaded_rows = cursor.rowcount
+    
+    warnings = getattr(cursor, 'warning_count', 0) or 0
+    if warnings:
+        cursor.execute("SHOW WARNINGS LIMIT 5")
+        samples = "; ".join(str(row[2]) for row in cursor.fetchall())
+        print(f"⚠️  LOAD DATA reported {warnings:,} warnings (first: {samples})")
+    if loaded_rows != stream.rows:
+        print(f"⚠️  Sent {stream.rows:,} rows but the server loaded {loaded_rows:,} (duplicate keys are skipped)")
+    print(f"📁 LOAD DATA LOCAL completed: {loaded_rows:,} records")
+    return loaded_rows
 
-def chunked_batch_method(table_name, structures, rows, cursor):
+def chunked_batch_method(table_name, structures, batches, connection, cursor, append=False):
     """
     Chunked batch insert method - optimized for large datasets
+    Returns the number of rows inserted.
     """
     # Truncate table
     cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
     result = cursor.fetchone()
-    if result:
+    if result and not append:
         cursor.execute(f"TRUNCATE TABLE `{table_name}`")
     
     # Create table if not exists
@@ -159,65 +321,24 @@ def chunked_batch_method(table_name, structures, rows, cursor):
     
     insert_sql = generate_mysql_insert_sql(table_name, structures)
     
-    # Optimized chunk size based on record count
-    total_rows = len(rows)
-    if total_rows > 100000:
-        chunk_size = 5000  # Larger chunks for very large datasets
-    elif total_rows > 10000:
-        chunk_size = 2000
-    else:
-        chunk_size = 1000
-    
-    processed_rows = 0
+    # Statements sized to max_allowed_packet; progress as a percentage when the total is known
+    total_rows = count_batch_rows(batches) if isinstance(batches, (list, tuple)) else None
     
-    for i in range(0, total_rows, chunk_size):
-        chunk_rows = rows[i:i + chunk_size]
-        batch_data = []
-        
-        # Prepare chunk data
-        for row in chunk_rows:
-            row_values = []
-            for struct in structures:
-                value = row.get(struct['name'])
-                if isinstance(value, str) and len(value) > 10000:
-                    value = value[:10000]
-                row_values.append(value)
-            batch_data.append(row_values)
-        
-        # Insert chunk
-        cursor.executemany(insert_sql, batch_data)
-        processed_rows += len(chunk_rows)
-        
-        # Progress feedback
-        progress = (processed_rows / total_rows) * 100
-        print(f"📈 Progress: {processed_rows:,}/{total_rows:,} ({progress:.1f}%)")
-
-def generate_mysql_create_table(table_name, structures):
-    """Generate MySQL CREATE TABLE statement"""
-    columns = []
-    for struct in structures:
-        col_name = struct['name']
-        col_type = struct['type']
-        col_size = struct['size']
-        
-        if col_type == 'C':  # Character
-            mysql_type = f"VARCHAR({col_size})"
-        elif col_type == 'N':  # Numeric
-            decimals = struct.get('decs', 0)
-            if decimals > 0:
-                mysql_type = f"DECIMAL({col_size},{decimals})"
-            else:
-                mysql_type = f"INT({col_size})"
-        elif col_type == 'D':  # Date
-            mysql_type = "DATE"
-        elif col_type == 'L':  # Logical
-            mysql_type = "BOOLEAN"
+    def progress(processed_rows):
+        if total_rows:
+            print(f"📈 Progress: {processed_rows:,}/{total_rows:,} ({processed_rows / total_rows * 100:.1f}%)")
         else:
-            mysql_type = "TEXT"
-        
-        columns.append(f"`{col_name}` {mysql_type}")
+            print(f"📈 Progress: {processed_rows:,} records inserted")
+    
+    names = [struct['name'] for struct in structures]
+    batcher = InsertBatcher(cursor, connection, insert_sql, names, column_width_transforms(structures),
+                            on_flush=progress)
+    for batch in batches:
+        batcher.add(batch)
+    processed_rows = batcher.finish()
+    print(f"📦 {batcher.describe()}")
     
-    return f"CREATE TABLE IF NOT EXISTS `{table_name}` ({', '.join(columns)})"
+    return processed_rows
 
 def generate_mysql_insert_sql(table_name, structures):
     """Generate MySQL INSERT statement"""
@@ -4,9 +4,16 @@ import requests
 from dbfread import DBF
 from dotenv import load_dotenv
 import datetime
+from dbf_reader import DBFReader
+from record_batch import DATE_FIELD_PRIORITY, DateCutoffFilter, RecordBatch
+from parallel_reader import PARALLEL_MIN_RECORDS, iter_batches_parallel, resolve_workers
+from row_filters import combine_filters
 
 load_dotenv()  # Load environment variables from .env file
 
+# Rows per batch for read_dbf_iter and the streaming loaders
+DEFAULT_BATCH_SIZE = int(os.getenv("DBF_BATCH_SIZE", "5000"))
+
 def update_dbf_record(file_path, key_field, key_value, target_field, new_value):
     """
     Updates a field in a DBF file where a specific field matches a given value.
@@ -441,7 +448,174 @@ def serialize_record_fast(record_data, date_fields_cache=None):
     return serialized
 
 
-def read_dbf(dbf_file_path, progress_callback=None, skip_before_date=None):
+def read_dbf(dbf_file_path, progress_callback=None, skip_before_date=None, workers=None):
+    """
+    Read DBF file with the native memory-mapped reader (dbf_reader.DBFReader).
+    Falls back to the dbf library, then to the raw/dbfread readers, if the native reader fails.
+    
+    Args:
+        dbf_file_path: Path to the DBF file
+        progress_callback: Optional callback function(records_read, status_message) called periodically
+        skip_before_date: Optional date string in YYYYMMDD format (e.g., '20251201'). 
+                         Records with date fields before this date will be skipped early for better performance.
+        workers: Decoder processes for large files (default DBF_WORKERS env, 1 = serial)
+    """
+    try:
+        return read_dbf_native(dbf_file_path, progress_callback=progress_callback, skip_before_date=skip_before_date,
+                               workers=workers)
+    except Exception as e:
+        print(f"⚠️  Native DBF reader failed for {dbf_file_path}: {e}", flush=True)
+        print("Falling back to dbf library reader...", flush=True)
+        return read_dbf_dbflib(dbf_file_path, progress_callback=progress_callback, skip_before_date=skip_before_date)
+
+
+def read_dbf_native(dbf_file_path, progress_callback=None, skip_before_date=None, workers=None):
+    """
+    Read DBF file by memory-mapping it and slicing fields at fixed offsets.
+    Returns the same {"structure", "rows"} shape as read_dbf_dbflib.
+    """
+    _print_file_size(dbf_file_path)
+    with DBFReader(dbf_file_path) as reader:
+        rows = []
+        for batch in _iter_native_batches(reader, DEFAULT_BATCH_SIZE, progress_callback, skip_before_date,
+                                          workers=workers):
+            rows.extend(batch.to_rows())
+        return {
+            "structure": reader.fields,
+            "rows": rows
+        }
+
+
+def read_dbf_iter(dbf_file_path, batch_size=None, progress_callback=None, skip_before_date=None, row_filter=None,
+                  workers=None, start=0, stop=None):
+    """
+    Generator version of read_dbf: yields RecordBatch objects (record_batch.py) of at most
+    `batch_size` records, so memory is bounded by the batch, not the file.
+    
+    Args:
+        dbf_file_path: Path to the DBF file
+        batch_size: Records per batch (default DBF_BATCH_SIZE env, 5000)
+        progress_callback: Optional callback function(records_read, status_message) called periodically
+        skip_before_date: Optional date string in YYYYMMDD format (e.g., '20251201')
+        row_filter: Optional compiled filter (row_filters.parse_filter); rows it drops are
+                    never decoded beyond the fields the filter reads
+        workers: Decoder processes for large files (default DBF_WORKERS env, 1 = serial)
+        start, stop: Only read records [start, stop) (0-based, deleted ones included in the
+                     numbering), e.g. the new tail of an append-only file
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    _print_file_size(dbf_file_path)
+    try:
+        reader = DBFReader(dbf_file_path)
+    except Exception as e:
+        # Fallback readers load the whole file; we can still hand it out in batches
+        print(f"⚠️  Native DBF reader failed for {dbf_file_path}: {e}", flush=True)
+        print("Falling back to dbf library reader (not streamed)...", flush=True)
+        if start or stop is not None:
+            # The fallback readers drop deleted records, so record numbers cannot be mapped
+            raise ValueError(f"Cannot read a record range of {dbf_file_path} without the native reader") from e
+        data = read_dbf_dbflib(dbf_file_path, progress_callback=progress_callback, skip_before_date=skip_before_date)
+        rows = data['rows']
+        for i in range(0, len(rows), batch_size):
+            batch = RecordBatch.from_rows(data['structure'], rows[i:i + batch_size])
+            if row_filter is not None:
+                batch = batch.filter(~row_filter.skip_mask(batch))
+            if len(batch):
+                yield batch
+        return
+    
+    with reader:
+        yield from _iter_native_batches(reader, batch_size, progress_callback, skip_before_date, row_filter, workers,
+                                        start, stop)
+
+
+def read_dbf_structure(dbf_file_path):
+    """
+    Read only the field structure and header record count of a DBF file.
+    Returns {"structure": [...], "record_count": n}.
+    """
+    try:
+        with DBFReader(dbf_file_path) as reader:
+            return {
+                "structure": reader.fields,
+                "record_count": reader.record_count
+            }
+    except Exception as e:
+        print(f"⚠️  Native DBF reader failed for {dbf_file_path}: {e}, using dbfread for structure", flush=True)
+        dbf_table = DBF(dbf_file_path, load=False, ignore_missing_memofile=True, char_decode_errors='ignore')
+        return {
+            "structure": [
+                {"name": field.name, "type": field.type, "size": field.length, "decs": field.decimal_count}
+                for field in dbf_table.fields
+            ],
+            "record_count": len(dbf_table)
+        }
+
+
+def _print_file_size(dbf_file_path):
+    file_size = os.path.getsize(dbf_file_path)
+    file_size_mb = file_size / (1024 * 1024)
+    if file_size_mb > 0:
+        print(f"📊 File size: {file_size_mb:.2f} MB", flush=True)
+    print(f"🔍 Opening DBF file...", flush=True)
+
+
+def _iter_native_batches(reader, batch_size, progress_callback=None, skip_before_date=None, row_filter=None,
+                         workers=None, start=0, stop=None):
+    """Yield RecordBatches from an open DBFReader with date/row filtering and progress reporting"""
+    import time
+    
+    print(f"✅ Found {len(reader.fields)} fields, starting to read records...", flush=True)
+    if skip_before_date:
+        print(f"⏭️  Date filtering enabled: Skipping records before {skip_before_date}", flush=True)
+    
+    # Same rule as should_skip_record_by_date, checked on the date columns before anything else is decoded
+    date_filter = DateCutoffFilter(skip_before_date) if skip_before_date else None
+    skipped_count = 0
+    records_read = 0
+    progress_interval = 2.0  # Report progress every 2 seconds
+    start_time = time.time()
+    last_progress_time = start_time
+    
+    combined_filter = combine_filters(date_filter, row_filter)
+    workers = resolve_workers(workers)
+    if stop is None or stop > reader.record_count:
+        stop = reader.record_count
+    if workers > 1 and stop - start >= PARALLEL_MIN_RECORDS:
+        print(f"⚡ Decoding with {workers} worker processes", flush=True)
+        batch_source = iter_batches_parallel(reader, workers, batch_size, combined_filter, start, stop)
+    else:
+        batch_source = reader.iter_batches(batch_size, start, stop, row_filter=combined_filter)
+    
+    for batch in batch_source:
+        if date_filter is not None and date_filter.skipped > skipped_count:
+            if date_filter.skipped // 10000 > skipped_count // 10000:
+                print(f"⏭️  Skipped {date_filter.skipped:,} records before {skip_before_date}", flush=True)
+            skipped_count = date_filter.skipped
+        
+        records_read += len(batch)
+        current_time = time.time()
+        if current_time - last_progress_time >= progress_interval:
+            elapsed = current_time - start_time
+            rate = records_read / elapsed if elapsed > 0 else 0
+            status = f"📥 Reading records: {records_read:,} read ({rate:.0f} records/sec)"
+            if progress_callback:
+                progress_callback(records_read, status)
+            else:
+                print(status, flush=True)
+            last_progress_time = current_time
+        
+        if len(batch):
+            yield batch
+    
+    elapsed_total = time.time() - start_time
+    rate_total = records_read / elapsed_total if elapsed_total > 0 else 0
+    print(f"✅ Read {records_read:,} records in {elapsed_total:.2f}s ({rate_total:.0f} records/sec)", flush=True)
+    if skip_before_date and skipped_count > 0:
+        print(f"⏭️  Skipped {skipped_count:,} records before {skip_before_date} (performance optimization)", flush=True)
+
+
+def read_dbf_dbflib(dbf_file_path, progress_callback=None, skip_before_date=None):
     """
     Read DBF file using the dbf library for proper timestamp handling - OPTIMIZED VERSION
     with progress reporting support and performance improvements
@@ -513,11 +687,8 @@ def read_dbf(dbf_file_path, progress_callback=None, skip_before_date=None):
         # Optimized record reading loop
         for record in table:
             # Check if record is deleted - optimized (check once per record)
-            try:
-                if hasattr(record, 'is_deleted') and record.is_deleted():
-                    continue
-            except:
-                pass
+            if dbf.is_deleted(record):
+                continue
             
             # Build record data - optimized: cache field_names to avoid repeated lookups
             record_data = {}
@@ -565,9 +736,8 @@ def read_dbf(dbf_file_path, progress_callback=None, skip_before_date=None):
             
             # Early date filtering - skip old records before expensive serialization
             if skip_before_date:
-                # Convert date_fields_cache frozenset to list for the function
-                date_field_list = list(date_fields_cache) if date_fields_cache else None
-                if should_skip_record_by_date(record_data, skip_before_date, date_field_list):
+                # Fixed priority list (a list built from the frozenset had hash order and was rebuilt per record)
+                if should_skip_record_by_date(record_data, skip_before_date, DATE_FIELD_PRIORITY):
                     skipped_count += 1
                     # Report skipped count periodically
                     if skipped_count % 10000 == 0:
@@ -0,0 +1,151 @@
+"""
+Watch mode: a long-running sync that loads a table as soon as UBS has written its DBF
+(python main.py --watch).
+
+    - With the optional watchdog package (pip install watchdog) a change
+      notification on a DBF's directory triggers a check at once; without it
+      the files are polled every WATCH_POLL_SECONDS. Either way a check
+      compares the file's size, mtime and first header bytes (record count
+      and last-update date), since Windows may not update the mtime of a file
+      UBS keeps open.
+    - A changed file is synced once it has stayed unchanged for
+      WATCH_DEBOUNCE_SECONDS, so a burst of writes while UBS saves an invoice
+      is one sync, not many.
+    - Only the tables of changed files are synced, through the same tail /
+      block / delta paths as a batch run, in the process that keeps its MySQL
+      connections pooled between syncs.
+    - Every WATCH_SWEEP_MINUTES all files go through the manifest check
+      (file_manifest.py), which only reads the ones that really changed.
+"""
+
+import os
+import threading
+import time
+
+# Seconds between checks of the watched files when there are no change notifications
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "2"))
+# A changed file is synced once it has not changed for this long
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "3"))
+# Minutes between checks of every file against the manifest (0 = only on changes)
+WATCH_SWEEP_MINUTES = float(os.getenv("WATCH_SWEEP_MINUTES", "60"))
+# Seconds between checks while change notifications are active (they only make a check come sooner)
+_NOTIFIED_POLL_SECONDS = 30.0
+
+
+def file_signature(path):
+    """(size, mtime, first 12 header bytes) of a file, or None if it cannot be read"""
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as handle:
+            header = handle.read(12)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, header
+
+
+class DbfWatcher:
+    """Tells which of `paths` changed and then stayed unchanged for WATCH_DEBOUNCE_SECONDS"""
+
+    def __init__(self, paths, notify=True):
+        self.paths = list(paths)
+        self._signatures = {path: file_signature(path) for path in self.paths}
+        self._changed_at = {}
+        self._wake = threading.Event()
+        self._observer = self._start_notifications() if notify else None
+
+    @property
+    def notifying(self):
+        return self._observer is not None
+
+    def settled(self, now=None):
+        """Paths whose changes have settled since the last call, in `paths` order"""
+        now = time.monotonic() if now is None else now
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature != self._signatures[path]:
+                self._signatures[path] = signature
+                self._changed_at[path] = now
+        ready = [path for path in self.paths
+                 if path in self._changed_at and now - self._changed_at[path] >= WATCH_DEBOUNCE_SECONDS]
+        for path in ready:
+            del self._changed_at[path]
+        return ready
+
+    def wait(self, timeout=None):
+        """Sleep until the next check is due, a change notification arrives or `timeout` passes"""
+        interval = WATCH_POLL_SECONDS if not self.notifying else _NOTIFIED_POLL_SECONDS
+        if self._changed_at:
+            remaining = WATCH_DEBOUNCE_SECONDS - (time.monotonic() - max(self._changed_at.values()))
+            interval = min(WATCH_POLL_SECONDS, max(0.1, remaining))
+        if timeout is not None:
+            interval = min(interval, timeout)
+        self._wake.wait(max(0.0, interval))
+        self._wake.clear()
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def _start_notifications(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print("ℹ️  watchdog is not installed (pip install watchdog), polling the DBF files instead", flush=True)
+            return None
+        watched = {os.path.normcase(os.path.abspath(path)) for path in self.paths}
+        wake = self._wake
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+                    if path and os.path.normcase(os.path.abspath(path)) in watched:
+                        wake.set()
+
+        observer = Observer()
+        for directory in sorted({os.path.dirname(os.path.abspath(path)) for path in self.paths}):
+            if os.path.isdir(directory):
+                observer.schedule(Handler(), directory, recursive=False)
+        try:
+            observer.start()
+        except OSError as e:
+            print(f"⚠️  Change notifications unavailable ({e}), polling the DBF files instead", flush=True)
+            return None
+        return observer
+
+
+def watch_files(files, sync_files, stop=None, notify=True):
+    """
+    Call `sync_files(specs)` with the specs of the files that changed, until `stop` (a
+    threading.Event) is set or Ctrl+C. `files` is {path: spec}; all of them are synced
+    once at the start and on every sweep. Errors of a sync are reported and watching goes on.
+    """
+    stop = stop or threading.Event()
+    watcher = DbfWatcher(files, notify=notify)
+    mode = "change notifications" if watcher.notifying else f"polling every {WATCH_POLL_SECONDS:g}s"
+    print(f"👀 Watching {len(files)} DBF files ({mode}, {WATCH_DEBOUNCE_SECONDS:g}s debounce)", flush=True)
+
+    def run(paths, why):
+        print(f"🔔 {why}: {', '.join(os.path.basename(path) for path in paths)}", flush=True)
+        try:
+            sync_files([files[path] for path in paths])
+        except Exception as e:
+            print(f"❌ Sync failed: {e}", flush=True)
+
+    sweep_every = WATCH_SWEEP_MINUTES * 60
+    next_sweep = time.monotonic()  # every file is checked once at the start
+    try:
+        while not stop.is_set():
+            if time.monotonic() >= next_sweep:
+                run(list(files), "Checking all files")
+                next_sweep = time.monotonic() + sweep_every if sweep_every > 0 else float("inf")
+            changed = watcher.settled()
+            if changed:
+                run(changed, "Changed")
+            watcher.wait(timeout=max(0.0, next_sweep - time.monotonic()))
+    except KeyboardInterrupt:
+        print("\n🛑 Watch mode stopped", flush=True)
+    finally:
+        watcher.close()
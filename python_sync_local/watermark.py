@@ -0,0 +1,200 @@
+"""
+Append-only tail reads for DBF files UBS mostly appends to (artran, ictran, arpost, glpost).
+
+After a successful sync the watermark of the file is stored: record count,
+record length, header length, a hash of the field descriptors and a hash of
+the last WATERMARK_RECORDS raw records (deletion flags included). On the next
+run, if all of that still matches, only the records after the old count are
+read and appended to the table, without a TRUNCATE. Anything else falls back
+to a full reload:
+
+    - no watermark yet, or the filters / SKIP_BEFORE_DATE changed
+    - different record layout (structure change)
+    - fewer records than before (file was packed)
+    - one of the hashed records was edited or deleted
+    - the table no longer has the row count we left it with
+    - the last full reload is older than DBF_FULL_RELOAD_HOURS
+
+Edits further back than the hashed records are not seen by the tail check; the
+periodic full reload picks them up.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+from dbf_reader import DBFReader
+
+WATERMARK_FILE = os.getenv(
+    "DBF_WATERMARK_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sync_state", "watermarks.json"),
+)
+# Records at the end of the previous sync whose bytes must be unchanged for a tail read
+WATERMARK_RECORDS = int(os.getenv("DBF_WATERMARK_RECORDS", "64"))
+# Force a full reload of tail-synced tables at least this often (0 = never)
+FULL_RELOAD_HOURS = float(os.getenv("DBF_FULL_RELOAD_HOURS", "24"))
+# Held around every read-modify-write of a sync state file; tables can be synced on several threads
+STATE_LOCK = threading.RLock()
+
+
+class TailPlan:
+    """What to read from a DBF: records [start, stop); start > 0 means append to the table"""
+
+    def __init__(self, start, stop, reason, watermark, previous=None):
+        self.start = start
+        self.stop = stop
+        self.reason = reason
+        self.watermark = watermark
+        self.previous = previous
+
+    @property
+    def append(self):
+        return self.start > 0
+
+    @property
+    def new_records(self):
+        return self.stop - self.start
+
+    def full_reload(self, reason):
+        """The same file, planned as a full reload of every record"""
+        return TailPlan(0, self.stop, reason, self.watermark)
+
+
+def watermark_key(table_name):
+    """State key: the target database plus the table, so switching databases never reuses a watermark"""
+    db_type = os.getenv("DB_TYPE", "mysql")
+    if db_type == "sqlite":
+        target = os.path.abspath(os.getenv("SQLITE_DB_PATH", "database.db"))
+    else:
+        target = f"{os.getenv('DB_HOST', 'localhost')}/{os.getenv('DB_NAME', 'your_database')}"
+    return f"{db_type}:{target}:{table_name}"
+
+
+def compute_watermark(reader, record_count=None, tail_records=None):
+    """Watermark of the first `record_count` records (default: all) of an open DBFReader"""
+    count = reader.record_count if record_count is None else record_count
+    tail = min(WATERMARK_RECORDS if tail_records is None else tail_records, count)
+    return {
+        "record_count": count,
+        "record_length": reader.record_length,
+        "header_length": reader.header_length,
+        "fields_hash": digest(reader.raw_field_descriptors()),
+        "tail_records": tail,
+        "tail_hash": digest(reader.raw_records(count - tail, count)),
+    }
+
+
+def plan_tail_read(dbf_file_path, table_name, context, table_rows, force_full=False):
+    """
+    Compare the file with its stored watermark and decide between a tail read and a full reload.
+
+    context:    JSON-serializable settings the loaded rows depend on (filters, cutoff dates)
+    table_rows: current row count of the table (None if it does not exist)
+    force_full: always plan a full reload (the new watermark is still computed)
+    """
+    previous = load_watermarks().get(watermark_key(table_name))
+    with DBFReader(dbf_file_path) as reader:
+        watermark = compute_watermark(reader)
+        if force_full:
+            reason = "full reload requested"
+        else:
+            reason = _full_reload_reason(reader, previous, context, table_rows)
+        if reason:
+            return TailPlan(0, reader.record_count, reason, watermark)
+        start = previous["record_count"]
+        return TailPlan(start, reader.record_count, f"{start:,} records unchanged since last sync", watermark, previous)
+
+
+def _full_reload_reason(reader, previous, context, table_rows):
+    reason = state_reload_reason(reader, previous, context, table_rows)
+    if reason:
+        return reason
+    count = previous["record_count"]
+    tail = previous["tail_records"]
+    if digest(reader.raw_records(count - tail, count)) != previous["tail_hash"]:
+        return "records before the watermark changed"
+    return None
+
+
+def state_reload_reason(reader, previous, context, table_rows):
+    """
+    Why the stored state of a previous sync cannot be built on (None if it can):
+    missing, other settings, other layout, packed file, table changed or full reload due.
+    `previous` needs the keys written by compute_watermark and save_watermark.
+    """
+    if previous is None:
+        return "nothing stored from a previous sync"
+    if previous.get("context") != context:
+        return "filter settings changed since last sync"
+    if (previous["record_length"], previous["header_length"]) != (reader.record_length, reader.header_length) \
+            or previous["fields_hash"] != digest(reader.raw_field_descriptors()):
+        return "record layout changed"
+    if reader.record_count < previous["record_count"]:
+        return f"file has fewer records than last sync ({reader.record_count:,} < {previous['record_count']:,})"
+    if table_rows is None:
+        return "table does not exist"
+    if table_rows != previous.get("table_rows"):
+        return f"table has {table_rows:,} rows, expected {previous.get('table_rows', 0):,}"
+    if FULL_RELOAD_HOURS > 0:
+        full_synced_at = datetime.datetime.fromisoformat(previous["full_synced_at"])
+        if datetime.datetime.now() - full_synced_at > datetime.timedelta(hours=FULL_RELOAD_HOURS):
+            return f"last full reload is older than {FULL_RELOAD_HOURS:g}h"
+    return None
+
+
+def save_watermark(table_name, plan, context, table_rows):
+    """Record the watermark of a plan after its rows were loaded successfully"""
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    entry = dict(plan.watermark)
+    entry["context"] = context
+    entry["table_rows"] = table_rows
+    entry["synced_at"] = now
+    entry["full_synced_at"] = plan.previous["full_synced_at"] if plan.append else now
+
+    with STATE_LOCK:
+        watermarks = load_watermarks()
+        watermarks[watermark_key(table_name)] = entry
+        _write_watermarks(watermarks)
+
+
+def clear_watermark(table_name):
+    """Forget a table's watermark so its next sync is a full reload"""
+    with STATE_LOCK:
+        watermarks = load_watermarks()
+        if watermarks.pop(watermark_key(table_name), None) is not None:
+            _write_watermarks(watermarks)
+
+
+def load_watermarks():
+    return load_state_file(WATERMARK_FILE)
+
+
+def _write_watermarks(watermarks):
+    write_state_file(WATERMARK_FILE, watermarks)
+
+
+def load_state_file(path):
+    """JSON sync state from `path` ({} if missing or unreadable, which means full reloads)"""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read sync state file {path}: {e}, doing full reloads", flush=True)
+        return {}
+
+
+def write_state_file(path, state):
+    # Write then rename, so an interrupted sync never leaves a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(state, handle, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()